@@ -1,20 +1,70 @@
-from flask import Flask, render_template, request, send_file, jsonify
+from flask import Flask, render_template, request, send_file, jsonify, Response, url_for, stream_with_context
+from werkzeug.exceptions import RequestEntityTooLarge
 from utils.puzzle_generator import generate_puzzle
-from utils.pdf_exporter import export_to_pdf
-from utils.word_exporter import export_to_word
+from utils.puzzle_format import make_puzzle, export_puzzle, pack_grid, MAX_PUZZLE_SEED
+from utils.puzzle_cache import store_preview_puzzle, get_preview_puzzle
+from utils.export_cache import make_export_key, get_or_render_export, get_cached_export, has_cached_export, get_shared_seed
+from utils.shape_masks import get_shape_digest
+from utils.pdf_exporter import export_booklet_pdf_parallel
+from utils.word_exporter import export_workbook_docx
+from utils.job_queue import register_job_handler, submit_job, get_job, get_job_result, start_job_workers, watch_job
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+import gzip
+import io
 import os
 import json
+import multiprocessing
+import re
+import secrets
+import threading
+
+try:
+    import brotli  # Optional: smaller compact preview responses when installed
+except ImportError:
+    brotli = None
 
 app = Flask(__name__)
 
-# Use absolute path for uploads folder to avoid path issues
-UPLOAD_FOLDER = os.path.abspath('uploads')
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+# Reject oversized request bodies before they are read (image uploads are the largest)
+app.config['MAX_CONTENT_LENGTH'] = 12 * 1024 * 1024
+
+# Bounded pool for decoding uploaded shape images, so a burst of large photos
+# can't occupy every request thread at once. At most UPLOAD_SLOTS uploads are
+# decoding or waiting; beyond that, uploads are turned away (503) instead of
+# holding a request thread in the queue.
+UPLOAD_WORKERS = 2
+UPLOAD_SLOTS = 2 * UPLOAD_WORKERS
+UPLOAD_TIMEOUT = 30  # seconds
+upload_executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix='shape-upload')
+upload_slots = threading.BoundedSemaphore(UPLOAD_SLOTS)
+
+# Compact preview responses smaller than this are sent uncompressed
+COMPACT_COMPRESS_MIN_BYTES = 256
+
+# File extension per export format (anything else is exported as PDF)
+EXPORT_EXTENSIONS = {'word': 'docx', 'pdf': 'pdf', 'svg': 'svg', 'png': 'png'}
+
+# Export jobs (see utils/job_queue.py): the most puzzles in one booklet job, and
+# the processes booklets render with, leaving a core free for /preview traffic.
+# Every job worker thread shares one pool of render processes, so concurrent
+# booklets queue for the same BOOKLET_RENDER_PROCESSES cores instead of each
+# starting its own. The pool is started with forkserver (spawn where that
+# isn't available) rather than fork, since forking this multi-threaded server
+# can copy locks held by other threads into the children.
+JOB_MAX_PUZZLES = 500
+BOOKLET_RENDER_PROCESSES = max(1, (os.cpu_count() or 2) - 1)
+booklet_render_pool = None
+booklet_render_pool_lock = threading.Lock()
 
-# Ensure uploads directory exists
-if not os.path.exists(app.config['UPLOAD_FOLDER']):
-    os.makedirs(app.config['UPLOAD_FOLDER'])
-    print(f"Created uploads folder at: {app.config['UPLOAD_FOLDER']}")
+# Share of a job's progress bar spent generating; the rest is rendering
+RENDER_PROGRESS_START = 0.4
+
+# Export download URLs (/exports/<key>/<filename>) are keyed by a sha256 hex digest
+EXPORT_KEY_PATTERN = re.compile(r'[0-9a-f]{64}')
+EXPORT_DOWNLOAD_MAX_AGE = 7 * 24 * 60 * 60  # seconds
+
+# Server-sent event streams end after this long (EventSource reconnects on its own)
+JOB_EVENTS_TIMEOUT = 5 * 60  # seconds
 
 @app.route('/')
 def index():
@@ -23,65 +73,252 @@ def index():
 @app.route('/generate', methods=['POST'])
 def generate():
     try:
-        # Get form data
-        title = request.form.get('title', 'Word Search Puzzle')
-        subject = request.form.get('subject', '')
-        words_text = request.form.get('words', '')
-        shape = request.form.get('shape', 'square')
-        font = request.form.get('font', 'Arial')
-        theme = request.form.get('theme', 'modern')
-        export_format = request.form.get('exportFormat', 'pdf')
-        allow_vertical = request.form.get('allowVertical') == 'on'
-        allow_horizontal = request.form.get('allowHorizontal') == 'on'
-        allow_diagonal = request.form.get('allowDiagonal') == 'on'
+        try:
+            export = read_export_request(request.form)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Process words - keep original with spaces for display
-        original_words = [word.strip().upper() for word in words_text.split('\n') if word.strip()]
+        if not export['puzzle_words']:
+            return jsonify({'error': 'No words provided'}), 400
         
-        # Create versions without spaces for puzzle placement
-        puzzle_words = [word.replace(' ', '') for word in original_words]
+        export_key = export['export_key']
         
-        if not puzzle_words:
-            return jsonify({'error': 'No words provided'}), 400
+        # Served from the cache, or rendered once and shared by identical concurrent requests
+        output = io.BytesIO(render_export_request(export))
         
-        # Generate puzzle using words without spaces
-        grid, placed_words_no_spaces = generate_puzzle(
-            words=puzzle_words,
-            shape=shape,
-            allow_vertical=allow_vertical,
-            allow_horizontal=allow_horizontal,
-            allow_diagonal=allow_diagonal
-        )
-        
-        # Map placed words back to original format with spaces
-        # Create a mapping from no-space version to original
-        word_mapping = {word.replace(' ', ''): word for word in original_words}
-        placed_words_with_spaces = [word_mapping.get(word, word) for word in placed_words_no_spaces]
-        
-        # Create filename with full path
-        safe_title = title.replace(' ', '_').replace('/', '_').replace('\\', '_')
-        
-        # Export based on format (use words with spaces for display)
-        if export_format == 'word':
-            filename = f"{safe_title}.docx"
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            print(f"DEBUG: Saving Word file to: {filepath}")
-            print(f"DEBUG: Upload folder exists: {os.path.exists(app.config['UPLOAD_FOLDER'])}")
-            print(f"DEBUG: Full upload folder path: {os.path.abspath(app.config['UPLOAD_FOLDER'])}")
-            export_to_word(title, subject, grid, placed_words_with_spaces, font, filepath, theme, shape)
-        else:  # PDF
-            filename = f"{safe_title}.pdf"
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            print(f"DEBUG: Saving PDF file to: {filepath}")
-            print(f"DEBUG: Upload folder exists: {os.path.exists(app.config['UPLOAD_FOLDER'])}")
-            print(f"DEBUG: Full upload folder path: {os.path.abspath(app.config['UPLOAD_FOLDER'])}")
-            export_to_pdf(title, subject, grid, placed_words_with_spaces, font, filepath, theme, shape)
-        
-        return send_file(filepath, as_attachment=True, download_name=filename)
+        # send_file closes the buffer once the response has been sent
+        response = send_file(output, as_attachment=True, download_name=export['filename'])
+        response.headers['X-Puzzle-Seed'] = str(export['seed'])
+        
+        # Repeat downloads of this document can GET it (and revalidate) from here
+        if has_cached_export(export_key):
+            response.headers['Content-Location'] = url_for(
+                'download_export', export_key=export_key, filename=export['filename'])
+        return response
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/exports/<export_key>/<filename>', methods=['GET'])
+def download_export(export_key, filename):
+    """
+    Download a document rendered earlier, while it is still in the export cache.
+    The URL is keyed by the document's inputs, so its content never changes:
+    it carries a strong ETag and browsers may keep it indefinitely.
+    """
+    if not EXPORT_KEY_PATTERN.fullmatch(export_key):
+        return jsonify({'error': 'Export not found'}), 404
+    
+    if request.if_none_match.contains(export_key):
+        response = Response(status=304)
+    else:
+        data = get_cached_export(export_key)
+        if data is None:
+            return jsonify({'error': 'Export is no longer cached, generate it again'}), 404
+        response = send_file(io.BytesIO(data), as_attachment=True, download_name=filename)
+    
+    response.set_etag(export_key)
+    response.headers['Cache-Control'] = f'private, max-age={EXPORT_DOWNLOAD_MAX_AGE}, immutable'
+    return response
+
+def is_checked(values, name):
+    """Checkbox value from a form ('on') or a JSON body (true)."""
+    return values.get(name) in ('on', True)
+
+def get_text_option(values, name, default=''):
+    """A text option from a form or JSON body, rejecting other JSON types."""
+    value = values.get(name, default)
+    if not isinstance(value, str):
+        raise ValueError(f'{name} must be a string')
+    return value
+
+def read_export_request(values):
+    """
+    Read the export options posted to /generate or /jobs.
+    
+    Args:
+        values: Form fields, or the equivalent JSON object (where words may be
+                a list and checkboxes booleans)
+    
+    Returns:
+        dict with the normalized options, the resolved seed and preview puzzle
+        (if the token is still valid), the download filename and the export key
+    
+    Raises:
+        ValueError: If an option is invalid
+    """
+    title = get_text_option(values, 'title', 'Word Search Puzzle')
+    subject = get_text_option(values, 'subject')
+    words_text = values.get('words', '')
+    shape = get_text_option(values, 'shape', 'square')
+    font = get_text_option(values, 'font', 'Arial')
+    theme = get_text_option(values, 'theme', 'modern')
+    export_format = get_text_option(values, 'exportFormat', 'pdf')
+    allow_vertical = is_checked(values, 'allowVertical')
+    allow_horizontal = is_checked(values, 'allowHorizontal')
+    allow_diagonal = is_checked(values, 'allowDiagonal')
+    answer_key = is_checked(values, 'answerKey')
+    
+    if isinstance(words_text, list):
+        if not all(isinstance(word, str) for word in words_text):
+            raise ValueError('words must be strings')
+        words_text = '\n'.join(words_text)
+    elif not isinstance(words_text, str):
+        raise ValueError('words must be a string or a list of strings')
+    
+    # Process words - keep original with spaces for display
+    original_words = [word.strip().upper() for word in words_text.split('\n') if word.strip()]
+    
+    # Create versions without spaces for puzzle placement
+    puzzle_words = [word.replace(' ', '') for word in original_words]
+    
+    # A token from /preview names the grid the user just saw; use it (and its
+    # seed) as long as the words and options haven't changed since
+    grid_inputs = get_grid_inputs(original_words, shape, allow_vertical, allow_horizontal, allow_diagonal)
+    puzzle_token = get_text_option(values, 'puzzleToken')
+    preview_puzzle = get_preview_puzzle(puzzle_token, grid_inputs) if puzzle_token else None
+    
+    # Everything besides the seed that determines the document's content
+    document_inputs = dict(title=title, subject=subject, font=font, theme=theme, format=export_format,
+                           answer_key=answer_key, **grid_inputs)
+    
+    # Same seed + same inputs = same puzzle; without one, pick a fresh seed (shared
+    # by identical requests for a few seconds, so a burst of them renders once)
+    # and return it in X-Puzzle-Seed so the client can ask for this puzzle again
+    seed_value = values.get('seed', '')
+    if isinstance(seed_value, bool) or not isinstance(seed_value, (str, int)):
+        raise ValueError('seed must be a whole number')
+    seed_text = str(seed_value).strip()
+    if preview_puzzle is not None:
+        seed = preview_puzzle['seed']
+    elif seed_text.isdigit():
+        seed = int(seed_text)
+        if seed > MAX_PUZZLE_SEED:
+            raise ValueError(f'Seed must be at most {MAX_PUZZLE_SEED}')
+    else:
+        seed = get_shared_seed(document_inputs, secrets.randbelow(2 ** 31))
+    
+    # Create filename from the title
+    safe_title = title.replace(' ', '_').replace('/', '_').replace('\\', '_')
+    extension = EXPORT_EXTENSIONS.get(export_format, 'pdf')
+    filename = f"{safe_title}.{extension}"
+    
+    # Hashed into the cache key and download URL
+    export_key = make_export_key(seed=seed, **document_inputs)
+    
+    return {
+        'title': title,
+        'subject': subject,
+        'font': font,
+        'theme': theme,
+        'export_format': export_format,
+        'answer_key': answer_key,
+        'shape': shape,
+        'allow_vertical': allow_vertical,
+        'allow_horizontal': allow_horizontal,
+        'allow_diagonal': allow_diagonal,
+        'original_words': original_words,
+        'puzzle_words': puzzle_words,
+        'preview_puzzle': preview_puzzle,
+        'seed': seed,
+        'filename': filename,
+        'export_key': export_key
+    }
+
+def get_export_puzzle(export, progress=None):
+    """The puzzle record for an export: the previewed one, or generated from the seed."""
+    if export['preview_puzzle'] is not None:
+        return export['preview_puzzle']
+    return generate_puzzle_record(export['puzzle_words'], export['original_words'], export['shape'],
+                                  export['allow_vertical'], export['allow_horizontal'],
+                                  export['allow_diagonal'], export['seed'], progress)
+
+def render_export_request(export, progress=None):
+    """
+    Render (or fetch from the export cache) the document for read_export_request's options.
+    
+    progress, if given, is a job progress callback (see utils/job_queue.py)
+    that receives the words placed, then the pages rendered and bytes written.
+    """
+    def render_export():
+        # The puzzle record is what every exporter renders (see utils/puzzle_format.py)
+        if progress:
+            puzzle = get_export_puzzle(export, get_word_progress(progress, 0.0, RENDER_PROGRESS_START))
+            report_pages, report_bytes = get_render_progress(progress, RENDER_PROGRESS_START, 1.0)
+            report_pages(0, 1)
+            output = ProgressBuffer(report_bytes)
+        else:
+            puzzle = get_export_puzzle(export)
+            output = io.BytesIO()
+        
+        # Export based on format (use words with spaces for display) into a
+        # per-request buffer, so concurrent downloads never share a file
+        export_puzzle(puzzle, export['export_format'], output, export['title'], export['subject'],
+                      export['font'], export['theme'], export['answer_key'])
+        
+        if progress:
+            report_pages(1, 1)
+        return output.getvalue()
+    
+    return get_or_render_export(export['export_key'], render_export)
+
+class ProgressBuffer(io.BytesIO):
+    """In-memory output that reports the bytes written so far after every write."""
+    
+    def __init__(self, report):
+        super().__init__()
+        self.report = report
+        self.bytes_written = 0
+    
+    def write(self, data):
+        written = super().write(data)
+        # Zip writers seek back to patch headers, so only count growth
+        if self.tell() > self.bytes_written:
+            self.bytes_written = self.tell()
+            self.report(self.bytes_written)
+        return written
+
+def get_word_progress(progress, start, end, label=''):
+    """
+    generate_puzzle progress callback that reports words placed as the 'generating' stage.
+    
+    Args:
+        progress: Job progress callback
+        start, end: Job progress fractions this puzzle's generation spans
+        label: Prefix for the message (e.g. which puzzle of a booklet)
+    """
+    def report_words(tried, total, placed):
+        progress(start + (end - start) * tried / total, f'{label}Placed {placed} of {total} words',
+                 'generating', words_placed=placed, words_tried=tried, words_total=total)
+    return report_words
+
+def get_render_progress(progress, start, end, pages_total=1):
+    """
+    Callbacks that report the 'rendering' stage: pages rendered (from an
+    exporter) and bytes written (from a ProgressBuffer).
+    
+    Returns:
+        (report_pages(pages_rendered, total_pages), report_bytes(bytes_written))
+    """
+    counts = {'pages_rendered': 0, 'pages_total': pages_total, 'bytes_written': 0}
+    
+    def report():
+        fraction = start + (end - start) * counts['pages_rendered'] / counts['pages_total']
+        message = f"Rendered {counts['pages_rendered']} of {counts['pages_total']} pages"
+        if counts['bytes_written']:
+            message += f", {counts['bytes_written']:,} bytes written"
+        progress(fraction, message, 'rendering', **counts)
+    
+    def report_pages(pages_rendered, pages_total):
+        counts.update(pages_rendered=pages_rendered, pages_total=pages_total)
+        report()
+    
+    def report_bytes(bytes_written):
+        counts['bytes_written'] = bytes_written
+        report()
+    
+    return report_pages, report_bytes
+
 @app.route('/preview', methods=['POST'])
 def preview():
     try:
@@ -101,42 +338,333 @@ def preview():
         if not puzzle_words:
             return jsonify({'error': 'No words provided'}), 400
         
-        # Generate puzzle using words without spaces
-        grid, placed_words_no_spaces = generate_puzzle(
-            words=puzzle_words,
-            shape=shape,
-            allow_vertical=allow_vertical,
-            allow_horizontal=allow_horizontal,
-            allow_diagonal=allow_diagonal
-        )
-        
-        # Map placed words back to original format with spaces
-        word_mapping = {word.replace(' ', ''): word for word in original_words}
-        placed_words_with_spaces = [word_mapping.get(word, word) for word in placed_words_no_spaces]
+        # Seeded, so /generate can rebuild this exact grid if the token has expired
+        seed = secrets.randbelow(2 ** 31)
+        puzzle = generate_puzzle_record(puzzle_words, original_words, shape, allow_vertical,
+                                        allow_horizontal, allow_diagonal, seed)
+        grid = puzzle['grid']
+        placed_words_with_spaces = puzzle['words']
+        placements = puzzle['placements']
+        
+        # Keep the puzzle so downloading it doesn't place the words again
+        grid_inputs = get_grid_inputs(original_words, shape, allow_vertical, allow_horizontal, allow_diagonal)
+        token = store_preview_puzzle(puzzle, grid_inputs)
+        
+        # Opt-in compact encoding: packed letters + mask runs (as in utils/puzzle_format.py)
+        # and flat [row, col, dr, dc] placements in word order, compressed when accepted
+        if request.form.get('compact') == 'on':
+            letters, mask = pack_grid(grid)
+            return make_compact_response({
+                'success': True,
+                'compact': 1,
+                'token': token,
+                'seed': seed,
+                'rows': len(grid),
+                'cols': len(grid[0]) if grid else 0,
+                'letters': letters,
+                'mask': mask,
+                'words': placed_words_with_spaces,
+                'placements': [value for placement in placements
+                               for value in (placement['row'], placement['col'], placement['dr'], placement['dc'])]
+            })
         
         return jsonify({
             'grid': grid,
             'words': placed_words_with_spaces,
+            'token': token,
+            'seed': seed,
             'success': True
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def get_grid_inputs(words, shape, allow_vertical, allow_horizontal, allow_diagonal):
+    """Everything besides the seed that determines a generated grid."""
+    return {
+        'words': words,
+        'shape': shape,
+        'shape_digest': get_shape_digest(shape),
+        'allow_vertical': allow_vertical,
+        'allow_horizontal': allow_horizontal,
+        'allow_diagonal': allow_diagonal
+    }
+
+def generate_puzzle_record(puzzle_words, original_words, shape, allow_vertical, allow_horizontal, allow_diagonal, seed,
+                           progress=None):
+    """Generate a puzzle (words without spaces) and return its record with the display words."""
+    grid, placed_words_no_spaces, placements = generate_puzzle(
+        words=puzzle_words,
+        shape=shape,
+        allow_vertical=allow_vertical,
+        allow_horizontal=allow_horizontal,
+        allow_diagonal=allow_diagonal,
+        return_placements=True,
+        seed=seed,
+        progress=progress
+    )
+    
+    # Map placed words back to original format with spaces
+    word_mapping = {word.replace(' ', ''): word for word in original_words}
+    placed_words_with_spaces = [word_mapping.get(word, word) for word in placed_words_no_spaces]
+    
+    return make_puzzle(grid, placed_words_with_spaces, placements, shape, seed)
+
+def make_compact_response(payload):
+    """JSON response compressed with brotli (if installed) or gzip when the client accepts it."""
+    body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    encoding = None
+    if len(body) >= COMPACT_COMPRESS_MIN_BYTES:
+        if brotli is not None and request.accept_encodings['br']:
+            body = brotli.compress(body, quality=5)
+            encoding = 'br'
+        elif request.accept_encodings['gzip']:
+            body = gzip.compress(body, compresslevel=6)
+            encoding = 'gzip'
+    
+    response = Response(body, mimetype='application/json')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+def read_booklet_request(values):
+    """
+    Read a booklet job: shared options (title, font, theme, exportFormat,
+    answerKeys) plus a list of puzzles, each with the /generate fields
+    (title, subject, words, shape, allow*, seed).
+    
+    Returns:
+        dict with the entries, their read_export_request results, the booklet
+        options, the download filename and the export key
+    """
+    entries = values.get('puzzles')
+    if isinstance(entries, str):
+        entries = json.loads(entries)
+    if not isinstance(entries, list) or not entries:
+        raise ValueError('No puzzles provided')
+    if len(entries) > JOB_MAX_PUZZLES:
+        raise ValueError(f'A booklet can have at most {JOB_MAX_PUZZLES} puzzles')
+    
+    # Each puzzle falls back to the booklet's options for anything it doesn't set
+    exports = []
+    for number, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict):
+            raise ValueError(f'Puzzle {number} is not an object')
+        export = read_export_request({**values, **entry})
+        if not export['puzzle_words']:
+            raise ValueError(f'Puzzle {number} has no words')
+        exports.append(export)
+    
+    title = get_text_option(values, 'title', 'Word Search Booklet')
+    font = get_text_option(values, 'font', 'Arial')
+    theme = get_text_option(values, 'theme', 'modern')
+    export_format = 'word' if get_text_option(values, 'exportFormat', 'pdf') == 'word' else 'pdf'
+    answer_keys = is_checked(values, 'answerKeys')
+    
+    safe_title = title.replace(' ', '_').replace('/', '_').replace('\\', '_')
+    filename = f"{safe_title}.{EXPORT_EXTENSIONS[export_format]}"
+    
+    export_key = make_export_key(
+        booklet=True, font=font, theme=theme, format=export_format, answer_keys=answer_keys,
+        puzzles=[export['export_key'] for export in exports]
+    )
+    
+    return {
+        'entries': entries,
+        'exports': exports,
+        'font': font,
+        'theme': theme,
+        'export_format': export_format,
+        'answer_keys': answer_keys,
+        'filename': filename,
+        'export_key': export_key
+    }
+
+def get_booklet_render_pool():
+    """The render process pool shared by all booklet jobs (started on first use)."""
+    global booklet_render_pool
+    
+    with booklet_render_pool_lock:
+        if booklet_render_pool is None:
+            start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            booklet_render_pool = ProcessPoolExecutor(max_workers=BOOKLET_RENDER_PROCESSES,
+                                                      mp_context=multiprocessing.get_context(start_method))
+        return booklet_render_pool
+
+def run_puzzle_job(params, progress):
+    """Job handler: one puzzle, exactly as /generate renders it."""
+    export = read_export_request(params)
+    return render_export_request(export, progress), export['filename']
+
+def run_booklet_job(params, progress):
+    """Job handler: many puzzles in one PDF booklet or Word workbook."""
+    booklet = read_booklet_request(params)
+    exports = booklet['exports']
+    
+    def render_booklet():
+        puzzles = []
+        for index, export in enumerate(exports):
+            # Each puzzle gets an equal share of the generating stage
+            start = RENDER_PROGRESS_START * index / len(exports)
+            end = RENDER_PROGRESS_START * (index + 1) / len(exports)
+            label = f'Puzzle {index + 1} of {len(exports)}: '
+            record = get_export_puzzle(export, get_word_progress(progress, start, end, label))
+            puzzles.append({
+                'title': export['title'],
+                'subject': export['subject'],
+                'grid': record['grid'],
+                'words': record['words'],
+                'shape': record['shape'],
+                'placements': record['placements']
+            })
+        
+        pages_total = len(puzzles) * (2 if booklet['answer_keys'] else 1)
+        report_pages, report_bytes = get_render_progress(progress, RENDER_PROGRESS_START, 1.0, pages_total)
+        output = ProgressBuffer(report_bytes)
+        if booklet['export_format'] == 'word':
+            export_workbook_docx(puzzles, booklet['font'], output, booklet['theme'], booklet['answer_keys'],
+                                 progress=report_pages)
+        else:
+            export_booklet_pdf_parallel(puzzles, booklet['font'], output, booklet['theme'], booklet['answer_keys'],
+                                        progress=report_pages, executor=get_booklet_render_pool())
+        return output.getvalue()
+    
+    return get_or_render_export(booklet['export_key'], render_booklet), booklet['filename']
+
+register_job_handler('puzzle', run_puzzle_job)
+register_job_handler('booklet', run_booklet_job)
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """Queue an export job (form fields or JSON, with kind 'puzzle' or 'booklet')."""
+    try:
+        if request.is_json:
+            values = request.get_json(silent=True)
+            if not isinstance(values, dict):
+                return jsonify({'error': 'Expected a JSON object'}), 400
+        else:
+            values = request.form.to_dict()
+        kind = get_text_option(values, 'kind', 'puzzle')
+        params = dict(values)
+        
+        # Validate now (so bad input fails here, not in the worker) and fix the
+        # seeds, so a retried job renders the same document
+        if kind == 'puzzle':
+            export = read_export_request(values)
+            if not export['puzzle_words']:
+                return jsonify({'error': 'No words provided'}), 400
+            params['seed'] = export['seed']
+        elif kind == 'booklet':
+            booklet = read_booklet_request(values)
+            params['puzzles'] = [dict(entry, seed=export['seed'])
+                                 for entry, export in zip(booklet['entries'], booklet['exports'])]
+        else:
+            return jsonify({'error': f'Unknown job kind: {kind}'}), 400
+        
+        job_id = submit_job(kind, params)
+        status_url = url_for('job_status', job_id=job_id)
+        
+        response = jsonify({'success': True, 'id': job_id, 'status': 'queued', 'status_url': status_url})
+        response.status_code = 202
+        response.headers['Location'] = status_url
+        return response
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Status and progress of an export job, with the download URL once it is done."""
+    try:
+        job = get_job(job_id)
+        if job is None:
+            return jsonify({'error': 'Unknown job'}), 404
+        
+        # Jobs queued before a restart are picked up once anyone asks about them
+        start_job_workers()
+        
+        if job['status'] == 'done':
+            job['result_url'] = url_for('job_result', job_id=job_id)
+        return jsonify(job)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    Stream a job's progress as server-sent events: a 'progress' event (the
+    job status as JSON) whenever the stage or its counts change, then a
+    'done' or 'failed' event.
+    """
+    if get_job(job_id) is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    start_job_workers()
+    
+    def stream():
+        # Tell EventSource how long to wait before reconnecting
+        yield 'retry: 1000\n\n'
+        for job in watch_job(job_id, timeout=JOB_EVENTS_TIMEOUT):
+            if job is None:
+                yield ': keep-alive\n\n'
+                continue
+            
+            event = job['status'] if job['status'] in ('done', 'failed') else 'progress'
+            if event == 'done':
+                job['result_url'] = url_for('job_result', job_id=job_id)
+            yield f"event: {event}\ndata: {json.dumps(job, separators=(',', ':'))}\n\n"
+    
+    response = Response(stream_with_context(stream()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Don't let a proxy hold events back
+    return response
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    """Download a finished job's document."""
+    try:
+        result = get_job_result(job_id)
+        if result is None:
+            job = get_job(job_id)
+            if job is None:
+                return jsonify({'error': 'Unknown job'}), 404
+            return jsonify({'error': f"Job is {job['status']}", 'status': job['status']}), 409
+        
+        data, filename = result
+        return send_file(io.BytesIO(data), as_attachment=True, download_name=filename)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/save_drawing', methods=['POST'])
 def save_drawing():
     """Save a custom drawing as a shape mask."""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
+        strokes = data.get('strokes')
         canvas_data = data.get('canvas_data')
         shape_name = data.get('shape_name', 'custom_drawing')
         
-        if not canvas_data:
+        if not strokes and not canvas_data:
             return jsonify({'error': 'No canvas data provided'}), 400
         
-        # Process the canvas data into a shape mask
-        from utils.shape_masks import process_canvas_to_mask, add_custom_shape
-        mask = process_canvas_to_mask(canvas_data, 15)  # 15x15 grid
+        # Process the drawing into a shape mask
+        from utils.shape_masks import process_canvas_to_mask, process_strokes_to_mask, add_custom_shape, CUSTOM_SHAPE_RESOLUTION
+        if strokes:
+            # Compact stroke polylines, rasterized straight onto the grid
+            mask = process_strokes_to_mask(
+                strokes, CUSTOM_SHAPE_RESOLUTION,
+                canvas_width=data.get('canvas_width', 200),
+                canvas_height=data.get('canvas_height', 200)
+            )
+        else:
+            # Fallback: base64 PNG of the whole canvas
+            mask = process_canvas_to_mask(canvas_data, CUSTOM_SHAPE_RESOLUTION)
         
         # Store the custom shape mask
         add_custom_shape(shape_name, mask)
@@ -147,6 +675,8 @@ def save_drawing():
             'message': 'Drawing saved as custom shape!'
         })
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -163,9 +693,29 @@ def upload_shape():
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
         
-        # Process the uploaded image into a shape mask
-        from utils.shape_masks import process_uploaded_image_to_mask, add_custom_shape
-        mask = process_uploaded_image_to_mask(file, 15)  # 15x15 grid
+        # Read the upload (size-capped), then decode it in the upload worker pool
+        from utils.shape_masks import read_upload_bytes, process_uploaded_image_to_mask, add_custom_shape, CUSTOM_SHAPE_RESOLUTION
+        try:
+            image_data = read_upload_bytes(file.stream)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 413
+        
+        if not upload_slots.acquire(blocking=False):
+            response = jsonify({'error': 'Too many uploads are being processed, please try again shortly'})
+            response.status_code = 503
+            response.headers['Retry-After'] = '5'
+            return response
+        
+        # The slot is freed when decoding finishes, even if this request has given up on it
+        future = upload_executor.submit(process_uploaded_image_to_mask, image_data, CUSTOM_SHAPE_RESOLUTION)
+        future.add_done_callback(lambda _: upload_slots.release())
+        try:
+            mask = future.result(timeout=UPLOAD_TIMEOUT)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 413
+        except FutureTimeoutError:
+            future.cancel()
+            return jsonify({'error': f'The image took longer than {UPLOAD_TIMEOUT} seconds to process'}), 503
         
         # Store the custom shape mask
         add_custom_shape(shape_name, mask)
@@ -176,6 +726,8 @@ def upload_shape():
             'message': 'Image uploaded and processed as custom shape!'
         })
         
+    except RequestEntityTooLarge:
+        return jsonify({'error': 'Upload is too large'}), 413
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -192,6 +744,19 @@ def get_custom_shapes():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/catalogue_shapes', methods=['GET'])
+def get_catalogue_shapes():
+    """Get list of shapes loaded from the shapes/ catalogue directory."""
+    try:
+        from utils.shape_catalogue import list_catalogue_shapes
+        shapes = list_catalogue_shapes()
+        return jsonify({
+            'success': True,
+            'shapes': shapes
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/delete_custom_shape', methods=['POST'])
 def delete_custom_shape():
     """Delete a specific custom shape."""
@@ -236,5 +801,6 @@ def clear_all_custom_shapes():
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
+        start_job_workers()
         port = int(os.environ.get('PORT', 5000))
         app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
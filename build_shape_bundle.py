@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+"""
+Build script for the precompiled shape library.
+Serializes every built-in shape mask into utils/shape_bundle.npz.
+"""
+
+from utils.shape_bundle import build_shape_bundle, BUNDLE_PATH, BUNDLE_SIZES
+
+if __name__ == "__main__":
+    print("🔨 Building precompiled shape bundle...")
+    count = build_shape_bundle()
+    sizes = ', '.join(str(size) for size in BUNDLE_SIZES)
+    print(f"✅ Wrote {count} masks (sizes {sizes}) to {BUNDLE_PATH}")
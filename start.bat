@@ -26,6 +26,9 @@ if errorlevel 1 (
     exit /b 1
 )
 
+echo Building precompiled shape bundle...
+python build_shape_bundle.py
+
 echo.
 echo Starting Flask application...
 echo Open your browser to: http://127.0.0.1:5000
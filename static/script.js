@@ -2,7 +2,9 @@
 let words = [];
 let currentShape = 'square';
 let isDrawing = false;
-let drawingData = [];
+let drawingData = [];  // Stroke polylines: [{width, points: [x0, y0, x1, y1, ...]}]
+let previewPuzzle = null;  // {token, seed} of the last preview, so downloads match it
+const exportDownloadUrls = new Map();  // Generate form fields -> /exports/... URL of that document
 
 // DOM elements
 const wordList = document.getElementById('wordList');
@@ -162,7 +164,8 @@ function setupDrawingCanvas() {
     drawCanvas.addEventListener('touchmove', handleTouch);
     drawCanvas.addEventListener('touchend', stopDrawing);
     
-    // Load custom shapes on initialization
+    // Load catalogue and custom shapes on initialization
+    loadCatalogueShapes();
     updateShapeSelector();
 }
 
@@ -183,6 +186,9 @@ function startDrawing(e) {
     
     ctx.beginPath();
     ctx.moveTo(x, y);
+    
+    // Record the stroke so it can be sent as compact polylines
+    drawingData.push({ width: ctx.lineWidth, points: [Math.round(x), Math.round(y)] });
 }
 
 function draw(e) {
@@ -194,6 +200,8 @@ function draw(e) {
     
     ctx.lineTo(x, y);
     ctx.stroke();
+    
+    drawingData[drawingData.length - 1].points.push(Math.round(x), Math.round(y));
 }
 
 function stopDrawing() {
@@ -219,6 +227,7 @@ function clearCanvas() {
     // Fill with white background
     ctx.fillStyle = '#ffffff';
     ctx.fillRect(0, 0, drawCanvas.width, drawCanvas.height);
+    drawingData = [];
 }
 
 async function saveDrawing() {
@@ -229,7 +238,7 @@ async function saveDrawing() {
     blankCanvas.height = drawCanvas.height;
     const blankData = blankCanvas.toDataURL();
     
-    if (imageData === blankData) {
+    if (drawingData.length === 0 && imageData === blankData) {
         showToast('Please draw something first!', 'warning');
         return;
     }
@@ -246,16 +255,22 @@ async function saveDrawing() {
         saveDrawingBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Saving...';
         saveDrawingBtn.disabled = true;
         
-        // Send drawing to server
+        // Send drawing to server as stroke polylines (PNG only if no strokes were recorded)
+        const payload = { shape_name: shapeName.trim() };
+        if (drawingData.length > 0) {
+            payload.strokes = drawingData;
+            payload.canvas_width = drawCanvas.width;
+            payload.canvas_height = drawCanvas.height;
+        } else {
+            payload.canvas_data = imageData;
+        }
+        
         const response = await fetch('/save_drawing', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({
-                canvas_data: imageData,
-                shape_name: shapeName.trim()
-            })
+            body: JSON.stringify(payload)
         });
         
         const data = await response.json();
@@ -442,6 +457,30 @@ function updateWordCount() {
     wordCount.textContent = `${count} word${count !== 1 ? 's' : ''}`;
 }
 
+async function loadCatalogueShapes() {
+    try {
+        const response = await fetch('/catalogue_shapes');
+        const data = await response.json();
+        
+        if (data.success && data.shapes.length > 0) {
+            // Add catalogue shapes (loaded from shape files on the server)
+            const catalogueGroup = document.createElement('optgroup');
+            catalogueGroup.label = 'More Shapes';
+            
+            data.shapes.forEach(shapeName => {
+                const option = document.createElement('option');
+                option.value = shapeName;
+                option.textContent = shapeName.replace(/[_-]/g, ' ').replace(/\b\w/g, c => c.toUpperCase());
+                catalogueGroup.appendChild(option);
+            });
+            
+            shapeSelect.appendChild(catalogueGroup);
+        }
+    } catch (error) {
+        console.error('Error loading catalogue shapes:', error);
+    }
+}
+
 async function updateShapeSelector() {
     try {
         const response = await fetch('/custom_shapes');
@@ -729,6 +768,7 @@ async function generatePreview() {
         formData.append('allowVertical', document.getElementById('allowVertical').checked ? 'on' : 'off');
         formData.append('allowHorizontal', document.getElementById('allowHorizontal').checked ? 'on' : 'off');
         formData.append('allowDiagonal', document.getElementById('allowDiagonal').checked ? 'on' : 'off');
+        formData.append('compact', 'on');  // Packed letters + mask runs instead of a nested grid
         
         // Send preview request
         const response = await fetch('/preview', {
@@ -739,13 +779,19 @@ async function generatePreview() {
         const data = await response.json();
         
         if (data.success) {
-            displayPuzzlePreview(data.grid, data.words);
+            previewPuzzle = {token: data.token, seed: data.seed};
+            if (data.compact) {
+                displayCompactPuzzlePreview(data);
+            } else {
+                displayPuzzlePreview(data.grid, data.words);
+            }
             displayWordsToFind(data.words);
         } else {
             throw new Error(data.error || 'Failed to generate preview');
         }
         
     } catch (error) {
+        previewPuzzle = null;
         console.error('Preview error:', error);
         puzzlePreview.innerHTML = `
             <div class="preview-placeholder">
@@ -775,6 +821,29 @@ function displayPuzzlePreview(grid, placedWords) {
     puzzlePreview.innerHTML = html;
 }
 
+// Render a compact /preview response without rebuilding the grid first:
+// data.letters holds the filled cells row by row and data.mask the run
+// lengths of filled / empty cells, starting with a (possibly empty) filled run
+function displayCompactPuzzlePreview(data) {
+    const rows = [];
+    let cells = [];
+    let letterIndex = 0;
+    let filled = true;
+    
+    for (const run of data.mask) {
+        for (let k = 0; k < run; k++) {
+            cells.push(filled ? `<td>${data.letters[letterIndex++]}</td>` : '<td></td>');
+            if (cells.length === data.cols) {
+                rows.push(`<tr>${cells.join('')}</tr>`);
+                cells = [];
+            }
+        }
+        filled = !filled;
+    }
+    
+    puzzlePreview.innerHTML = `<table class="puzzle-grid">${rows.join('')}</table>`;
+}
+
 function displayWordsToFind(placedWords) {
     if (placedWords.length === 0) {
         wordsToFind.innerHTML = '<p class="empty-message">No words could be placed</p>';
@@ -809,12 +878,37 @@ async function generatePuzzle() {
         formData.append('allowVertical', document.getElementById('allowVertical').checked ? 'on' : 'off');
         formData.append('allowHorizontal', document.getElementById('allowHorizontal').checked ? 'on' : 'off');
         formData.append('allowDiagonal', document.getElementById('allowDiagonal').checked ? 'on' : 'off');
+        formData.append('answerKey', document.getElementById('answerKey').checked ? 'on' : 'off');
+        
+        // Download the previewed grid (the seed rebuilds it if the token has expired)
+        if (previewPuzzle) {
+            formData.append('puzzleToken', previewPuzzle.token);
+            formData.append('seed', previewPuzzle.seed);
+        }
+        
+        // Repeat downloads of a previewed puzzle GET the cached document (the
+        // browser revalidates it by ETag); unseeded requests get a new puzzle each time
+        const requestKey = previewPuzzle ? new URLSearchParams(formData).toString() : null;
+        let response = null;
+        if (requestKey && exportDownloadUrls.has(requestKey)) {
+            response = await fetch(exportDownloadUrls.get(requestKey));
+            if (!response.ok) {
+                exportDownloadUrls.delete(requestKey);
+                response = null;
+            }
+        }
         
         // Send generation request
-        const response = await fetch('/generate', {
-            method: 'POST',
-            body: formData
-        });
+        if (!response) {
+            response = await fetch('/generate', {
+                method: 'POST',
+                body: formData
+            });
+            const downloadUrl = response.headers.get('Content-Location');
+            if (requestKey && response.ok && downloadUrl) {
+                exportDownloadUrls.set(requestKey, downloadUrl);
+            }
+        }
         
         if (response.ok) {
             // Download the file
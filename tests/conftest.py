@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# Import the app and utils package from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the export job queue out of the repository (read when utils.job_queue is imported)
+os.environ.setdefault('JOB_DB_PATH', os.path.join(tempfile.mkdtemp(prefix='wordsearch-tests-'), 'jobs.sqlite3'))
@@ -0,0 +1,101 @@
+import io
+import math
+
+import pytest
+from docx import Document
+from pypdf import PdfReader
+
+from utils.layout import get_answer_key_title
+from utils.pdf_exporter import PuzzleGridFlowable, export_to_pdf, get_theme_colors
+from utils.puzzle_generator import generate_puzzle, get_placement_cells
+from utils.word_exporter import ANSWER_HIGHLIGHT_COLOR, export_to_word
+
+WORDS = ['ELEPHANT', 'GIRAFFE', 'ZEBRA', 'LION', 'TIGER']
+
+class RecordingCanvas:
+    """Stands in for a ReportLab canvas, recording every drawing call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args))
+
+def make_puzzle(shape):
+    grid, placed_words, placements = generate_puzzle(WORDS, shape, return_placements=True, seed=11)
+    return grid, placed_words, placements
+
+@pytest.mark.parametrize('shape', ['square', 'heart', 'star'])
+def test_placements_spell_their_words(shape):
+    grid, placed_words, placements = make_puzzle(shape)
+    assert sorted(placement['word'] for placement in placements) == sorted(placed_words)
+    for placement in placements:
+        assert ''.join(grid[i][j] for i, j in get_placement_cells(placement)) == placement['word']
+
+def test_answer_key_title():
+    assert get_answer_key_title('Zoo') == 'Zoo - Answer Key'
+    assert get_answer_key_title('') == 'Answer Key'
+
+def test_pdf_capsule_per_placement():
+    grid, _, placements = make_puzzle('square')
+    flowable = PuzzleGridFlowable(grid, 20, 'Helvetica', 14, get_theme_colors('modern'), placements)
+    flowable.canv = RecordingCanvas()
+    flowable.draw_highlights([j * 20 for j in range(len(grid[0]) + 1)],
+                             [flowable.height - i * 20 for i in range(len(grid) + 1)])
+
+    capsules = [args for name, args in flowable.canv.calls if name == 'roundRect']
+    rotations = [args[0] for name, args in flowable.canv.calls if name == 'rotate']
+    assert len(capsules) == len(placements)
+
+    # Each capsule spans its word and is turned to the word's direction
+    for (x, y, width, height, radius), rotation, placement in zip(capsules, rotations, placements):
+        length = (len(placement['word']) - 1) * math.hypot(placement['dr'], placement['dc']) * 20
+        assert width == pytest.approx(length + height)
+        assert rotation == pytest.approx(math.degrees(math.atan2(-placement['dr'], placement['dc'])))
+
+def test_pdf_answer_key_page():
+    grid, placed_words, placements = make_puzzle('heart')
+    output = io.BytesIO()
+    export_to_pdf('Zoo', '', grid, placed_words, 'Arial', output, shape='heart', placements=placements,
+                  answer_key=True)
+    reader = PdfReader(io.BytesIO(output.getvalue()))
+    assert len(reader.pages) == 2
+    assert 'Zoo - Answer Key' in reader.pages[1].extract_text()
+
+    # No placements, no solution page
+    output = io.BytesIO()
+    export_to_pdf('Zoo', '', grid, placed_words, 'Arial', output, shape='heart', answer_key=True)
+    assert len(PdfReader(io.BytesIO(output.getvalue())).pages) == 1
+
+def shaded_cells(table):
+    cells = set()
+    for i, row in enumerate(table.rows):
+        for j, cell in enumerate(row.cells):
+            if f'w:fill="{ANSWER_HIGHLIGHT_COLOR}"' in cell._tc.xml:
+                cells.add((i, j))
+    return cells
+
+def puzzle_tables(doc):
+    # The grid is the innermost table whose rows match the puzzle
+    tables = list(doc.tables)
+    while tables:
+        table = tables.pop()
+        yield table
+        for row in table.rows:
+            for cell in row.cells:
+                tables.extend(cell.tables)
+
+@pytest.mark.parametrize('shape', ['square', 'heart'])
+def test_word_answer_key_shades_placed_cells(shape):
+    grid, placed_words, placements = make_puzzle(shape)
+    output = io.BytesIO()
+    export_to_word('Zoo', '', grid, placed_words, 'Arial', output, shape=shape, placements=placements,
+                   answer_key=True)
+    doc = Document(io.BytesIO(output.getvalue()))
+
+    grids = [table for table in puzzle_tables(doc) if len(table.rows) == len(grid)
+             and len(table.columns) == len(grid[0])]
+    assert len(grids) == 2
+    expected = {cell for placement in placements for cell in get_placement_cells(placement)}
+    assert sorted(len(shaded_cells(table)) for table in grids) == [0, len(expected)]
+    assert expected in [shaded_cells(table) for table in grids]
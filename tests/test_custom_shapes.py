@@ -0,0 +1,194 @@
+import io
+import threading
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+import app as app_module
+from app import app
+from utils import shape_masks
+from utils.shape_masks import (
+    MAX_CANVAS_SIZE, MAX_DRAWING_POINTS, MAX_DRAWING_STROKES, MAX_UPLOAD_BYTES, process_strokes_to_mask,
+    read_drawing_strokes, read_upload_bytes, open_upload_image, custom_shapes, delete_custom_shape,
+    CUSTOM_SHAPE_RESOLUTION, add_custom_shape, get_custom_shape, get_custom_shape_digest, get_shape_mask,
+    downsample_mask,
+)
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+def square_outline(left, top, right, bottom, width=4):
+    return {'width': width, 'points': [left, top, right, top, right, bottom, left, bottom, left, top]}
+
+def test_closed_outline_is_filled():
+    mask = process_strokes_to_mask([square_outline(50, 50, 150, 150)], size=20)
+    assert mask[10][10]          # inside
+    assert mask[5][5]            # on the outline
+    assert not mask[1][1]        # outside
+    assert not mask[18][10]
+
+def test_points_off_the_canvas_are_clamped():
+    inside = process_strokes_to_mask([square_outline(0, 0, 200, 200)], size=10)
+    outside = process_strokes_to_mask([square_outline(-5000, -5000, 1e9, 1e9)], size=10)
+    assert outside == inside
+
+@pytest.mark.parametrize('strokes, width, height', [
+    ([{'points': [0, 0, 10, 10]}] * (MAX_DRAWING_STROKES + 1), 200, 200),
+    ([{'points': [1, 1] * (MAX_DRAWING_POINTS + 1)}], 200, 200),
+    ([{'points': [0, 0, float('nan'), 10]}], 200, 200),
+    ([{'points': [0, 0, 10, 10], 'width': float('inf')}], 200, 200),
+    ([{'points': [0, 0, 10, 10], 'width': 0}], 200, 200),
+    ([{'points': ['a', 'b']}], 200, 200),
+    ([{'points': [0, 0, 10]}], 200, 200),
+    (['0,0,10,10'], 200, 200),
+    ({'points': [0, 0]}, 200, 200),
+    ([], 0, 200),
+    ([], 200, MAX_CANVAS_SIZE + 1),
+    ([], 'wide', 200),
+    ([], None, 200),
+])
+def test_invalid_strokes_are_rejected(strokes, width, height):
+    with pytest.raises(ValueError):
+        read_drawing_strokes(strokes, width, height)
+
+def test_save_drawing(client):
+    try:
+        response = client.post('/save_drawing', json={
+            'strokes': [square_outline(20, 20, 180, 180)], 'canvas_width': 200, 'canvas_height': 200,
+            'shape_name': 'test_drawing'
+        })
+        assert response.status_code == 200
+        assert custom_shapes['test_drawing']['mask'].any()
+    finally:
+        delete_custom_shape('test_drawing')
+
+@pytest.mark.parametrize('body', [
+    {'strokes': [{'points': [0, 0, 10, 10]}] * (MAX_DRAWING_STROKES + 1), 'shape_name': 'test_drawing'},
+    {'strokes': [square_outline(20, 20, 180, 180)], 'canvas_width': -1, 'shape_name': 'test_drawing'},
+    {'strokes': 'M 0 0 L 10 10', 'shape_name': 'test_drawing'},
+    [{'points': [0, 0, 10, 10]}],
+])
+def test_save_drawing_rejects_bad_strokes(client, body):
+    response = client.post('/save_drawing', json=body)
+    assert response.status_code == 400
+    assert 'test_drawing' not in custom_shapes
+
+def make_png(width, height):
+    # A dark ring on white, so the upload has an outline to fill
+    image = Image.new('L', (width, height), 255)
+    ImageDraw.Draw(image).ellipse((width // 8, height // 8, width * 7 // 8, height * 7 // 8), outline=0,
+                                  width=max(1, width // 20))
+    output = io.BytesIO()
+    image.save(output, 'PNG')
+    return output.getvalue()
+
+def upload(client, data, name='test_upload'):
+    return client.post('/upload_shape', data={'shape_file': (io.BytesIO(data), 'shape.png'), 'shape_name': name},
+                       content_type='multipart/form-data')
+
+def test_upload_shape(client):
+    try:
+        response = upload(client, make_png(400, 300))
+        assert response.status_code == 200
+        mask = custom_shapes['test_upload']['mask']
+        assert mask[mask.shape[0] // 2, mask.shape[1] // 2]
+        assert not mask[0, 0]
+    finally:
+        delete_custom_shape('test_upload')
+
+def test_read_upload_bytes_limit():
+    assert read_upload_bytes(io.BytesIO(b'x' * 10), max_bytes=10) == b'x' * 10
+    with pytest.raises(ValueError):
+        read_upload_bytes(io.BytesIO(b'x' * 11), max_bytes=10)
+
+def test_upload_over_byte_limit(client):
+    response = upload(client, b'\0' * (MAX_UPLOAD_BYTES + 1))
+    assert response.status_code == 413
+    assert 'test_upload' not in custom_shapes
+
+def test_upload_over_pixel_limit(client, monkeypatch):
+    monkeypatch.setattr(shape_masks, 'MAX_UPLOAD_PIXELS', 100 * 100)
+    with pytest.raises(ValueError):
+        open_upload_image(make_png(101, 100))
+
+    response = upload(client, make_png(200, 200))
+    assert response.status_code == 413
+    assert 'pixels' in response.get_json()['error']
+    assert 'test_upload' not in custom_shapes
+
+def test_pillow_pixel_limit_is_left_alone():
+    # The upload limit is checked locally; Pillow's process-wide limit keeps its default
+    assert Image.MAX_IMAGE_PIXELS == int(1024 * 1024 * 1024 // 4 // 3)
+
+def test_upload_turned_away_when_slots_are_full(client):
+    taken = 0
+    while app_module.upload_slots.acquire(blocking=False):
+        taken += 1
+    try:
+        response = upload(client, make_png(100, 100))
+        assert response.status_code == 503
+        assert response.headers['Retry-After']
+    finally:
+        for _ in range(taken):
+            app_module.upload_slots.release()
+
+def test_slow_upload_times_out(client, monkeypatch):
+    release = threading.Event()
+
+    def slow_process(image_data, size):
+        release.wait(5)
+        return [[True] * size for _ in range(size)]
+
+    monkeypatch.setattr(shape_masks, 'process_uploaded_image_to_mask', slow_process)
+    monkeypatch.setattr(app_module, 'UPLOAD_TIMEOUT', 0.05)
+    try:
+        response = upload(client, make_png(100, 100))
+        assert response.status_code == 503
+        assert 'test_upload' not in custom_shapes
+    finally:
+        release.set()
+
+@pytest.fixture
+def half_shape():
+    # Full-resolution mask with its left half usable
+    mask = np.zeros((CUSTOM_SHAPE_RESOLUTION, CUSTOM_SHAPE_RESOLUTION), dtype=bool)
+    mask[:, :CUSTOM_SHAPE_RESOLUTION // 2] = True
+    add_custom_shape('test_pyramid', mask)
+    yield mask
+    delete_custom_shape('test_pyramid')
+
+def test_custom_shape_keeps_full_resolution(half_shape):
+    assert get_custom_shape('test_pyramid') == half_shape.tolist()
+    assert get_custom_shape('test_pyramid', CUSTOM_SHAPE_RESOLUTION) == half_shape.tolist()
+
+def test_pyramid_levels_are_derived_once(half_shape):
+    mask = get_custom_shape('test_pyramid', 15)
+    assert len(mask) == 15
+    assert all(row[:7] == [True] * 7 and row[8:] == [False] * 7 for row in mask)
+    assert set(custom_shapes['test_pyramid']['pyramid']) == {15}
+
+    # Later requests are served from the cached level, as copies
+    mask[0][0] = False
+    assert get_custom_shape('test_pyramid', 15)[0][0]
+    assert set(custom_shapes['test_pyramid']['pyramid']) == {15}
+
+def test_downsample_uses_area_coverage():
+    mask = np.zeros((4, 4), dtype=bool)
+    mask[:2, :2] = True
+    mask[2, 2] = True
+    assert downsample_mask(mask, 2) == [[True, False], [False, False]]
+
+def test_larger_sizes_are_upsampled(half_shape):
+    assert len(get_custom_shape('test_pyramid', CUSTOM_SHAPE_RESOLUTION + 10)) == CUSTOM_SHAPE_RESOLUTION + 10
+
+def test_redraw_replaces_pyramid_and_digest(half_shape):
+    get_custom_shape('test_pyramid', 15)
+    digest = get_custom_shape_digest('test_pyramid')
+
+    add_custom_shape('test_pyramid', ~half_shape)
+    assert get_custom_shape_digest('test_pyramid') != digest
+    assert custom_shapes['test_pyramid']['pyramid'] == {}
+    assert not get_custom_shape('test_pyramid', 15)[0][0]
+    assert get_shape_mask('test_pyramid', 15) == get_custom_shape('test_pyramid', 15)
@@ -0,0 +1,161 @@
+import threading
+import time
+from collections import OrderedDict
+
+import pytest
+
+import app as app_module
+import utils.export_cache as export_cache
+from app import app, get_grid_inputs
+from utils.export_cache import get_cached_export, get_export_cache_stats, get_shared_seed, make_export_key, store_export
+from utils.shape_bundle import get_shape_bundle_digest
+from utils.shape_catalogue import discover_catalogue_shapes
+from utils.shape_masks import BUILTIN_SHAPES, get_shape_digest
+
+KITE = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100"><path d="{}"/></svg>'
+
+@pytest.fixture
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(export_cache, '_memory_cache', OrderedDict())
+    monkeypatch.setattr(export_cache, '_memory_bytes', 0)
+    monkeypatch.setattr(export_cache, '_cache_stats', dict.fromkeys(export_cache._cache_stats, 0))
+    monkeypatch.setattr(export_cache, 'EXPORT_CACHE_DIR', None)
+    monkeypatch.setattr(export_cache, '_shared_seeds', OrderedDict())
+
+@pytest.fixture
+def client(empty_cache):
+    return app.test_client()
+
+@pytest.fixture
+def restore_catalogue():
+    yield
+    discover_catalogue_shapes(reserved_names=BUILTIN_SHAPES)
+
+def generate(client, **fields):
+    form = {'title': 'Cached', 'words': 'CAT\nDOG\nBIRD', 'shape': 'square', 'allowHorizontal': 'on', 'seed': '7'}
+    form.update(fields)
+    return client.post('/generate', data=form)
+
+def test_least_recently_used_entry_is_evicted(empty_cache, monkeypatch):
+    monkeypatch.setattr(export_cache, 'EXPORT_CACHE_MAX_BYTES', 30)
+    store_export('a', b'a' * 10)
+    store_export('b', b'b' * 10)
+    get_cached_export('a')
+    store_export('c', b'c' * 10)
+    store_export('d', b'd' * 10)
+
+    assert get_cached_export('b') is None
+    assert get_cached_export('a') == b'a' * 10
+    stats = get_export_cache_stats()
+    assert stats['evictions'] == 1 and stats['entries'] == 3 and stats['bytes'] == 30
+
+def test_oversized_documents_are_not_cached(empty_cache, monkeypatch):
+    monkeypatch.setattr(export_cache, 'EXPORT_CACHE_MAX_ENTRY_BYTES', 5)
+    assert not store_export('big', b'x' * 6)
+    assert get_cached_export('big') is None
+
+def test_disk_tier_survives_memory_loss(empty_cache, monkeypatch, tmp_path):
+    monkeypatch.setattr(export_cache, 'EXPORT_CACHE_DIR', str(tmp_path))
+    store_export('doc', b'document')
+    export_cache._memory_cache.clear()
+
+    assert get_cached_export('doc') == b'document'
+    assert get_export_cache_stats()['disk_hits'] == 1
+
+def test_key_follows_inputs():
+    key = make_export_key(words=['CAT'], seed=1)
+    assert make_export_key(seed=1, words=['CAT']) == key
+    assert make_export_key(words=['CAT'], seed=2) != key
+
+def test_catalogue_edit_changes_key(tmp_path, restore_catalogue):
+    shape_file = tmp_path / 'kite.svg'
+    shape_file.write_text(KITE.format('M50 0 L100 100 L0 100 Z'))
+    discover_catalogue_shapes(str(tmp_path), reserved_names=BUILTIN_SHAPES)
+    before = make_export_key(**get_grid_inputs(['CAT'], 'kite', True, True, False))
+
+    shape_file.write_text(KITE.format('M50 0 L100 60 L0 60 Z'))
+    discover_catalogue_shapes(str(tmp_path), reserved_names=BUILTIN_SHAPES)
+    after = make_export_key(**get_grid_inputs(['CAT'], 'kite', True, True, False))
+
+    assert before != after
+
+def test_builtin_shapes_keyed_by_bundle():
+    assert get_shape_digest('heart') == get_shape_bundle_digest()
+    assert get_shape_digest('no_such_shape') is None
+
+def test_download_url_serves_cached_document(client):
+    response = generate(client)
+    assert response.status_code == 200
+    url = response.headers['Content-Location']
+    assert url.endswith('/Cached.pdf')
+
+    download = client.get(url)
+    assert download.status_code == 200
+    assert download.data == response.data
+    assert 'immutable' in download.headers['Cache-Control']
+
+    etag, weak = download.get_etag()
+    assert not weak
+    revalidated = client.get(url, headers={'If-None-Match': f'"{etag}"'})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+
+def test_download_url_after_eviction(client):
+    url = generate(client).headers['Content-Location']
+    export_cache._memory_cache.clear()
+    assert client.get(url).status_code == 404
+    assert client.get('/exports/not-a-key/Cached.pdf').status_code == 404
+
+def test_unseeded_requests_share_a_seed_briefly(empty_cache):
+    inputs = {'words': ['CAT'], 'format': 'pdf'}
+    assert get_shared_seed(inputs, 1) == 1
+    assert get_shared_seed(dict(inputs), 2) == 1
+    assert get_shared_seed(dict(inputs, format='word'), 3) == 3
+
+def test_shared_seed_window_ends(empty_cache, monkeypatch):
+    monkeypatch.setattr(export_cache, 'SHARED_SEED_WINDOW', -1)
+    assert get_shared_seed({'words': ['DOG']}, 4) == 4
+    assert get_shared_seed({'words': ['DOG']}, 5) == 5
+
+@pytest.fixture
+def slow_renders(monkeypatch):
+    """Count renders, each slow enough for concurrent requests to overlap."""
+    renders = []
+    export_puzzle = app_module.export_puzzle
+
+    def slow_export_puzzle(*args, **kwargs):
+        renders.append(1)
+        time.sleep(0.3)
+        export_puzzle(*args, **kwargs)
+
+    monkeypatch.setattr(app_module, 'export_puzzle', slow_export_puzzle)
+    return renders
+
+def generate_concurrently(fields_list):
+    responses = [None] * len(fields_list)
+    start = threading.Barrier(len(fields_list))
+
+    def request(index):
+        client = app.test_client()
+        start.wait()
+        responses[index] = generate(client, **fields_list[index])
+
+    threads = [threading.Thread(target=request, args=(index,)) for index in range(len(fields_list))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return responses
+
+def test_identical_unseeded_requests_render_once(client, slow_renders):
+    first, second = generate_concurrently([{'seed': ''}, {'seed': ''}])
+    assert first.status_code == second.status_code == 200
+    assert len(slow_renders) == 1
+    assert first.headers['X-Puzzle-Seed'] == second.headers['X-Puzzle-Seed']
+    assert first.data == second.data
+    assert get_export_cache_stats()['coalesced'] == 1
+
+def test_different_seeds_render_separately(client, slow_renders):
+    first, second = generate_concurrently([{'seed': '1'}, {'seed': '2'}])
+    assert first.status_code == second.status_code == 200
+    assert len(slow_renders) == 2
@@ -0,0 +1,55 @@
+import os
+import shutil
+
+import pytest
+import reportlab
+from reportlab.pdfbase import pdfmetrics
+
+import utils.font_registry as font_registry
+from utils.font_registry import discover_fonts, get_font_file, get_pdf_bold_font, get_pdf_font, registered_families
+
+REPORTLAB_FONTS = os.path.join(os.path.dirname(reportlab.__file__), 'fonts')
+FAMILY = 'Bitstream Vera Sans'
+
+@pytest.fixture
+def vera_fonts(tmp_path):
+    for filename in ('Vera.ttf', 'VeraBd.ttf', 'VeraIt.ttf', 'VeraBI.ttf'):
+        shutil.copy(os.path.join(REPORTLAB_FONTS, filename), tmp_path)
+    (tmp_path / 'notes.txt').write_text('not a font')
+    yield tmp_path
+    registered_families.pop(FAMILY, None)
+    font_registry.registered_font_files.pop(FAMILY, None)
+
+def test_faces_grouped_by_family(vera_fonts):
+    assert discover_fonts(str(vera_fonts)) >= 1
+    assert registered_families[FAMILY] == {
+        'normal': FAMILY, 'bold': f'{FAMILY}-Bold', 'italic': f'{FAMILY}-Italic', 'boldItalic': f'{FAMILY}-BoldItalic'
+    }
+    assert pdfmetrics.getFont(f'{FAMILY}-Bold').face.filename.endswith('VeraBd.ttf')
+
+    assert get_pdf_font(FAMILY) == FAMILY
+    assert get_pdf_bold_font(FAMILY) == f'{FAMILY}-Bold'
+    assert get_font_file(FAMILY, bold=True).endswith('VeraBd.ttf')
+
+def test_each_file_parsed_once(vera_fonts, monkeypatch):
+    parsed = []
+
+    class CountingTTFont(font_registry.TTFont):
+        def __init__(self, name, filename, *args, **kwargs):
+            parsed.append(os.path.basename(filename))
+            super().__init__(name, filename, *args, **kwargs)
+
+    monkeypatch.setattr(font_registry, 'TTFont', CountingTTFont)
+    discover_fonts(str(vera_fonts))
+    assert sorted(parsed) == ['Vera.ttf', 'VeraBI.ttf', 'VeraBd.ttf', 'VeraIt.ttf']
+
+def test_family_without_regular_face_skipped(tmp_path):
+    shutil.copy(os.path.join(REPORTLAB_FONTS, 'VeraBd.ttf'), tmp_path)
+    discover_fonts(str(tmp_path))
+    assert FAMILY not in registered_families
+
+def test_fallbacks_without_bundled_fonts():
+    assert get_pdf_font('Times New Roman') == 'Times-Roman'
+    assert get_pdf_bold_font('Times-Roman') == 'Times-Bold'
+    assert get_pdf_font('Unknown Font') == 'Helvetica'
+    assert get_font_file('Unknown Font') is None
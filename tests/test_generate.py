@@ -0,0 +1,53 @@
+import io
+import os
+import zipfile
+
+import pytest
+from pypdf import PdfReader
+
+from app import app
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+def generate(client, **fields):
+    form = {'title': 'Class Set', 'words': 'CAT\nDOG\nBIRD', 'shape': 'square', 'allowHorizontal': 'on',
+            'allowVertical': 'on', 'seed': '12'}
+    form.update(fields)
+    return client.post('/generate', data=form)
+
+def document_xml(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as package:
+        return package.read('word/document.xml').decode('utf-8')
+
+def listing(directory):
+    return sorted(os.listdir(directory)) if os.path.isdir(directory) else None
+
+def test_generate_streams_from_memory(client):
+    uploads = os.path.join(PROJECT_DIR, 'uploads')
+    before = listing(uploads)
+
+    pdf = generate(client, exportFormat='pdf', words='ONE\nTWO')
+    word = generate(client, exportFormat='word', words='ONE\nTWO')
+    assert pdf.status_code == word.status_code == 200
+    assert listing(uploads) == before
+
+    assert len(PdfReader(io.BytesIO(pdf.data)).pages) == 1
+    assert zipfile.is_zipfile(io.BytesIO(word.data))
+    assert 'filename=Class_Set.pdf' in pdf.headers['Content-Disposition']
+    assert 'filename=Class_Set.docx' in word.headers['Content-Disposition']
+
+def test_same_title_different_puzzles(client):
+    # Documents no longer share a file named after the title
+    first = generate(client, exportFormat='word', words='APPLE\nPEAR')
+    second = generate(client, exportFormat='word', words='MANGO\nLIME')
+    first_text = document_xml(first.data)
+    second_text = document_xml(second.data)
+    assert 'APPLE' in first_text and 'MANGO' not in first_text
+    assert 'MANGO' in second_text and 'APPLE' not in second_text
+
+def test_generate_without_words(client):
+    assert generate(client, words='  \n ').status_code == 400
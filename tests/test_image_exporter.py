@@ -0,0 +1,105 @@
+import io
+import xml.etree.ElementTree as ET
+
+import pytest
+from PIL import Image
+
+from utils.image_exporter import (
+    export_to_png, export_to_svg, get_glyph_atlas, get_highlight_cells, get_image_layout, get_image_theme_colors,
+    trim_empty_rows,
+)
+from utils.puzzle_generator import generate_puzzle
+from utils.word_exporter import ANSWER_HIGHLIGHT_COLOR
+
+SVG = '{http://www.w3.org/2000/svg}'
+WORDS = ['CAT', 'DOG', 'BIRD', 'HORSE', 'MOUSE']
+
+def make_puzzle(shape='square', seed=3):
+    grid, placed_words, placements = generate_puzzle(WORDS, shape, return_placements=True, seed=seed)
+    return {'grid': grid, 'words': placed_words, 'placements': placements, 'shape': shape}
+
+def render(exporter, puzzle, theme='modern', **options):
+    output = io.BytesIO()
+    exporter('Title', 'Subject', puzzle['grid'], puzzle['words'], 'Arial', output, theme, puzzle['shape'],
+             placements=puzzle['placements'], **options)
+    return output.getvalue()
+
+def svg_root(puzzle, **options):
+    return ET.fromstring(render(export_to_svg, puzzle, **options))
+
+def png_image(puzzle, **options):
+    return Image.open(io.BytesIO(render(export_to_png, puzzle, **options))).convert('RGB')
+
+def hex_rgb(color):
+    return tuple(int(color[index:index + 2], 16) for index in (0, 2, 4))
+
+def test_theme_palette_matches_pdf():
+    assert get_image_theme_colors('modern')['background'] == 'ffffff'
+    assert get_image_theme_colors('cozy')['background'] == 'f5f5dc'
+    assert get_image_theme_colors('unknown') == get_image_theme_colors('modern')
+
+@pytest.mark.parametrize('first, second', [('modern', 'cozy'), ('cozy', 'playful')])
+def test_themes_give_different_fills(first, second):
+    puzzle = make_puzzle()
+    fills = [svg_root(puzzle, theme=theme).find(f'{SVG}rect').get('fill') for theme in (first, second)]
+    assert fills[0] != fills[1]
+    assert fills == [f'#{get_image_theme_colors(theme)["background"]}' for theme in (first, second)]
+
+    pixels = [png_image(puzzle, theme=theme).getpixel((1, 1)) for theme in (first, second)]
+    assert pixels == [hex_rgb(get_image_theme_colors(theme)['background']) for theme in (first, second)]
+
+def test_svg_places_letters_with_use():
+    puzzle = make_puzzle()
+    root = svg_root(puzzle)
+    letters = [letter for row in puzzle['grid'] for letter in row if letter]
+    definitions = root.find(f'{SVG}defs')
+    assert sorted(text.text for text in definitions) == sorted(set(letters))
+    assert len(root.findall(f'.//{SVG}use')) == len(letters)
+
+def test_square_grid_is_ruled():
+    puzzle = make_puzzle()
+    rows, cols = len(puzzle['grid']), len(puzzle['grid'][0])
+    outline = svg_root(puzzle).find(f'{SVG}path').get('d')
+    assert outline.count('M') == rows + cols + 2
+    assert outline.count('h') == rows + 1 and outline.count('v') == cols + 1
+
+def test_shaped_grid_outlines_its_cells():
+    puzzle = make_puzzle('heart')
+    grid, _ = trim_empty_rows(puzzle['grid'])
+    cells = sum(1 for row in grid for letter in row if letter)
+    root = svg_root(puzzle)
+    assert root.find(f'{SVG}path').get('d').count('z') == cells
+    assert int(root.get('height')) == get_image_layout(grid, puzzle['words'], title='Title', subject='Subject')['height']
+
+def test_trim_empty_rows_shifts_placements():
+    grid = [['', ''], ['A', 'B'], ['', '']]
+    placements = [{'word': 'AB', 'row': 1, 'col': 0, 'dr': 0, 'dc': 1}]
+    trimmed, shifted = trim_empty_rows(grid, placements)
+    assert trimmed == [['A', 'B']]
+    assert shifted[0]['row'] == 0 and placements[0]['row'] == 1
+
+def test_answer_key_shading():
+    puzzle = make_puzzle()
+    highlight_cells = get_highlight_cells(puzzle['placements'], True)
+    assert highlight_cells and get_highlight_cells(puzzle['placements'], False) == set()
+
+    root = svg_root(puzzle, answer_key=True)
+    shading = root.find(f"{SVG}g[@fill='#{ANSWER_HIGHLIGHT_COLOR}']")
+    assert len(shading) == len(highlight_cells)
+
+    layout = get_image_layout(puzzle['grid'], puzzle['words'], title='Title', subject='Subject')
+    i, j = min(highlight_cells)
+    x = layout['grid_left'] + j * layout['cell_size'] + 3
+    y = layout['grid_top'] + i * layout['cell_size'] + 3
+    assert png_image(puzzle, answer_key=True).getpixel((x, y)) == hex_rgb(ANSWER_HIGHLIGHT_COLOR)
+    assert png_image(puzzle).getpixel((x, y)) == (255, 255, 255)
+
+def test_png_size_matches_layout():
+    puzzle = make_puzzle()
+    layout = get_image_layout(puzzle['grid'], puzzle['words'], title='Title', subject='Subject')
+    assert png_image(puzzle).size == (layout['width'], layout['height'])
+
+def test_glyph_atlas_is_cached():
+    atlas = get_glyph_atlas('Arial', 19)
+    assert get_glyph_atlas('Arial', 19) is atlas
+    assert set('ABCDEFGHIJKLMNOPQRSTUVWXYZ') <= set(atlas)
@@ -0,0 +1,137 @@
+import io
+import time
+import uuid
+
+import pytest
+from docx import Document
+from pypdf import PdfReader
+
+from app import app
+from utils import job_queue
+
+JOB_WAIT = 120  # seconds
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+def wait_for_job(client, status_url):
+    deadline = time.monotonic() + JOB_WAIT
+    while time.monotonic() < deadline:
+        job = client.get(status_url).get_json()
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.1)
+    raise AssertionError(f'Job at {status_url} did not finish')
+
+def test_puzzle_job_matches_generate(client):
+    fields = {'title': 'Job Puzzle', 'words': 'CAT\nDOG\nBIRD', 'shape': 'circle', 'allowHorizontal': 'on',
+              'allowVertical': 'on', 'seed': '4242'}
+    response = client.post('/jobs', data=fields)
+    assert response.status_code == 202
+    assert response.headers['Location'] == response.get_json()['status_url']
+
+    job = wait_for_job(client, response.get_json()['status_url'])
+    assert job['status'] == 'done'
+    assert job['progress'] == 1.0
+    assert job['result_name'] == 'Job_Puzzle.pdf'
+
+    result = client.get(job['result_url'])
+    assert result.status_code == 200
+    assert result.data == client.post('/generate', data=fields).data
+
+@pytest.mark.parametrize('export_format, puzzle_count', [('pdf', 3), ('pdf', 15), ('word', 3)])
+def test_booklet_job(client, export_format, puzzle_count):
+    # 15 puzzles with answer keys is two page shards, rendered by the shared process pool
+    puzzles = [{'title': f'Puzzle {number}', 'words': ['CAT', 'DOG', 'BIRD' + chr(ord('A') + number)]}
+               for number in range(1, puzzle_count + 1)]
+    response = client.post('/jobs', json={'kind': 'booklet', 'title': f'Booklet {uuid.uuid4().hex[:8]}',
+                                          'exportFormat': export_format, 'answerKeys': True,
+                                          'allowHorizontal': True, 'puzzles': puzzles})
+    assert response.status_code == 202
+
+    job = wait_for_job(client, response.get_json()['status_url'])
+    assert job['status'] == 'done', job['error']
+    assert job['stage'] == 'rendering'
+    assert job['detail']['pages_rendered'] == job['detail']['pages_total'] == 2 * puzzle_count
+
+    data = client.get(job['result_url']).data
+    if export_format == 'pdf':
+        assert len(PdfReader(io.BytesIO(data)).pages) == 2 * puzzle_count
+    else:
+        assert Document(io.BytesIO(data)).paragraphs
+
+@pytest.mark.parametrize('body', [
+    {'title': 5, 'words': ['CAT']},
+    {'words': ['CAT'], 'theme': ['modern']},
+    {'words': ['CAT'], 'exportFormat': None},
+    {'words': [1, 2]},
+    {'words': ['CAT'], 'seed': True},
+    {'kind': 'booklet', 'font': 3, 'puzzles': [{'words': ['CAT']}]},
+    {'kind': 'booklet', 'puzzles': [{'words': ['CAT'], 'subject': {}}]},
+    {'kind': 'booklet', 'puzzles': ['CAT']},
+    {'kind': 'booklet', 'puzzles': []},
+    {'kind': 'poster', 'words': ['CAT']},
+    ['CAT', 'DOG'],
+    'CAT',
+])
+def test_job_rejects_bad_input(client, body):
+    response = client.post('/jobs', json=body)
+    assert response.status_code == 400
+    assert response.get_json()['error']
+
+def test_unknown_job(client):
+    assert client.get('/jobs/missing').status_code == 404
+    assert client.get('/jobs/missing/result').status_code == 404
+
+def insert_stale_job(kind, attempts):
+    # Written directly as running, so no worker can take it before it goes stale
+    job_id = uuid.uuid4().hex
+    stale = time.time() - job_queue.JOB_STALE_AFTER - 1
+    conn = job_queue._connect()
+    try:
+        conn.execute(
+            "INSERT INTO jobs (id, kind, params, status, attempts, created, updated) "
+            "VALUES (?, ?, '{}', 'running', ?, ?, ?)",
+            (job_id, kind, attempts, stale, stale)
+        )
+    finally:
+        conn.close()
+    return job_id
+
+def test_stale_jobs_are_retried_then_failed():
+    job_queue.register_job_handler('stale-test', lambda params, progress: (b'retried', 'retried.txt'))
+    retried = insert_stale_job('stale-test', attempts=1)
+    failed = insert_stale_job('stale-test', attempts=job_queue.JOB_MAX_ATTEMPTS)
+
+    # Run the claim here too, in case the worker threads are idle until their next poll
+    claimed = job_queue._claim_job()
+    if claimed is not None:
+        job_queue._run_job(*claimed)
+
+    deadline = time.monotonic() + JOB_WAIT
+    while job_queue.get_job(retried)['status'] != 'done' and time.monotonic() < deadline:
+        time.sleep(0.1)
+
+    assert job_queue.get_job_result(retried) == (b'retried', 'retried.txt')
+    job = job_queue.get_job(failed)
+    assert job['status'] == 'failed'
+    assert job['error'] == 'Job was interrupted'
+
+    conn = job_queue._connect()
+    try:
+        attempts = conn.execute('SELECT attempts FROM jobs WHERE id = ?', (retried,)).fetchone()[0]
+    finally:
+        conn.close()
+    assert attempts == 2
+
+def test_job_events_end_with_result(client):
+    response = client.post('/jobs', json={'title': 'Streamed', 'words': ['CAT', 'DOG', 'MOUSE'], 'seed': 99})
+    job_id = response.get_json()['id']
+
+    events = client.get(f'/jobs/{job_id}/events')
+    assert events.mimetype == 'text/event-stream'
+    body = events.get_data(as_text=True)
+    names = [line.split(': ', 1)[1] for line in body.splitlines() if line.startswith('event: ')]
+    assert names[-1] == 'done'
+    assert set(names[:-1]) <= {'progress'}
@@ -0,0 +1,60 @@
+import io
+
+import pytest
+from pypdf import PdfReader
+from reportlab.lib.pagesizes import letter
+
+from utils.layout import (
+    DEFAULT_PAGE_SIZE, WORD_COUNT_BUCKETS, get_booklet_pages, get_layout_plan, get_shape_class, get_word_count_bucket,
+    plan_puzzle_layout,
+)
+from utils.pdf_exporter import export_to_pdf
+from utils.puzzle_generator import generate_puzzle
+
+def make_words(count):
+    # Distinct six-letter words that fit any grid
+    return [''.join(chr(ord('A') + (index // 26 ** power) % 26) for power in range(6)) for index in range(count)]
+
+@pytest.mark.parametrize('shape_class', ['square', 'shaped'])
+def test_word_count_buckets(shape_class):
+    limits = WORD_COUNT_BUCKETS[shape_class]
+    assert get_word_count_bucket(shape_class, 0) == 0
+    for bucket, limit in enumerate(limits):
+        assert get_word_count_bucket(shape_class, limit) == bucket
+    assert get_word_count_bucket(shape_class, limits[0] + 1) == 1
+    assert get_word_count_bucket(shape_class, limits[-1] + 100) == len(limits) - 1
+
+def test_plan_is_computed_once():
+    grid = [['A'] * 12 for _ in range(12)]
+    plan = plan_puzzle_layout(grid, 'square', 10)
+    assert plan_puzzle_layout(grid, 'square', 12) is plan
+    assert plan_puzzle_layout(grid, 'square', 20) is not plan
+    assert plan_puzzle_layout(grid, 'heart', 10) is get_layout_plan('shaped', 12, 12, DEFAULT_PAGE_SIZE, 0)
+
+@pytest.mark.parametrize('shape_class', ['square', 'shaped'])
+@pytest.mark.parametrize('page_size', [DEFAULT_PAGE_SIZE, letter])
+def test_plan_fills_the_page_width(shape_class, page_size):
+    plan = get_layout_plan(shape_class, 15, 15, page_size)
+    left, right, _, _ = plan.pdf_margins
+    assert plan.pdf_cell_size * plan.rows == pytest.approx(plan.pdf_puzzle_width)
+    assert plan.pdf_puzzle_width + plan.pdf_wordlist_width <= page_size[0] - left - right + 1e-6
+
+def test_longer_lists_get_tighter_rows():
+    heights = [plan.pdf_word_leading + 2 * plan.pdf_word_padding
+               for plan in (get_layout_plan('square', 12, 12, word_bucket=bucket) for bucket in range(3))]
+    assert heights == sorted(heights, reverse=True)
+
+@pytest.mark.parametrize('shape', ['square', 'heart'])
+def test_largest_bucket_fits_one_page(shape):
+    words = make_words(WORD_COUNT_BUCKETS[get_shape_class(shape)][-1])
+    grid = generate_puzzle(words, shape, seed=1)[0]
+    output = io.BytesIO()
+    export_to_pdf('Title', 'Subject', grid, words, 'Arial', output, shape=shape)
+    assert len(PdfReader(io.BytesIO(output.getvalue())).pages) == 1
+
+def test_booklet_pages_put_answer_keys_last():
+    puzzles = [{'title': 'One'}, {'title': ''}]
+    assert get_booklet_pages(puzzles) == puzzles
+    pages = get_booklet_pages(puzzles, answer_keys=True)
+    assert [page['title'] for page in pages] == ['One', '', 'One - Answer Key', 'Answer Key']
+    assert [page.get('answer_key', False) for page in pages] == [False, False, True, True]
@@ -0,0 +1,158 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pypdf import PdfReader
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from utils.pdf_exporter import PuzzleGridFlowable, export_to_pdf, export_booklet_pdf, export_booklet_pdf_parallel, \
+    get_theme_colors, get_cached_style, get_style_cache_stats, get_footer_instruction_layout, \
+    INSTRUCTION_FONT_SIZE, SHAPED_INSTRUCTION_TEXT, SQUARE_INSTRUCTIONS
+from utils.puzzle_generator import generate_puzzle
+
+WORDS = ['CAT', 'DOG', 'BIRD', 'HORSE', 'MOUSE']
+
+def make_puzzle(shape='square', seed=3, words=WORDS):
+    grid, placed_words, placements = generate_puzzle(words, shape, return_placements=True, seed=seed)
+    return {'grid': grid, 'words': placed_words, 'placements': placements, 'shape': shape}
+
+def export_pdf(puzzle, title='Test Puzzle', **options):
+    output = io.BytesIO()
+    export_to_pdf(title, 'Subject', puzzle['grid'], puzzle['words'], 'Arial', output, shape=puzzle['shape'],
+                  placements=puzzle['placements'], **options)
+    return PdfReader(io.BytesIO(output.getvalue()))
+
+def make_booklet(shapes=('square', 'heart', 'square', 'circle')):
+    return [dict(make_puzzle(shape, seed=index), title=f'Puzzle {index + 1}', subject='Animals')
+            for index, shape in enumerate(shapes)]
+
+def export_booklet(puzzles, **options):
+    output = io.BytesIO()
+    export_booklet_pdf(puzzles, 'Arial', output, **options)
+    return PdfReader(io.BytesIO(output.getvalue()))
+
+def footer_forms(page):
+    xobjects = page['/Resources']['/XObject']
+    return {xobjects.raw_get(name).idnum for name in xobjects if 'Instructions' in name}
+
+def page_letters(page):
+    # Text extraction spaces letters unevenly; compare without whitespace
+    return ''.join(page.extract_text().split())
+
+def test_grid_flowable_size():
+    grid = [['A', 'B', 'C'], ['D', 'E', 'F']]
+    flowable = PuzzleGridFlowable(grid, 20, 'Helvetica', 14, get_theme_colors('modern'))
+    assert flowable.wrap(500, 500) == (60, 40)
+
+@pytest.mark.parametrize('shape', ['square', 'heart'])
+def test_grid_letters_are_drawn(shape):
+    puzzle = make_puzzle(shape)
+    reader = export_pdf(puzzle)
+    assert len(reader.pages) == 1
+
+    text = page_letters(reader.pages[0])
+    assert 'TestPuzzle' in text
+    for row in puzzle['grid']:
+        assert ''.join(row) in text
+
+def test_grid_is_one_text_object():
+    # Letters are placed with text matrices inside a single BT/ET block, not a Table per cell
+    puzzle = make_puzzle()
+    content = export_pdf(puzzle).pages[0].get_contents().get_data().decode('latin-1')
+    letters = sum(1 for row in puzzle['grid'] for letter in row if letter)
+    grid_text = next(block for block in content.split('BT ') if block.count(' Tj') == letters)
+    assert grid_text.count(' Tm ') == letters + 1
+
+def test_cached_style_is_built_once():
+    built = []
+    factory = lambda: built.append(1) or object()
+    first = get_cached_style(('TestStyle', 'Helvetica'), factory)
+    assert get_cached_style(('TestStyle', 'Helvetica'), factory) is first
+    assert get_cached_style(('TestStyle', 'Courier'), factory) is not first
+    assert len(built) == 2
+
+def test_repeat_exports_reuse_styles():
+    puzzle = make_puzzle()
+    export_pdf(puzzle, theme='playful')
+    before = get_style_cache_stats()
+
+    export_pdf(puzzle, theme='playful')
+    after = get_style_cache_stats()
+    assert after['misses'] == before['misses']
+    assert after['hits'] > before['hits']
+    assert after['size'] == before['size']
+
+def test_booklet_has_one_page_per_puzzle():
+    puzzles = make_booklet()
+    reader = export_booklet(puzzles)
+    assert len(reader.pages) == len(puzzles)
+    for page, puzzle in zip(reader.pages, puzzles):
+        text = page_letters(page)
+        assert puzzle['title'].replace(' ', '') in text
+        assert ''.join(puzzle['grid'][0]) in text
+
+def test_booklet_footer_forms_are_shared():
+    # One footer form per shape class for the whole document, placed on every page
+    reader = export_booklet(make_booklet())
+    forms = [footer_forms(page) for page in reader.pages]
+    assert all(len(page_forms) == 1 for page_forms in forms)
+    assert forms[0] == forms[2] != forms[1] == forms[3]
+
+def test_answer_key_page_reuses_the_footer_form():
+    reader = export_pdf(make_puzzle('heart'), answer_key=True)
+    assert len(reader.pages) == 2
+    assert footer_forms(reader.pages[0]) == footer_forms(reader.pages[1])
+
+def export_parallel(puzzles, **options):
+    output = io.BytesIO()
+    export_booklet_pdf_parallel(puzzles, 'Arial', output, **options)
+    return PdfReader(io.BytesIO(output.getvalue()))
+
+def test_parallel_shards_merge_in_page_order():
+    puzzles = make_booklet(('square', 'heart', 'square', 'circle', 'square'))
+    serial = export_booklet(puzzles, answer_keys=True)
+    progress = []
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        merged = export_parallel(puzzles, answer_keys=True, shard_pages=3, executor=executor,
+                                 progress=lambda done, total: progress.append((done, total)))
+
+    assert len(merged.pages) == len(serial.pages) == 10
+    assert [page_letters(page) for page in merged.pages] == [page_letters(page) for page in serial.pages]
+    assert sorted(progress)[-1] == (10, 10) and len(progress) == 4
+
+def test_parallel_booklet_in_worker_processes():
+    puzzles = make_booklet()
+    merged = export_parallel(puzzles, workers=2, shard_pages=2)
+    assert [page_letters(page) for page in merged.pages] == \
+        [page_letters(page) for page in export_booklet(puzzles).pages]
+
+def test_single_shard_renders_in_process():
+    # One shard never starts a pool; the executor would fail the test if it were used
+    class NoExecutor:
+        def submit(self, *args):
+            raise AssertionError('shard submitted')
+
+    assert len(export_parallel(make_booklet(), shard_pages=25, executor=NoExecutor()).pages) == 4
+
+def test_footer_layout_is_cached():
+    layout = get_footer_instruction_layout('shaped', 'Helvetica', available_width=400)
+    assert get_footer_instruction_layout('shaped', 'Helvetica', available_width=400) is layout
+    assert get_footer_instruction_layout('shaped', 'Helvetica', available_width=300) != layout
+
+def test_square_footer_lines():
+    layout = get_footer_instruction_layout('square', 'Times-Roman')
+    assert [text for _, _, _, text in layout] == ['Instructions:'] + SQUARE_INSTRUCTIONS
+    assert [y for _, y, _, _ in layout] == [-12 * line for line in range(len(layout))]
+
+@pytest.mark.parametrize('width', [250, 400])
+def test_shaped_footer_wraps_within_width(width):
+    layout = get_footer_instruction_layout('shaped', 'Helvetica', available_width=width)
+    label, *runs = layout
+    assert label == (0, 0, 'Helvetica-Bold', 'Instructions:')
+    assert ''.join(text if x else ' ' + text for x, _, _, text in runs).split() == SHAPED_INSTRUCTION_TEXT.split()
+    assert [font for _, _, font, text in runs if text == 'Note:'] == ['Helvetica-Bold']
+
+    max_width = width - stringWidth('Instructions:', 'Helvetica-Bold', INSTRUCTION_FONT_SIZE) - 10
+    for x, _, font, text in runs:
+        assert x + stringWidth(text, font, INSTRUCTION_FONT_SIZE) <= max_width
@@ -0,0 +1,121 @@
+import gzip
+import json
+from collections import OrderedDict
+
+import pytest
+
+import app as app_module
+import utils.puzzle_cache as puzzle_cache
+from app import app, generate_puzzle_record
+from utils.puzzle_cache import get_preview_puzzle, store_preview_puzzle
+from utils.puzzle_format import unpack_grid
+
+WORDS = 'CAT\nDOG\nBIRD\nHORSE\nMOUSE\nSEA LION'
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+def preview(client, headers=None, **fields):
+    form = {'words': WORDS, 'shape': 'square', 'allowHorizontal': 'on', 'allowVertical': 'on'}
+    form.update(fields)
+    return client.post('/preview', data=form, headers=headers or {})
+
+def read_compact(response):
+    body = response.data
+    if response.headers.get('Content-Encoding') == 'gzip':
+        body = gzip.decompress(body)
+    return json.loads(body)
+
+@pytest.mark.parametrize('shape', ['square', 'heart'])
+def test_compact_preview_round_trip(client, shape):
+    data = read_compact(preview(client, compact='on', shape=shape))
+    assert data['compact'] == 1
+
+    # The same seed rebuilds the grid the compact fields describe
+    words = [word.strip() for word in WORDS.split('\n')]
+    puzzle = generate_puzzle_record([word.replace(' ', '') for word in words], words, shape, True, True, False,
+                                    data['seed'])
+    assert unpack_grid(data['letters'], data['mask'], data['rows'], data['cols']) == puzzle['grid']
+    assert data['words'] == puzzle['words']
+    assert 'SEA LION' in data['words']
+
+    placements = data['placements']
+    assert len(placements) == 4 * len(puzzle['placements'])
+    assert [placements[index:index + 4] for index in range(0, len(placements), 4)] == \
+        [[placement['row'], placement['col'], placement['dr'], placement['dc']] for placement in puzzle['placements']]
+
+def test_compact_preview_is_gzipped_when_accepted(client):
+    plain = preview(client, compact='on')
+    compressed = preview(client, compact='on', headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in plain.headers
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert read_compact(compressed)['compact'] == 1
+
+def test_small_compact_preview_is_not_compressed(client, monkeypatch):
+    monkeypatch.setattr(app_module, 'COMPACT_COMPRESS_MIN_BYTES', 10 ** 6)
+    response = preview(client, compact='on', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert json.loads(response.data)['compact'] == 1
+
+def test_compact_preview_uses_brotli(client):
+    brotli = pytest.importorskip('brotli')
+    response = preview(client, compact='on', headers={'Accept-Encoding': 'br, gzip'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert json.loads(brotli.decompress(response.data))['compact'] == 1
+
+def test_default_preview_is_plain_json(client):
+    data = preview(client).get_json()
+    assert 'compact' not in data
+    assert len(data['grid']) == len(data['grid'][0])
+
+@pytest.fixture
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(puzzle_cache, '_puzzle_cache', OrderedDict())
+
+def test_token_returns_the_stored_puzzle(empty_cache):
+    puzzle = {'grid': [['A']]}
+    token = store_preview_puzzle(puzzle, {'words': ['A']})
+    assert get_preview_puzzle(token, {'words': ['A']}) is puzzle
+    # Changed inputs make the token stale
+    assert get_preview_puzzle(token, {'words': ['B']}) is None
+    assert get_preview_puzzle('unknown', {'words': ['A']}) is None
+
+def test_tokens_expire(empty_cache, monkeypatch):
+    monkeypatch.setattr(puzzle_cache, 'PUZZLE_TOKEN_TTL', -1)
+    token = store_preview_puzzle({'grid': [['A']]}, {})
+    assert get_preview_puzzle(token, {}) is None
+
+def test_oldest_tokens_dropped(empty_cache, monkeypatch):
+    monkeypatch.setattr(puzzle_cache, 'PUZZLE_CACHE_MAX_ENTRIES', 3)
+    tokens = [store_preview_puzzle({'index': index}, {}) for index in range(4)]
+    assert get_preview_puzzle(tokens[0], {}) is None
+    assert [get_preview_puzzle(token, {})['index'] for token in tokens[1:]] == [1, 2, 3]
+
+def download(client, data, **fields):
+    form = {'words': WORDS, 'shape': 'square', 'allowHorizontal': 'on', 'allowVertical': 'on', 'exportFormat': 'svg',
+            'puzzleToken': data['token'], 'seed': str(data['seed'])}
+    form.update(fields)
+    return client.post('/generate', data=form)
+
+def test_download_reuses_the_previewed_grid(client, monkeypatch):
+    data = preview(client).get_json()
+
+    # A valid token exports the stored grid without placing the words again
+    def no_generation(*args, **kwargs):
+        raise AssertionError('puzzle generated again')
+
+    monkeypatch.setattr(app_module, 'generate_puzzle', no_generation)
+    response = download(client, data)
+    assert response.status_code == 200
+    assert response.headers['X-Puzzle-Seed'] == str(data['seed'])
+
+def test_stale_token_rebuilds_from_the_seed(client):
+    data = preview(client).get_json()
+    # Changed options make the token stale; the seed still pins the new grid
+    first = download(client, data, allowDiagonal='on')
+    second = download(client, dict(data, token='expired'), allowDiagonal='on')
+    assert first.status_code == second.status_code == 200
+    assert first.data == second.data
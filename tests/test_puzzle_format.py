@@ -0,0 +1,76 @@
+import pytest
+
+from utils.puzzle_format import (
+    MAX_PUZZLE_SEED, make_puzzle, encode_mask_rle, encode_puzzle_json, decode_puzzle_json,
+    encode_puzzle_binary, decode_puzzle_binary, decode_puzzle,
+)
+from utils.puzzle_generator import generate_puzzle
+
+def make_generated_puzzle(shape, seed=7):
+    grid, words, placements = generate_puzzle(['CAT', 'DOG', 'BIRD', 'HORSE'], shape, return_placements=True,
+                                              seed=seed)
+    return make_puzzle(grid, words, placements, shape, seed)
+
+def make_hand_built_puzzle():
+    # First cell is empty, so the mask starts with an empty run of filled cells
+    grid = [
+        ['', 'É', 'C', ''],
+        ['Ñ', 'A', 'N', 'D'],
+        ['', 'Ú', 'Ø', ''],
+    ]
+    placements = [
+        {'word': 'ÉCOLE', 'row': 0, 'col': 1, 'dr': 0, 'dc': 1},
+        {'word': 'ÑANDÚ', 'row': 1, 'col': 0, 'dr': 1, 'dc': -1},
+    ]
+    return make_puzzle(grid, ['ÉCOLE', 'ÑANDÚ'], placements, 'custom_drawing', seed=None)
+
+PUZZLES = {
+    'square': lambda: make_generated_puzzle('square'),
+    'heart': lambda: make_generated_puzzle('heart'),
+    'circle': lambda: make_generated_puzzle('circle', seed=MAX_PUZZLE_SEED),
+    'hand_built': make_hand_built_puzzle,
+}
+
+@pytest.mark.parametrize('name', sorted(PUZZLES))
+def test_json_round_trip(name):
+    puzzle = PUZZLES[name]()
+    assert decode_puzzle_json(encode_puzzle_json(puzzle)) == puzzle
+
+@pytest.mark.parametrize('name', sorted(PUZZLES))
+def test_binary_round_trip(name):
+    puzzle = PUZZLES[name]()
+    assert decode_puzzle_binary(encode_puzzle_binary(puzzle)) == puzzle
+
+@pytest.mark.parametrize('name', sorted(PUZZLES))
+def test_decode_detects_encoding(name):
+    puzzle = PUZZLES[name]()
+    assert decode_puzzle(encode_puzzle_binary(puzzle)) == puzzle
+    assert decode_puzzle(encode_puzzle_json(puzzle).encode('utf-8')) == puzzle
+    assert decode_puzzle(encode_puzzle_json(puzzle)) == puzzle
+
+def test_mask_starts_with_empty_filled_run():
+    assert encode_mask_rle(make_hand_built_puzzle()['grid']) == [0, 1, 2, 1, 4, 1, 2, 1]
+
+def test_shaped_grid_has_empty_cells():
+    grid = PUZZLES['heart']()['grid']
+    assert any(cell == '' for row in grid for cell in row)
+
+def test_binary_rejects_out_of_range_seed():
+    puzzle = dict(make_hand_built_puzzle(), seed=MAX_PUZZLE_SEED + 1)
+    with pytest.raises(ValueError):
+        encode_puzzle_binary(puzzle)
+
+def test_decode_rejects_other_data():
+    with pytest.raises(ValueError):
+        decode_puzzle(b'WSPZ')
+    with pytest.raises(ValueError):
+        decode_puzzle('{"format": "something-else"}')
+
+def test_generate_rejects_out_of_range_seed():
+    from app import app
+
+    client = app.test_client()
+    response = client.post('/generate', data={'words': 'CAT\nDOG', 'seed': str(2 ** 63)})
+    assert response.status_code == 400
+    response = client.post('/generate', data={'words': 'CAT\nDOG', 'seed': str(MAX_PUZZLE_SEED)})
+    assert response.status_code == 200
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from utils import shape_bundle
+from utils.shape_bundle import BUNDLE_PATH, BUNDLE_SIZES, build_shape_bundle, load_shape_bundle, get_bundled_mask, \
+    get_bundled_stats
+from utils.shape_masks import BUILTIN_SHAPES, build_builtin_mask, get_shape_mask, get_shape_positions, \
+    add_custom_shape, delete_custom_shape
+
+@pytest.fixture(scope='module')
+def test_bundle_path(tmp_path_factory):
+    # The bundle is a build artifact, so build one rather than rely on utils/shape_bundle.npz
+    path = str(tmp_path_factory.mktemp('bundle') / 'shape_bundle.npz')
+    build_shape_bundle(path)
+    assert load_shape_bundle(path)
+    yield path
+    load_shape_bundle(BUNDLE_PATH)
+
+@pytest.fixture(autouse=True)
+def restore_bundle(test_bundle_path):
+    yield
+    assert load_shape_bundle(test_bundle_path)
+
+def scan_positions(mask):
+    return [(i, j) for i in range(len(mask)) for j in range(len(mask[0])) if mask[i][j]]
+
+@pytest.mark.parametrize('shape', BUILTIN_SHAPES)
+def test_bundle_matches_constructors(shape):
+    # Fails when a constructor changed without bumping SHAPE_BUNDLE_VERSION and rebuilding
+    for size in BUNDLE_SIZES:
+        mask = build_builtin_mask(shape, size)
+        assert get_bundled_mask(shape, size) == mask
+
+        stats = get_bundled_stats(shape, size)
+        assert stats['capacity'] == sum(map(sum, mask))
+        assert list(stats['positions']) == scan_positions(mask)
+        assert stats['slots'].tolist() == [i * size + j for i, j in scan_positions(mask)]
+
+def test_unbundled_sizes_use_constructor():
+    assert get_bundled_mask('circle', 20) is None
+    assert get_shape_mask('circle', 20) == build_builtin_mask('circle', 20)
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'bundle.npz')
+    assert build_shape_bundle(path, sizes=(9, 15)) == 2 * len(BUILTIN_SHAPES)
+    assert load_shape_bundle(path)
+
+    assert get_bundled_mask('heart', 15) == build_builtin_mask('heart', 15)
+    assert get_bundled_mask('heart', 12) is None
+
+def test_other_version_is_ignored(tmp_path, restore_bundle, monkeypatch):
+    path = str(tmp_path / 'bundle.npz')
+    build_shape_bundle(path, sizes=(15,))
+
+    monkeypatch.setattr(shape_bundle, 'SHAPE_BUNDLE_VERSION', shape_bundle.SHAPE_BUNDLE_VERSION + 1)
+    assert not load_shape_bundle(path)
+
+def test_missing_bundle_is_ignored(tmp_path):
+    assert not load_shape_bundle(str(tmp_path / 'missing.npz'))
+
+def test_custom_shape_positions_override_bundle():
+    mask = np.zeros((60, 60), dtype=bool)
+    mask[:30, :30] = True
+    add_custom_shape('star', mask)
+    try:
+        custom = get_shape_mask('star', 15)
+        assert get_shape_positions('star', custom) == scan_positions(custom)
+    finally:
+        delete_custom_shape('star')
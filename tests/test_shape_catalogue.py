@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from utils.shape_catalogue import (
+    CATALOGUE_DIR, catalogue_shapes, discover_catalogue_shapes, get_catalogue_mask, load_json_shape, load_svg_shape,
+    parse_svg_path, rasterize_polygons,
+)
+from utils.shape_masks import BUILTIN_SHAPES, get_shape_mask
+
+@pytest.fixture
+def restore_catalogue():
+    yield
+    discover_catalogue_shapes(reserved_names=BUILTIN_SHAPES)
+
+def polygon_area(polygon):
+    x, y = polygon[:, 0], polygon[:, 1]
+    return abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2
+
+def test_lines_absolute_and_relative():
+    absolute, = parse_svg_path('M10 10 L30 10 L30 40 L10 40 Z')
+    relative, = parse_svg_path('m10,10 h20 v30 h-20 z')
+    assert absolute.tolist() == relative.tolist() == [[10, 10], [30, 10], [30, 40], [10, 40]]
+
+def test_subpaths_and_implicit_lineto():
+    polygons = parse_svg_path('M0 0 10 0 10 10 Z M20 20 L30 20 L30 30 Z')
+    assert [polygon.tolist() for polygon in polygons] == [[[0, 0], [10, 0], [10, 10]],
+                                                          [[20, 20], [30, 20], [30, 30]]]
+
+def test_curves_end_on_their_end_points():
+    polygon, = parse_svg_path('M0 0 C10 -10 20 -10 30 0 S50 10 60 0 Q70 -10 80 0 T100 0 L100 50 Z')
+    assert polygon[-2].tolist() == [100, 0]
+    assert [30, 0] in polygon.tolist() and [60, 0] in polygon.tolist() and [80, 0] in polygon.tolist()
+
+@pytest.mark.parametrize('d', [
+    'M0 50 A50 50 0 1 0 100 50 A50 50 0 1 0 0 50 Z',
+    'M0 50 a50 50 0 1 0 100 0 a50 50 0 1 0 -100 0 z',
+    'M0 50a50 50 0 10100 0a50 50 0 10-100 0z',
+])
+def test_arcs(d):
+    polygon, = parse_svg_path(d)
+    assert polygon_area(polygon) == pytest.approx(np.pi * 50 ** 2, rel=0.02)
+    assert np.allclose(np.hypot(*(polygon - 50).T), 50)
+
+def test_arc_sweep_and_size_flags():
+    # Quarter circle from (100, 50) to (50, 100) around (50, 50): small arc vs. the rest of the circle
+    small, = parse_svg_path('M50 50 L100 50 A50 50 0 0 1 50 100 Z')
+    large, = parse_svg_path('M50 50 L100 50 A50 50 0 1 0 50 100 Z')
+    assert polygon_area(small) == pytest.approx(np.pi * 50 ** 2 / 4, rel=0.02)
+    assert polygon_area(large) == pytest.approx(np.pi * 50 ** 2 * 3 / 4, rel=0.02)
+
+def test_arc_radii_too_small_are_scaled_up():
+    polygon, = parse_svg_path('M0 0 A1 1 0 0 1 100 0 Z')
+    assert polygon_area(polygon) == pytest.approx(np.pi * 50 ** 2 / 2, rel=0.02)
+
+@pytest.mark.parametrize('d', ['M0 0 R10 10 Z', 'M0 0 L10 Z', 'M0 0 A5 5 0 2 1 10 10 Z', '10 10 L20 20'])
+def test_bad_path_data_raises(d):
+    with pytest.raises(ValueError):
+        parse_svg_path(d)
+
+def test_even_odd_fill():
+    outer = np.array([[0, 0], [10, 0], [10, 10], [0, 10]], dtype=float)
+    inner = np.array([[3, 3], [7, 3], [7, 7], [3, 7]], dtype=float)
+    mask = rasterize_polygons([outer, inner], (0, 0, 10, 10), 10)
+    assert mask[1, 1] and not mask[5, 5]
+    assert mask.sum() == 100 - 16
+
+def test_discovery_skips_builtin_names_and_bad_files(tmp_path, restore_catalogue):
+    square = '<svg viewBox="0 0 10 10"><path d="M1 1 L9 1 L9 9 L1 9 Z"/></svg>'
+    (tmp_path / 'circle.svg').write_text(square)
+    (tmp_path / 'box.svg').write_text(square)
+    (tmp_path / 'broken.svg').write_text('<svg viewBox="0 0 10 10"><path d="M1 1 B9 1 Z"/></svg>')
+    (tmp_path / 'notes.txt').write_text('not a shape')
+
+    assert discover_catalogue_shapes(str(tmp_path), reserved_names=BUILTIN_SHAPES) == 1
+    assert list(catalogue_shapes) == ['box']
+    assert get_catalogue_mask('circle', 10) is None
+    assert get_shape_mask('box', 10) == get_catalogue_mask('box', 10)
+
+def test_catalogue_masks_are_copies():
+    mask = get_catalogue_mask('moon', 15)
+    mask[0][0] = not mask[0][0]
+    assert get_catalogue_mask('moon', 15)[0][0] != mask[0][0]
+    assert get_catalogue_mask('missing', 15) is None
+
+def test_json_shape():
+    shape = load_json_shape(f'{CATALOGUE_DIR}/moon.json')
+    assert shape['view_box'] == (0, 0, 100, 100)
+    assert get_shape_mask('moon', 20) == rasterize_polygons(shape['polygons'], shape['view_box'], 20).tolist()
+
+def test_pumpkin_is_one_outline_without_holes():
+    shape = load_svg_shape(f'{CATALOGUE_DIR}/pumpkin.svg')
+    assert len(shape['polygons']) == 1
+
+    # The centre column is solid from the top of the stem to the bottom of the body
+    column = rasterize_polygons(shape['polygons'], shape['view_box'], 200)[:, 100]
+    filled = np.flatnonzero(column)
+    assert filled.tolist() == list(range(filled[0], filled[-1] + 1))
@@ -0,0 +1,159 @@
+import io
+import zipfile
+
+import pytest
+
+from docx import Document
+from docx.opc.part import XmlPart
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn
+from docx.shared import Inches
+
+from utils.layout import DOCX_MARGINS
+from utils.puzzle_generator import generate_puzzle, get_placement_cells
+from utils.word_exporter import ANSWER_HIGHLIGHT_COLOR, PUZZLE_LETTER_STYLE, build_puzzle_table_xml, export_to_word, \
+    export_workbook_docx, get_base_document
+
+WORDS = ['CAT', 'DOG', 'BIRD', 'HORSE', 'MOUSE']
+
+def make_puzzle(shape='square', seed=3):
+    grid, placed_words, placements = generate_puzzle(WORDS, shape, return_placements=True, seed=seed)
+    return {'grid': grid, 'words': placed_words, 'placements': placements, 'shape': shape}
+
+def export_docx(puzzle, title='Test Puzzle', **options):
+    output = io.BytesIO()
+    export_to_word(title, 'Subject', puzzle['grid'], puzzle['words'], 'Arial', output, shape=puzzle['shape'],
+                   **options)
+    return Document(io.BytesIO(output.getvalue()))
+
+def cell_texts(table):
+    return [[''.join(t.text for t in tc.iter(qn('w:t'))) for tc in tr.findall(qn('w:tc'))]
+            for tr in table.findall(qn('w:tr'))]
+
+def find_grid_table(doc, grid):
+    for table in doc.element.body.iter(qn('w:tbl')):
+        if cell_texts(table) == grid:
+            return table
+    return None
+
+def test_grid_table_xml():
+    grid = [['A', '', 'C'], ['D', '&', 'F']]
+    table = parse_xml(build_puzzle_table_xml(grid, 'PuzzleLetter', 300, highlight_cells={(1, 2)}))
+
+    assert cell_texts(table) == grid
+    assert [col.get(qn('w:w')) for col in table.iter(qn('w:gridCol'))] == ['300'] * 3
+    assert [height.get(qn('w:val')) for height in table.iter(qn('w:trHeight'))] == ['300'] * 2
+    assert {style.get(qn('w:val')) for style in table.iter(qn('w:pStyle'))} == {'PuzzleLetter'}
+
+    # Only the highlighted cell is shaded; the empty cell has a paragraph but no run
+    cells = table.findall(f"{qn('w:tr')}/{qn('w:tc')}")
+    shaded = [index for index, tc in enumerate(cells) if tc.find(f"{qn('w:tcPr')}/{qn('w:shd')}") is not None]
+    assert shaded == [5]
+    assert cells[5].find(f"{qn('w:tcPr')}/{qn('w:shd')}").get(qn('w:fill')) == ANSWER_HIGHLIGHT_COLOR
+    assert cells[1].find(qn('w:p')) is not None and cells[1].find(f"{qn('w:p')}/{qn('w:r')}") is None
+
+def test_exported_grid_uses_one_letter_style():
+    puzzle = make_puzzle()
+    doc = export_docx(puzzle)
+    table = find_grid_table(doc, puzzle['grid'])
+    assert table is not None
+
+    style_ids = {style.get(qn('w:val')) for style in table.iter(qn('w:pStyle'))}
+    assert len(style_ids) == 1
+    style = doc.styles.element.get_by_id(style_ids.pop())
+    assert style.name_val.startswith(PUZZLE_LETTER_STYLE)
+    # Letter formatting lives on the style, not on each run
+    assert not list(table.iter(qn('w:rPr')))
+
+def test_shaped_grid_keeps_blank_cells():
+    puzzle = make_puzzle('heart')
+    table = find_grid_table(export_docx(puzzle), puzzle['grid'])
+    assert table is not None
+    assert any('' in row for row in cell_texts(table))
+
+def xml_parts(doc):
+    return [part for part in doc.part.package.iter_parts() if isinstance(part, XmlPart)]
+
+def test_base_document_copies_share_no_state():
+    first = get_base_document('modern', 'square', 'Arial')
+    second = get_base_document('modern', 'square', 'Arial')
+    assert first.part.package is not second.part.package
+
+    # Hold the element proxies so ids stay unique (lxml reuses a node's live proxy)
+    first_elements = [element for part in xml_parts(first) for element in part.element.iter()]
+    second_elements = [element for part in xml_parts(second) for element in part.element.iter()]
+    assert first_elements
+    assert not {id(element) for element in first_elements} & {id(element) for element in second_elements}
+
+    # Changes to one copy (body, header part, styles) don't reach the other or the template
+    first.add_paragraph('ONLY IN FIRST')
+    first.sections[0].header.add_paragraph('HEADER')
+    first.styles.add_style('Only First', 1)
+    for doc in (second, get_base_document('modern', 'square', 'Arial')):
+        assert 'ONLY IN FIRST' not in doc.element.xml
+        assert doc.sections[0].header.is_linked_to_previous
+        assert 'Only First' not in [style.name for style in doc.styles]
+
+def test_repeat_exports_are_identical():
+    puzzle = make_puzzle()
+    outputs = []
+    for _ in range(2):
+        output = io.BytesIO()
+        export_to_word('Same', 'Subject', puzzle['grid'], puzzle['words'], 'Arial', output)
+        with zipfile.ZipFile(output) as package:
+            outputs.append({name: package.read(name) for name in package.namelist() if name != 'docProps/core.xml'})
+    assert outputs[0] == outputs[1]
+
+def make_workbook(shapes=('square', 'heart', 'square')):
+    return [dict(make_puzzle(shape, seed=index), title=f'Puzzle {index + 1}', subject='Animals')
+            for index, shape in enumerate(shapes)]
+
+def export_workbook(puzzles, **options):
+    output = io.BytesIO()
+    export_workbook_docx(puzzles, 'Arial', output, **options)
+    with zipfile.ZipFile(io.BytesIO(output.getvalue())) as package:
+        assert package.testzip() is None
+    return Document(io.BytesIO(output.getvalue()))
+
+def footer_id(section):
+    return section._sectPr.find(qn('w:footerReference')).get(qn('r:id'))
+
+def test_workbook_section_per_page():
+    puzzles = make_workbook()
+    progress = []
+    doc = export_workbook(puzzles, answer_keys=True, progress=lambda done, total: progress.append((done, total)))
+
+    titles = [puzzle['title'] for puzzle in puzzles]
+    assert len(doc.sections) == 6
+    assert [[paragraph.text for paragraph in section.header.paragraphs if paragraph.text]
+            for section in doc.sections] == \
+        [[title, 'Animals'] for title in titles + [f'{title} - Answer Key' for title in titles]]
+    assert progress == [(page, 6) for page in range(1, 7)]
+
+    # Every page's grid is in the body, in page order
+    grids = [puzzle['grid'] for puzzle in puzzles] * 2
+    tables = [table for table in doc.element.body.iter(qn('w:tbl')) if cell_texts(table) in grids]
+    assert [cell_texts(table) for table in tables] == grids
+
+def test_workbook_footer_and_margins_per_shape_class():
+    doc = export_workbook(make_workbook())
+    assert footer_id(doc.sections[0]) == footer_id(doc.sections[2]) != footer_id(doc.sections[1])
+    for section, shape_class in zip(doc.sections, ['square', 'shaped', 'square']):
+        assert section.left_margin == Inches(DOCX_MARGINS[shape_class][0])
+        assert 'Instructions' in ''.join(paragraph.text for paragraph in section.footer.paragraphs)
+
+def test_workbook_answer_keys_are_shaded():
+    puzzles = make_workbook(('square', 'heart'))
+    doc = export_workbook(puzzles, answer_keys=True)
+    tables = [table for table in doc.element.body.iter(qn('w:tbl'))
+              if cell_texts(table) in [puzzle['grid'] for puzzle in puzzles]]
+
+    shaded = [sum(1 for shd in table.iter(qn('w:shd')) if shd.get(qn('w:fill')) == ANSWER_HIGHLIGHT_COLOR)
+              for table in tables]
+    expected = [len({cell for placement in puzzle['placements'] for cell in get_placement_cells(placement)})
+                for puzzle in puzzles]
+    assert shaded == [0, 0] + expected
+
+def test_workbook_needs_puzzles():
+    with pytest.raises(ValueError):
+        export_workbook_docx([], 'Arial', io.BytesIO())
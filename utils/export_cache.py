@@ -0,0 +1,277 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+# CONTENT-ADDRESSED EXPORT CACHE
+# Rendered PDF/DOCX bytes are stored under a hash of the normalized request
+# inputs (words, shape, font, theme, format, seed, ...). The memory tier is an
+# LRU bounded by total bytes; the optional disk tier (enabled by setting
+# EXPORT_CACHE_DIR) survives restarts and is shared by every worker process.
+#
+# Identical requests that arrive while the document is still being rendered
+# wait for that render instead of starting their own (get_or_render_export).
+# This coalescing is per process; the disk tier covers other workers once
+# the first render has finished.
+#
+# Shapes are keyed by a digest of the mask they resolve to (custom mask hash,
+# shape bundle hash, catalogue file hash; see get_shape_digest), so editing a
+# shape changes the key by itself. Bump EXPORT_CACHE_VERSION whenever the
+# generator or exporters change their output, so old entries (and the
+# /exports/<key> download URLs clients hold) stop matching.
+
+EXPORT_CACHE_VERSION = 6
+
+# Memory tier limits
+EXPORT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+EXPORT_CACHE_MAX_ENTRY_BYTES = 4 * 1024 * 1024  # Larger documents are streamed but not cached
+
+# Disk tier (disabled unless EXPORT_CACHE_DIR is set)
+EXPORT_CACHE_DIR = os.environ.get('EXPORT_CACHE_DIR')
+EXPORT_CACHE_DISK_MAX_BYTES = 512 * 1024 * 1024
+
+# key -> bytes, least recently used first
+_memory_cache = OrderedDict()
+_memory_bytes = 0
+_cache_lock = threading.Lock()
+_cache_stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'coalesced': 0}
+
+# Renders in progress: key -> {'done': Event, 'data': bytes, 'error': exception}
+_in_flight = {}
+
+# How long a coalesced request waits for the in-flight render before rendering itself
+SINGLE_FLIGHT_TIMEOUT = 60  # seconds
+
+# Requests without a seed get a random one, so each would have its own key and
+# render. Identical unseeded requests within SHARED_SEED_WINDOW seconds share
+# one seed instead (see get_shared_seed), so a burst of them renders once.
+SHARED_SEED_WINDOW = 2  # seconds
+SHARED_SEED_MAX_ENTRIES = 1024
+
+# Inputs key -> (expiry time, seed), oldest first
+_shared_seeds = OrderedDict()
+
+def make_export_key(**inputs):
+    """
+    Hash the normalized request inputs into a cache key.
+
+    Args:
+        **inputs: JSON-serializable values that fully determine the document
+
+    Returns:
+        Hex digest, also used in the download URL and as its ETag
+    """
+    payload = json.dumps([EXPORT_CACHE_VERSION, inputs], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def get_shared_seed(inputs, seed):
+    """
+    Get the seed for an unseeded request, shared with identical recent requests.
+
+    Args:
+        inputs: Everything besides the seed that determines the document
+        seed: Fresh random seed, used if no identical request arrived within
+              SHARED_SEED_WINDOW seconds
+
+    Returns:
+        The seed to render with
+    """
+    key = make_export_key(**inputs)
+    now = time.monotonic()
+    with _cache_lock:
+        # Entries expire in insertion order
+        while _shared_seeds:
+            oldest_key, (expires, _) = next(iter(_shared_seeds.items()))
+            if expires > now:
+                break
+            del _shared_seeds[oldest_key]
+
+        entry = _shared_seeds.get(key)
+        if entry is not None:
+            return entry[1]
+
+        _shared_seeds[key] = (now + SHARED_SEED_WINDOW, seed)
+        while len(_shared_seeds) > SHARED_SEED_MAX_ENTRIES:
+            _shared_seeds.popitem(last=False)
+    return seed
+
+def _disk_path(key):
+    return os.path.join(EXPORT_CACHE_DIR, f"{key}.bin")
+
+def _remember(key, data):
+    """Insert into the memory tier and evict least recently used entries (caller holds the lock)."""
+    global _memory_bytes
+
+    if key in _memory_cache:
+        _memory_cache.move_to_end(key)
+        return
+
+    _memory_cache[key] = data
+    _memory_bytes += len(data)
+    while _memory_bytes > EXPORT_CACHE_MAX_BYTES and _memory_cache:
+        _, evicted = _memory_cache.popitem(last=False)
+        _memory_bytes -= len(evicted)
+        _cache_stats['evictions'] += 1
+
+def get_cached_export(key):
+    """
+    Look up rendered bytes, checking memory first and then the disk tier.
+
+    Returns:
+        bytes, or None on a miss
+    """
+    with _cache_lock:
+        data = _memory_cache.get(key)
+        if data is not None:
+            _memory_cache.move_to_end(key)
+            _cache_stats['hits'] += 1
+            return data
+
+    if EXPORT_CACHE_DIR:
+        try:
+            with open(_disk_path(key), 'rb') as cache_file:
+                data = cache_file.read()
+        except OSError:
+            data = None
+
+        if data is not None:
+            with _cache_lock:
+                _remember(key, data)
+                _cache_stats['disk_hits'] += 1
+            return data
+
+    with _cache_lock:
+        _cache_stats['misses'] += 1
+    return None
+
+def has_cached_export(key):
+    """Check whether a document is cached, without counting a hit or miss."""
+    with _cache_lock:
+        if key in _memory_cache:
+            return True
+    return bool(EXPORT_CACHE_DIR) and os.path.exists(_disk_path(key))
+
+def store_export(key, data):
+    """
+    Store rendered bytes in both tiers.
+
+    Returns:
+        True if the entry was cached (oversized documents are skipped)
+    """
+    if len(data) > EXPORT_CACHE_MAX_ENTRY_BYTES:
+        return False
+
+    with _cache_lock:
+        _remember(key, data)
+
+    if EXPORT_CACHE_DIR:
+        try:
+            write_disk_entry(key, data)
+        except OSError as e:
+            print(f"Error writing export cache entry: {e}")
+
+    return True
+
+def get_or_render_export(key, render):
+    """
+    Get a document from the cache, or render it once for all concurrent callers.
+
+    The first caller for a key renders; callers that arrive while it is still
+    running wait and receive the same bytes (or the same exception).
+
+    Args:
+        key: Export key from make_export_key
+        render: Zero-argument callable returning the document bytes
+
+    Returns:
+        bytes
+    """
+    data = get_cached_export(key)
+    if data is not None:
+        return data
+
+    with _cache_lock:
+        # A render may have finished between the lookup above and taking the lock
+        data = _memory_cache.get(key)
+        if data is not None:
+            return data
+
+        flight = _in_flight.get(key)
+        leader = flight is None
+        if leader:
+            flight = {'done': threading.Event(), 'data': None, 'error': None}
+            _in_flight[key] = flight
+        else:
+            _cache_stats['coalesced'] += 1
+
+    if not leader:
+        if flight['done'].wait(SINGLE_FLIGHT_TIMEOUT):
+            if flight['error'] is not None:
+                raise flight['error']
+            return flight['data']
+        # The render is taking too long; don't hold this request hostage to it
+        return render()
+
+    try:
+        data = render()
+        flight['data'] = data
+        store_export(key, data)
+        return data
+    except Exception as e:
+        flight['error'] = e
+        raise
+    finally:
+        with _cache_lock:
+            _in_flight.pop(key, None)
+        flight['done'].set()
+
+def write_disk_entry(key, data):
+    """Atomically write one disk entry, then trim the oldest entries over the size limit."""
+    os.makedirs(EXPORT_CACHE_DIR, exist_ok=True)
+
+    # Write to a temp file and rename, so readers never see a partial entry
+    fd, temp_path = tempfile.mkstemp(dir=EXPORT_CACHE_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, _disk_path(key))
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    entries = []
+    for entry in os.scandir(EXPORT_CACHE_DIR):
+        if entry.name.endswith('.bin'):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= EXPORT_CACHE_DISK_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+def clear_export_cache():
+    """Drop every entry from the memory tier."""
+    global _memory_bytes
+    with _cache_lock:
+        _memory_cache.clear()
+        _memory_bytes = 0
+
+def get_export_cache_stats():
+    """
+    Get export cache counters.
+
+    Returns:
+        dict with hits, disk_hits, misses, evictions, coalesced, entries and bytes
+    """
+    with _cache_lock:
+        return dict(_cache_stats, entries=len(_memory_cache), bytes=_memory_bytes)
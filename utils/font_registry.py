@@ -0,0 +1,183 @@
+import os
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+# FONT REGISTRY
+# TrueType fonts dropped into the fonts/ directory are registered with ReportLab
+# once, at process start, under their family name (e.g. "Inter", "Inter-Bold").
+# ReportLab embeds TTFonts as subsets, so a PDF only carries the glyphs it uses.
+#
+# Every font offered by the UI resolves to:
+#   - a bundled TTF family when one with that name is registered, otherwise
+#   - the closest PDF base-14 font (no embedding needed), and
+#   - a font name Word can use (Word documents reference fonts by name).
+#
+# Only TrueType outlines are supported; CFF-flavoured .otf files are skipped.
+
+FONTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fonts')
+
+# UI font -> (base-14 PDF fallback, Word font)
+UI_FONTS = {
+    'Inter': ('Helvetica', 'Arial'),
+    'Inter (Modern)': ('Helvetica', 'Arial'),
+    'Arial': ('Helvetica', 'Arial'),
+    'Times New Roman': ('Times-Roman', 'Times New Roman'),
+    'Comic Sans MS': ('Helvetica', 'Comic Sans MS'),
+    'Georgia': ('Times-Roman', 'Georgia'),
+    'Verdana': ('Helvetica', 'Verdana'),
+    'Courier New': ('Courier', 'Courier New'),
+}
+
+# UI labels that name the same family as another entry
+UI_FONT_ALIASES = {
+    'Inter (Modern)': 'Inter',
+}
+
+DEFAULT_PDF_FONT = 'Helvetica'
+
+# Bold faces of the base-14 fonts
+BUILTIN_BOLD_FONTS = {
+    'Helvetica': 'Helvetica-Bold',
+    'Times-Roman': 'Times-Bold',
+    'Courier': 'Courier-Bold',
+}
+
+# Registered TTF families: family -> {'normal': name, 'bold': name, 'italic': name, 'boldItalic': name}
+registered_families = {}
+
+# Font files of the registered families: family -> {'normal': path, 'bold': path, ...}
+registered_font_files = {}
+
+def get_font_style(style_name):
+    """Classify a font's style name as normal, bold, italic or boldItalic."""
+    style = style_name.lower()
+    bold = 'bold' in style or 'black' in style or 'heavy' in style
+    italic = 'italic' in style or 'oblique' in style
+    if bold and italic:
+        return 'boldItalic'
+    if bold:
+        return 'bold'
+    if italic:
+        return 'italic'
+    return 'normal'
+
+def discover_fonts(directory=FONTS_DIR):
+    """
+    Register every TrueType font in the fonts directory with ReportLab.
+
+    Args:
+        directory: Directory to scan for .ttf / .otf files
+
+    Returns:
+        Number of font families registered
+    """
+    if not os.path.isdir(directory):
+        return 0
+
+    faces = {}
+    for filename in sorted(os.listdir(directory)):
+        if os.path.splitext(filename)[1].lower() not in ('.ttf', '.otf'):
+            continue
+
+        path = os.path.join(directory, filename)
+        try:
+            # Parse once: the name table gives the family and style, and the
+            # same font object is registered below under its final name
+            font = TTFont(filename, path)
+            family = font.face.familyName.decode('utf-8', 'ignore').strip()
+            style = get_font_style(font.face.styleName.decode('utf-8', 'ignore'))
+        except Exception as e:
+            print(f"Error loading font {filename}: {e}")
+            continue
+
+        faces.setdefault(family, {}).setdefault(style, (path, font))
+
+    for family, styles in faces.items():
+        if 'normal' not in styles:
+            print(f"Skipping font family {family}: no regular face")
+            continue
+
+        names = {}
+        for style in ('normal', 'bold', 'italic', 'boldItalic'):
+            if style in styles:
+                name = family if style == 'normal' else f"{family}-{style[0].upper()}{style[1:]}"
+                font = styles[style][1]
+                font.fontName = name
+                pdfmetrics.registerFont(font)
+                names[style] = name
+
+        # Missing faces fall back to the closest registered one
+        names.setdefault('bold', names['normal'])
+        names.setdefault('italic', names['normal'])
+        names.setdefault('boldItalic', names['bold'])
+
+        # Lets <b>/<i> markup in paragraphs find the right face
+        pdfmetrics.registerFontFamily(family, **names)
+        registered_families[family] = names
+        registered_font_files[family] = {style: path for style, (path, _) in styles.items()}
+
+    return len(registered_families)
+
+def get_pdf_font(font_name):
+    """
+    Get the ReportLab font for a UI font name.
+
+    Returns:
+        A registered TTF family name or a base-14 font name
+    """
+    family = UI_FONT_ALIASES.get(font_name, font_name)
+    if family in registered_families:
+        return registered_families[family]['normal']
+    if family in BUILTIN_BOLD_FONTS:
+        return family
+    return UI_FONTS.get(font_name, (DEFAULT_PDF_FONT, None))[0]
+
+def get_pdf_bold_font(pdf_font):
+    """
+    Get the bold face of a font returned by get_pdf_font.
+
+    Returns:
+        Bold font name (the regular face if the family has no bold)
+    """
+    if pdf_font in registered_families:
+        return registered_families[pdf_font]['bold']
+    return BUILTIN_BOLD_FONTS.get(pdf_font, pdf_font)
+
+def get_word_font(font_name):
+    """
+    Get the font name to use in Word documents for a UI font name.
+
+    Returns:
+        Font name
+    """
+    if font_name in UI_FONTS:
+        return UI_FONTS[font_name][1]
+    return UI_FONT_ALIASES.get(font_name, font_name)
+
+def get_font_file(font_name, bold=False):
+    """
+    Get the bundled TTF file for a UI font name (for rasterizing with Pillow).
+
+    Returns:
+        Path to the regular (or bold) face, or None if the family isn't bundled
+    """
+    family = UI_FONT_ALIASES.get(font_name, font_name)
+    styles = registered_font_files.get(family)
+    if styles is None:
+        return None
+    if bold and 'bold' in styles:
+        return styles['bold']
+    return styles['normal']
+
+def list_registered_fonts():
+    """
+    Get the TTF families registered from the fonts directory.
+
+    Returns:
+        List of family names
+    """
+    return list(registered_families.keys())
+
+# Register bundled fonts once at startup
+discover_fonts()
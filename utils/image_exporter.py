@@ -0,0 +1,415 @@
+import math
+import os
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from PIL import Image, ImageDraw, ImageFont
+
+from .font_registry import get_font_file, get_word_font
+from .layout import get_shape_class
+from .pdf_exporter import get_theme_colors
+from .puzzle_generator import get_placement_cells
+from .word_exporter import ANSWER_HIGHLIGHT_COLOR
+
+# SVG AND PNG EXPORT
+# Single-image renderings of a puzzle (title, subject, grid and word list) for
+# web embedding and thumbnails, drawn directly instead of rasterizing a PDF.
+# Both formats share one geometry (get_image_layout):
+#   - PNG letters are pasted from a glyph atlas rendered once per (font, size)
+#   - SVG letters are <use> references to one <text> definition per letter
+# Colors come from the PDF theme palette (get_image_theme_colors). Square grids
+# are ruled like the PDF grid; shaped grids outline only their own cells and
+# leave out the cells outside the shape (empty strings) and blank rows. With
+# answer_key=True the cells of every placed word are shaded.
+
+# Default grid cell size in pixels
+IMAGE_CELL_SIZE = 32
+
+# Pillow fallbacks when a font isn't bundled in fonts/ (searched in the system font directories)
+IMAGE_FALLBACK_FONTS = ('DejaVuSans.ttf',)
+IMAGE_FALLBACK_BOLD_FONTS = ('DejaVuSans-Bold.ttf', 'DejaVuSans.ttf')
+
+# Average character width as a fraction of the font size, for sizing word list columns
+WORD_WIDTH_FACTOR = 0.62
+
+# Both caches are keyed on the font file a name resolves to (None for Pillow's
+# built-in font), so every unknown font name shares the fallback's entries
+
+# Loaded Pillow fonts: (font file, size) -> FreeTypeFont
+_image_font_cache = {}
+
+# Glyph atlases: (font file, size) -> {letter: (mask image, x offset, y offset)}
+_glyph_atlas_cache = {}
+
+def get_image_theme_colors(theme):
+    """
+    Get the PDF theme palette as hex colors for the image exporters.
+
+    Returns:
+        dict of 'primary', 'secondary', 'text', 'background' and 'grid' as
+        six-digit hex strings without '#'
+    """
+    return {name: color.hexval()[2:] for name, color in get_theme_colors(theme).items()}
+
+def trim_empty_rows(grid, placements=None):
+    """
+    Drop the all-blank rows above and below a shaped grid.
+
+    Returns:
+        (grid, placements) with placement rows shifted to match
+    """
+    filled = [i for i, row in enumerate(grid) if any(row)]
+    if not filled:
+        return grid, placements
+
+    first, last = filled[0], filled[-1]
+    if placements and first:
+        placements = [dict(placement, row=placement['row'] - first) for placement in placements]
+    return grid[first:last + 1], placements
+
+def get_image_layout(grid, word_list, cell_size=IMAGE_CELL_SIZE, title='', subject=''):
+    """
+    Compute the image geometry shared by the SVG and PNG exporters.
+
+    Args:
+        grid: Puzzle grid
+        word_list: Words shown under the grid
+        cell_size: Grid cell size in pixels
+        title: Title (adds a title row when present)
+        subject: Subject (adds a subject row when present)
+
+    Returns:
+        dict of sizes and positions in pixels
+    """
+    rows = len(grid)
+    cols = len(grid[0]) if grid else 0
+    margin = cell_size
+    grid_width = cols * cell_size
+
+    title_size = round(cell_size * 0.9)
+    subject_size = round(cell_size * 0.6)
+    letter_size = round(cell_size * 0.6)
+    word_size = round(cell_size * 0.5)
+
+    y = margin
+    title_y = subject_y = None
+    if title:
+        title_y = y + title_size  # Baseline
+        y += round(title_size * 1.4)
+    if subject:
+        subject_y = y + subject_size
+        y += round(subject_size * 1.6)
+    if title or subject:
+        y += cell_size // 2
+
+    grid_top = y
+    y += rows * cell_size + cell_size // 2
+
+    # Word list in as many columns as fit under the grid
+    longest = max((len(word) for word in word_list), default=0)
+    column_width = max(1, math.ceil(longest * word_size * WORD_WIDTH_FACTOR) + cell_size // 2)
+    word_columns = max(1, min(len(word_list), grid_width // column_width)) if word_list else 1
+    word_rows = math.ceil(len(word_list) / word_columns)
+    word_line_height = round(word_size * 1.5)
+    words_top = y
+    y += word_rows * word_line_height
+
+    return {
+        'rows': rows,
+        'cols': cols,
+        'cell_size': cell_size,
+        'margin': margin,
+        'width': max(grid_width, word_columns * column_width) + 2 * margin,
+        'height': y + margin,
+        'title_size': title_size,
+        'title_y': title_y,
+        'subject_size': subject_size,
+        'subject_y': subject_y,
+        'letter_size': letter_size,
+        'grid_left': margin,
+        'grid_top': grid_top,
+        'word_size': word_size,
+        'word_columns': word_columns,
+        'column_width': column_width,
+        'word_line_height': word_line_height,
+        'words_top': words_top,
+    }
+
+def get_word_positions(word_list, layout):
+    """Yield (word, x, baseline y) for the word list, filled column by column."""
+    word_rows = math.ceil(len(word_list) / layout['word_columns']) if word_list else 0
+    for index, word in enumerate(word_list):
+        column, row = divmod(index, word_rows)
+        x = layout['grid_left'] + column * layout['column_width']
+        y = layout['words_top'] + row * layout['word_line_height'] + layout['word_size']
+        yield word, x, y
+
+def get_highlight_cells(placements, answer_key):
+    """Cells to shade on an answer key (empty unless answer_key is set)."""
+    if not (answer_key and placements):
+        return set()
+    return {cell for placement in placements for cell in get_placement_cells(placement)}
+
+def export_to_svg(title, subject, grid, word_list, font_name, filename, theme='modern', shape='square',
+                  placements=None, answer_key=False, cell_size=IMAGE_CELL_SIZE):
+    """
+    Export the puzzle as an SVG image.
+
+    Each distinct letter is defined once in <defs> and every cell places it with
+    <use>, so the file grows by one short element per cell.
+
+    Args:
+        title, subject, grid, word_list, font_name, theme: As for export_to_pdf
+        filename: Output path or writable binary stream
+        shape: Shape name; square grids are ruled, shaped grids outline their cells
+        placements: The generator's placements (used with answer_key)
+        answer_key: Shade the cells of every placed word
+        cell_size: Grid cell size in pixels
+    """
+    shaped = get_shape_class(shape) == 'shaped'
+    if shaped:
+        grid, placements = trim_empty_rows(grid, placements)
+    theme_colors = get_image_theme_colors(theme)
+    font_family = escape(get_word_font(font_name), {'"': '&quot;'})
+    layout = get_image_layout(grid, word_list, cell_size, title, subject)
+    highlight_cells = get_highlight_cells(placements, answer_key)
+    left = layout['grid_left']
+    top = layout['grid_top']
+    center_x = layout['width'] / 2
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+        f'width="{layout["width"]}" height="{layout["height"]}" '
+        f'viewBox="0 0 {layout["width"]} {layout["height"]}" '
+        f'font-family="{font_family}, sans-serif">'
+    ]
+
+    # One definition per letter used in the grid
+    letters = sorted({letter for row in grid for letter in row if letter})
+    glyph_ids = {letter: f'g{index}' for index, letter in enumerate(letters)}
+    parts.append('<defs>')
+    for letter, glyph_id in glyph_ids.items():
+        parts.append(f'<text id="{glyph_id}" text-anchor="middle" dominant-baseline="central">{escape(letter)}</text>')
+    parts.append('</defs>')
+
+    parts.append(f'<rect width="100%" height="100%" fill="#{theme_colors["background"]}"/>')
+
+    if layout['title_y'] is not None:
+        parts.append(f'<text x="{center_x}" y="{layout["title_y"]}" font-size="{layout["title_size"]}" '
+                     f'font-weight="bold" text-anchor="middle" fill="#000000">{escape(title)}</text>')
+    if layout['subject_y'] is not None:
+        parts.append(f'<text x="{center_x}" y="{layout["subject_y"]}" font-size="{layout["subject_size"]}" '
+                     f'text-anchor="middle" fill="#000000">{escape(subject)}</text>')
+
+    # Answer shading, grid lines or cell outlines (one path) and letters
+    if highlight_cells:
+        parts.append(f'<g fill="#{ANSWER_HIGHLIGHT_COLOR}">')
+        for i, j in sorted(highlight_cells):
+            parts.append(f'<rect x="{left + j * cell_size}" y="{top + i * cell_size}" '
+                         f'width="{cell_size}" height="{cell_size}"/>')
+        parts.append('</g>')
+
+    outline = []
+    if shaped:
+        for i, row in enumerate(grid):
+            for j, letter in enumerate(row):
+                if letter:
+                    outline.append(f'M{left + j * cell_size} {top + i * cell_size}h{cell_size}v{cell_size}h-{cell_size}z')
+    else:
+        grid_width = layout['cols'] * cell_size
+        grid_height = layout['rows'] * cell_size
+        outline += [f'M{left} {top + i * cell_size}h{grid_width}' for i in range(layout['rows'] + 1)]
+        outline += [f'M{left + j * cell_size} {top}v{grid_height}' for j in range(layout['cols'] + 1)]
+    parts.append(f'<path d="{"".join(outline)}" fill="none" stroke="#{theme_colors["grid"]}" stroke-width="1"/>')
+
+    parts.append(f'<g font-size="{layout["letter_size"]}" fill="#{theme_colors["text"]}">')
+    half = cell_size / 2
+    for i, row in enumerate(grid):
+        for j, letter in enumerate(row):
+            if letter:
+                parts.append(f'<use xlink:href="#{glyph_ids[letter]}" '
+                             f'x="{left + j * cell_size + half}" y="{top + i * cell_size + half}"/>')
+    parts.append('</g>')
+
+    parts.append(f'<g font-size="{layout["word_size"]}" fill="#{theme_colors["text"]}">')
+    for word, x, y in get_word_positions(word_list, layout):
+        parts.append(f'<text x="{x}" y="{y}">{escape(word)}</text>')
+    parts.append('</g>')
+
+    parts.append('</svg>')
+    data = ''.join(parts).encode('utf-8')
+
+    # Paths are normalized, streams are written as-is
+    if isinstance(filename, (str, os.PathLike)):
+        with open(os.path.abspath(filename), 'wb') as svg_file:
+            svg_file.write(data)
+    else:
+        filename.write(data)
+
+@lru_cache(maxsize=None)
+def get_fallback_font_file(bold=False):
+    """First fallback font Pillow can open, or None for its built-in font."""
+    for candidate in IMAGE_FALLBACK_BOLD_FONTS if bold else IMAGE_FALLBACK_FONTS:
+        try:
+            ImageFont.truetype(candidate, 12)
+            return candidate
+        except OSError:
+            continue
+    return None
+
+def get_image_font_file(font_name, bold=False):
+    """
+    Get the font file images use for a UI font name.
+
+    Returns:
+        The bundled TTF when the family is in fonts/, else the fallback font
+        (None means Pillow's built-in font)
+    """
+    font_file = get_font_file(font_name, bold)
+    if font_file is not None:
+        return font_file
+    return get_fallback_font_file(bold)
+
+def load_image_font(font_name, size, bold=False):
+    """
+    Load (once per font file and size) a Pillow font for a UI font name.
+
+    Returns:
+        ImageFont.FreeTypeFont
+    """
+    font_file = get_image_font_file(font_name, bold)
+    key = (font_file, size)
+    font = _image_font_cache.get(key)
+    if font is not None:
+        return font
+
+    font = None
+    if font_file is not None:
+        try:
+            font = ImageFont.truetype(font_file, size)
+        except OSError:
+            # Unreadable bundled file: use the fallback
+            fallback_file = get_fallback_font_file(bold)
+            if fallback_file is not None:
+                font = ImageFont.truetype(fallback_file, size)
+    if font is None:
+        font = ImageFont.load_default(size)
+
+    _image_font_cache[key] = font
+    return font
+
+def get_glyph_atlas(font_name, size):
+    """
+    Get the glyph atlas for a font and letter size.
+
+    Every glyph is rendered once into a grayscale mask, with offsets that
+    center it horizontally in a cell and put the cap height in the middle.
+
+    Returns:
+        dict letter -> (mask, x offset, y offset); missing letters are added by get_glyph
+    """
+    key = (get_image_font_file(font_name), size)
+    atlas = _glyph_atlas_cache.get(key)
+    if atlas is None:
+        atlas = {}
+        _glyph_atlas_cache[key] = atlas
+        for letter in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ':
+            get_glyph(atlas, font_name, size, letter)
+    return atlas
+
+def get_glyph(atlas, font_name, size, letter):
+    """Get one glyph from an atlas, rendering it on first use."""
+    glyph = atlas.get(letter)
+    if glyph is not None:
+        return glyph
+
+    font = load_image_font(font_name, size)
+    left, top, right, bottom = font.getbbox(letter)
+    mask = Image.new('L', (max(1, right - left), max(1, bottom - top)), 0)
+    ImageDraw.Draw(mask).text((-left, -top), letter, fill=255, font=font)
+
+    # Vertical position from the cap height, so every letter shares one baseline
+    cap_top, cap_bottom = font.getbbox('H')[1::2]
+    x_offset = -(right - left) / 2
+    y_offset = top - (cap_top + cap_bottom) / 2
+
+    glyph = (mask, x_offset, y_offset)
+    atlas[letter] = glyph
+    return glyph
+
+def export_to_png(title, subject, grid, word_list, font_name, filename, theme='modern', shape='square',
+                  placements=None, answer_key=False, cell_size=IMAGE_CELL_SIZE):
+    """
+    Export the puzzle as a PNG image.
+
+    Grid letters are pasted from the cached glyph atlas instead of being laid
+    out and rasterized one by one.
+
+    Args:
+        title, subject, grid, word_list, font_name, theme: As for export_to_pdf
+        filename: Output path or writable binary stream
+        shape: Shape name; square grids are ruled, shaped grids outline their cells
+        placements: The generator's placements (used with answer_key)
+        answer_key: Shade the cells of every placed word
+        cell_size: Grid cell size in pixels
+    """
+    shaped = get_shape_class(shape) == 'shaped'
+    if shaped:
+        grid, placements = trim_empty_rows(grid, placements)
+    theme_colors = get_image_theme_colors(theme)
+    layout = get_image_layout(grid, word_list, cell_size, title, subject)
+    highlight_cells = get_highlight_cells(placements, answer_key)
+    left = layout['grid_left']
+    top = layout['grid_top']
+    center_x = layout['width'] / 2
+
+    image = Image.new('RGB', (layout['width'], layout['height']), f'#{theme_colors["background"]}')
+    draw = ImageDraw.Draw(image)
+
+    if layout['title_y'] is not None:
+        draw.text((center_x, layout['title_y']), title, fill='#000000', anchor='ms',
+                  font=load_image_font(font_name, layout['title_size'], bold=True))
+    if layout['subject_y'] is not None:
+        draw.text((center_x, layout['subject_y']), subject, fill='#000000', anchor='ms',
+                  font=load_image_font(font_name, layout['subject_size']))
+
+    # Answer shading, then grid lines (square grids) or cell outlines (shaped grids)
+    grid_color = f'#{theme_colors["grid"]}'
+    for i, j in highlight_cells:
+        x = left + j * cell_size
+        y = top + i * cell_size
+        draw.rectangle((x, y, x + cell_size, y + cell_size), fill=f'#{ANSWER_HIGHLIGHT_COLOR}')
+    if shaped:
+        for i, row in enumerate(grid):
+            for j, letter in enumerate(row):
+                if letter:
+                    x = left + j * cell_size
+                    y = top + i * cell_size
+                    draw.rectangle((x, y, x + cell_size, y + cell_size), outline=grid_color)
+    else:
+        right = left + layout['cols'] * cell_size
+        bottom = top + layout['rows'] * cell_size
+        for i in range(layout['rows'] + 1):
+            draw.line((left, top + i * cell_size, right, top + i * cell_size), fill=grid_color)
+        for j in range(layout['cols'] + 1):
+            draw.line((left + j * cell_size, top, left + j * cell_size, bottom), fill=grid_color)
+
+    # Letters from the glyph atlas
+    atlas = get_glyph_atlas(font_name, layout['letter_size'])
+    text_color = f'#{theme_colors["text"]}'
+    half = cell_size / 2
+    for i, row in enumerate(grid):
+        for j, letter in enumerate(row):
+            if letter:
+                mask, x_offset, y_offset = get_glyph(atlas, font_name, layout['letter_size'], letter)
+                x = round(left + j * cell_size + half + x_offset)
+                y = round(top + i * cell_size + half + y_offset)
+                image.paste(text_color, (x, y, x + mask.width, y + mask.height), mask)
+
+    word_font = load_image_font(font_name, layout['word_size'])
+    for word, x, y in get_word_positions(word_list, layout):
+        draw.text((x, y), word, fill=text_color, anchor='ls', font=word_font)
+
+    if isinstance(filename, (str, os.PathLike)):
+        filename = os.path.abspath(filename)
+    image.save(filename, format='PNG')
@@ -0,0 +1,373 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+# EXPORT JOB QUEUE
+# Heavy exports (large grids, booklets) run as background jobs instead of
+# inside the request: POST /jobs queues one and returns its id, GET /jobs/<id>
+# reports its status and progress, and the finished document is kept in the
+# database until it is downloaded or expires. Jobs are stored in a SQLite
+# file, so queued work survives a restart and every worker process on the
+# machine shares one queue without any external service.
+#
+# Each process runs at most JOB_WORKERS render threads; a worker claims the
+# oldest queued job inside a write transaction, so two workers never run the
+# same job. A job whose worker died (no progress for JOB_STALE_AFTER seconds)
+# is queued again, up to JOB_MAX_ATTEMPTS runs in total.
+#
+# Handlers report progress as a fraction plus a stage ('generating' or
+# 'rendering') with counts for that stage (words placed, or pages rendered
+# and bytes written). watch_job follows those updates for the
+# /jobs/<id>/events stream; it polls the database, since the job may be
+# running in another process, but only reads the whole job (and its queue
+# position) when the job's update time has changed.
+
+_PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+JOB_DB_PATH = os.environ.get('JOB_DB_PATH', os.path.join(_PROJECT_DIR, 'jobs.sqlite3'))
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_POLL_INTERVAL = 1.0        # seconds between queue checks when idle
+JOB_RESULT_TTL = 60 * 60       # seconds finished jobs (and their documents) are kept
+JOB_STALE_AFTER = 15 * 60      # seconds without progress before a running job is presumed dead
+JOB_MAX_ATTEMPTS = 2
+JOB_PROGRESS_INTERVAL = 0.25   # seconds between progress writes for one job (within one stage)
+JOB_WATCH_INTERVAL = 1.0       # seconds between checks for changes while watching a job
+JOB_POSITION_INTERVAL = 5.0    # seconds between queue position checks for a watched, queued job
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    stage TEXT NOT NULL DEFAULT '',
+    detail TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result BLOB,
+    result_name TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+"""
+
+# Columns added after the first release, added to existing databases on open
+_ADDED_COLUMNS = (
+    ('stage', "TEXT NOT NULL DEFAULT ''"),
+    ('detail', 'TEXT'),
+)
+
+# Public job fields (everything but the parameters and the result bytes)
+_JOB_FIELDS = ('id', 'kind', 'status', 'progress', 'message', 'stage', 'detail', 'error', 'result_name',
+               'created', 'updated')
+
+# kind -> handler(params, progress) returning (document bytes, download filename)
+_job_handlers = {}
+
+_workers = []
+_workers_lock = threading.Lock()
+_job_wakeup = threading.Event()
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+def _connect():
+    """Open a connection to the job database (one per operation; connections aren't shared between threads)."""
+    global _schema_ready
+
+    conn = sqlite3.connect(JOB_DB_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    if not _schema_ready:
+        with _schema_lock:
+            if not _schema_ready:
+                # WAL lets status polls read while a worker is writing
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.executescript(_SCHEMA)
+                columns = {row['name'] for row in conn.execute('PRAGMA table_info(jobs)')}
+                for column, definition in _ADDED_COLUMNS:
+                    if column not in columns:
+                        conn.execute(f'ALTER TABLE jobs ADD COLUMN {column} {definition}')
+                _schema_ready = True
+    return conn
+
+def register_job_handler(kind, handler):
+    """
+    Register the function that runs jobs of one kind.
+
+    Args:
+        kind: Job kind, as passed to submit_job
+        handler: Callable(params, progress) returning (bytes, filename). It
+                 reports progress by calling progress(fraction, message, stage, **counts)
+    """
+    _job_handlers[kind] = handler
+
+def submit_job(kind, params):
+    """
+    Queue a job.
+
+    Args:
+        kind: Registered job kind
+        params: JSON-serializable job parameters
+
+    Returns:
+        Job id
+    """
+    if kind not in _job_handlers:
+        raise ValueError(f'Unknown job kind: {kind}')
+
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute(
+            "INSERT INTO jobs (id, kind, params, status, created, updated) VALUES (?, ?, ?, 'queued', ?, ?)",
+            (job_id, kind, json.dumps(params, separators=(',', ':')), now, now)
+        )
+    finally:
+        conn.close()
+
+    start_job_workers()
+    _job_wakeup.set()
+    return job_id
+
+def get_job(job_id):
+    """
+    Get a job's status.
+
+    Returns:
+        dict with id, kind, status ('queued', 'running', 'done' or 'failed'),
+        progress (0-1), message, stage, detail (the stage's counts), error,
+        result_name, created, updated and, for queued jobs, position (jobs
+        ahead of it in the queue); None if unknown
+    """
+    conn = _connect()
+    try:
+        row = conn.execute(f"SELECT {', '.join(_JOB_FIELDS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['detail'] = json.loads(job['detail']) if job['detail'] else {}
+        if job['status'] == 'queued':
+            job['position'] = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created < ?", (job['created'],)
+            ).fetchone()[0]
+        return job
+    finally:
+        conn.close()
+
+def get_job_result(job_id):
+    """
+    Get a finished job's document.
+
+    Returns:
+        (bytes, filename), or None if the job is unknown or not done
+    """
+    conn = _connect()
+    try:
+        row = conn.execute(
+            "SELECT result, result_name FROM jobs WHERE id = ? AND status = 'done'", (job_id,)
+        ).fetchone()
+    finally:
+        conn.close()
+
+    if row is None:
+        return None
+    return bytes(row['result']), row['result_name']
+
+def _get_job_version(job_id):
+    """A job's status and update time (a cheap check for changes), or None if unknown."""
+    conn = _connect()
+    try:
+        row = conn.execute('SELECT status, updated FROM jobs WHERE id = ?', (job_id,)).fetchone()
+    finally:
+        conn.close()
+
+    if row is None:
+        return None
+    return row['status'], row['updated']
+
+def update_job_progress(job_id, progress, message='', stage='', detail=None):
+    """Record a running job's progress (0-1), message, stage and stage counts."""
+    conn = _connect()
+    try:
+        conn.execute(
+            "UPDATE jobs SET progress = ?, message = ?, stage = ?, detail = ?, updated = ? "
+            "WHERE id = ? AND status = 'running'",
+            (max(0.0, min(1.0, progress)), message, stage, json.dumps(detail or {}, separators=(',', ':')),
+             time.time(), job_id)
+        )
+    finally:
+        conn.close()
+
+def _finish_job(job_id, status, result=None, result_name=None, error=None):
+    # The last stage and its counts stay, so a finished job still shows e.g. the bytes written
+    conn = _connect()
+    try:
+        conn.execute(
+            "UPDATE jobs SET status = ?, progress = ?, message = '', result = ?, result_name = ?, error = ?, "
+            "updated = ? WHERE id = ? AND status = 'running'",
+            (status, 1.0 if status == 'done' else 0.0, result, result_name, error, time.time(), job_id)
+        )
+    finally:
+        conn.close()
+
+def _claim_job():
+    """
+    Take the oldest queued job (and tidy up the queue on the way).
+
+    Returns:
+        (id, kind, params) or None if the queue is empty
+    """
+    now = time.time()
+    conn = _connect()
+    try:
+        # Write lock up front, so only one worker (in any process) claims at a time
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Jobs whose worker died: retry, unless they have already had their attempts
+            stale = now - JOB_STALE_AFTER
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Job was interrupted', updated = ? "
+                "WHERE status = 'running' AND updated < ? AND attempts >= ?",
+                (now, stale, JOB_MAX_ATTEMPTS)
+            )
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', progress = 0, message = '', stage = '', detail = NULL, updated = ? "
+                "WHERE status = 'running' AND updated < ?",
+                (now, stale)
+            )
+
+            # Finished jobs (and their documents) expire
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated < ?", (now - JOB_RESULT_TTL,)
+            )
+
+            row = conn.execute(
+                "SELECT id, kind, params FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated = ? WHERE id = ?",
+                    (now, row['id'])
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+    finally:
+        conn.close()
+
+    if row is None:
+        return None
+    return row['id'], row['kind'], json.loads(row['params'])
+
+def _run_job(job_id, kind, params):
+    """Run one claimed job and store its document or error."""
+    last_write = {'time': 0.0, 'stage': None, 'pending': None}
+
+    def progress(fraction, message='', stage='', **detail):
+        # Handlers may report very often; write every new stage, but otherwise
+        # only a few times a second (keeping the latest skipped update)
+        now = time.monotonic()
+        if stage != last_write['stage'] or now - last_write['time'] >= JOB_PROGRESS_INTERVAL:
+            last_write.update(time=now, stage=stage, pending=None)
+            update_job_progress(job_id, fraction, message, stage, detail)
+        else:
+            last_write['pending'] = (fraction, message, stage, detail)
+
+    try:
+        handler = _job_handlers.get(kind)
+        if handler is None:
+            raise ValueError(f'Unknown job kind: {kind}')
+        data, filename = handler(params, progress)
+    except Exception as e:
+        _finish_job(job_id, 'failed', error=str(e))
+        return
+
+    # The final counts (e.g. every byte written) may have been skipped above
+    if last_write['pending']:
+        update_job_progress(job_id, *last_write['pending'])
+
+    _finish_job(job_id, 'done', result=data, result_name=filename)
+
+def watch_job(job_id, heartbeat=15, timeout=None):
+    """
+    Follow a job until it finishes.
+
+    Args:
+        job_id: Job id
+        heartbeat: Seconds without a change after which None is yielded (to keep a stream alive)
+        timeout: Stop after this many seconds, even if the job is still running
+
+    Yields:
+        The job (as get_job returns it) whenever it changes, ending with its
+        final state; None as a heartbeat
+    """
+    started = last_change = last_read = time.monotonic()
+    last_version = last_state = None
+    while True:
+        version = _get_job_version(job_id)
+        if version is None:
+            return
+
+        # Every progress write bumps the update time; a queued job's position
+        # changes without one, so that is re-read now and then instead
+        now = time.monotonic()
+        status = version[0]
+        changed = False
+        if version != last_version or (status == 'queued' and now - last_read >= JOB_POSITION_INTERVAL):
+            job = get_job(job_id)
+            if job is None:
+                return
+            last_version, last_read, status = version, now, job['status']
+            state = (job['status'], job['progress'], job['message'], job['stage'], job['detail'],
+                     job.get('position'))
+            if state != last_state:
+                last_state = state
+                changed = True
+
+        if changed:
+            last_change = now
+            yield job
+        elif now - last_change >= heartbeat:
+            last_change = now
+            yield None
+
+        if status in ('done', 'failed'):
+            return
+        if timeout is not None and now - started >= timeout:
+            return
+        time.sleep(JOB_WATCH_INTERVAL)
+
+def _job_worker():
+    """Worker thread: run queued jobs one at a time, forever."""
+    while True:
+        try:
+            job = _claim_job()
+        except sqlite3.Error as e:
+            print(f"Error claiming job: {e}")
+            job = None
+
+        if job is None:
+            # Idle until a job is submitted here (or another process may have queued one)
+            _job_wakeup.wait(JOB_POLL_INTERVAL)
+            _job_wakeup.clear()
+            continue
+
+        try:
+            _run_job(*job)
+        except sqlite3.Error as e:
+            print(f"Error recording job {job[0]}: {e}")
+
+def start_job_workers():
+    """Start this process's job worker threads (once)."""
+    with _workers_lock:
+        while len(_workers) < JOB_WORKERS:
+            worker = threading.Thread(target=_job_worker, name=f'export-job-{len(_workers)}', daemon=True)
+            worker.start()
+            _workers.append(worker)
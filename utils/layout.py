@@ -0,0 +1,207 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+from reportlab.lib.units import inch
+
+# PAGE LAYOUT PLANS
+# All page geometry for a puzzle page (margins, column widths, cell size, font
+# sizes and spacing) is computed here once per
+# (shape class, grid dimensions, page size, word count bucket) and shared by
+# the PDF and Word exporters. PDF values are in points, Word values in inches
+# (lengths) and points (font sizes). To support another page size, pass it to
+# get_layout_plan; widths are derived from the page size and margins.
+
+# Default 6.5" x 9" page, in points
+DEFAULT_PAGE_SIZE = (6.5*inch, 9*inch)
+
+# PDF page margins per shape class: (left, right, top, bottom)
+PDF_MARGINS = {
+    'square': (0.5*inch, 0.75*inch, 1.5*inch, 1.5*inch),  # Room for the footer instructions
+    'shaped': (0.5*inch, 0.5*inch, 0.5*inch, 1.0*inch),   # Equal left/right margins like the Word version
+}
+
+# Word page margins per shape class, in inches: (left, right, top, bottom)
+DOCX_MARGINS = {
+    'square': (0.25, 0.375, 1.5, 1.0),  # Reduced left/right margins (50% of the PDF's)
+    'shaped': (0.3, 0.3, 0.3, 0.3),     # Minimal margins for maximum word list space
+}
+
+# Word count buckets: longer word lists get tighter word list rows so they still
+# fit on one page next to the grid. Limits are the most words each bucket fits
+# on a page with a title and subject.
+WORD_COUNT_BUCKETS = {
+    'square': (13, 17, 24),
+    'shaped': (20, 27, 38),
+}
+
+# PDF word list rows per (shape class, bucket): (word size, leading, cell padding above and below)
+# Each word row is leading + 2 * padding points tall
+PDF_WORD_LIST_METRICS = {
+    ('square', 0): (16, 12, 3),
+    ('square', 1): (14, 12, 1),
+    ('square', 2): (11, 10, 0),
+    ('shaped', 0): (14, 12, 3),
+    ('shaped', 1): (12, 12, 1),
+    ('shaped', 2): (11, 10, 0),
+}
+
+@dataclass(frozen=True)
+class LayoutPlan:
+    """Geometry of one puzzle page, shared by the PDF and Word exporters."""
+    shape_class: str
+    rows: int
+    cols: int
+    page_size: tuple
+    word_bucket: int
+
+    # PDF (points)
+    pdf_margins: tuple        # (left, right, top, bottom)
+    pdf_wordlist_width: float
+    pdf_puzzle_width: float
+    pdf_cell_size: float
+    pdf_letter_size: int
+    pdf_header_size: int
+    pdf_word_size: int
+    pdf_word_leading: int
+    pdf_word_padding: int
+    pdf_subject_space_before: int
+    pdf_top_space: int       # Above the title
+    pdf_content_space: int   # Between the title and the word list / grid
+    pdf_bottom_space: int    # After the word list / grid
+
+    # Word (inches for lengths, points for font sizes)
+    docx_margins: tuple       # (left, right, top, bottom)
+    docx_wordlist_width: float
+    docx_spacer_width: float
+    docx_puzzle_width: float
+    docx_cell_size: float
+    docx_letter_size: int
+    docx_space_after: int
+
+def get_word_count_bucket(shape_class, word_count):
+    """Bucket a word count for layout purposes (0 = short list)."""
+    limits = WORD_COUNT_BUCKETS[shape_class]
+    for bucket, limit in enumerate(limits):
+        if word_count <= limit:
+            return bucket
+    # Longer lists use the tightest rows (and may still run onto another page)
+    return len(limits) - 1
+
+def get_shape_class(shape):
+    """Square puzzles and shaped puzzles use different page layouts."""
+    return 'square' if shape == 'square' else 'shaped'
+
+def get_pdf_margins(shape_class):
+    """Get the PDF page margins as SimpleDocTemplate keyword arguments."""
+    left, right, top, bottom = PDF_MARGINS[shape_class]
+    return {'leftMargin': left, 'rightMargin': right, 'topMargin': top, 'bottomMargin': bottom}
+
+@lru_cache(maxsize=256)
+def get_layout_plan(shape_class, rows, cols, page_size=DEFAULT_PAGE_SIZE, word_bucket=0):
+    """
+    Compute (once) the page geometry for a grid.
+
+    Args:
+        shape_class: 'square' or 'shaped'
+        rows: Grid rows
+        cols: Grid columns
+        page_size: (width, height) in points
+        word_bucket: Result of get_word_count_bucket
+
+    Returns:
+        LayoutPlan
+    """
+    pdf_margins = PDF_MARGINS[shape_class]
+    docx_margins = DOCX_MARGINS[shape_class]
+    available_width = page_size[0] - pdf_margins[0] - pdf_margins[1]
+    word_size, word_leading, word_padding = PDF_WORD_LIST_METRICS[(shape_class, word_bucket)]
+
+    if shape_class == 'square':
+        # Grid takes everything but a minimum word list width; the word list gets the rest
+        min_wordlist_width = 2.0*inch
+        cell_size = (available_width - min_wordlist_width) / rows
+        puzzle_width = rows * cell_size
+        return LayoutPlan(
+            shape_class, rows, cols, page_size, word_bucket,
+            pdf_margins=pdf_margins,
+            pdf_wordlist_width=available_width - puzzle_width,
+            pdf_puzzle_width=puzzle_width,
+            pdf_cell_size=cell_size,
+            pdf_letter_size=20,
+            pdf_header_size=20,
+            pdf_word_size=word_size,
+            pdf_word_leading=word_leading,
+            pdf_word_padding=word_padding,
+            pdf_subject_space_before=0,
+            pdf_top_space=20,
+            pdf_content_space=40,
+            pdf_bottom_space=20,
+            docx_margins=docx_margins,
+            docx_wordlist_width=2.5,
+            docx_spacer_width=0.4,    # Double spacing between the columns
+            docx_puzzle_width=2.35,
+            docx_cell_size=0.22,
+            docx_letter_size=20,
+            docx_space_after=3
+        )
+
+    # Shaped grids: narrow word list, a small gap, and the rest for the (larger) cells
+    wordlist_width = 1.8*inch
+    puzzle_width = available_width - wordlist_width - 0.2*inch
+    return LayoutPlan(
+        shape_class, rows, cols, page_size, word_bucket,
+        pdf_margins=pdf_margins,
+        pdf_wordlist_width=wordlist_width,
+        pdf_puzzle_width=puzzle_width,
+        pdf_cell_size=puzzle_width / rows,
+        pdf_letter_size=17,
+        pdf_header_size=16,
+        pdf_word_size=word_size,
+        pdf_word_leading=word_leading,
+        pdf_word_padding=word_padding,
+        pdf_subject_space_before=12,  # Extra space above the subject for shaped pages
+        pdf_top_space=10,
+        pdf_content_space=20,
+        pdf_bottom_space=10,
+        docx_margins=docx_margins,
+        docx_wordlist_width=5.1,      # Wide word list for large-print readability
+        docx_spacer_width=0.15,
+        docx_puzzle_width=0.65,
+        docx_cell_size=0.18,          # Smaller cells to keep shaped pages on one page
+        docx_letter_size=12,
+        docx_space_after=2
+    )
+
+def plan_puzzle_layout(grid, shape='square', word_count=0, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Get the layout plan for a puzzle.
+
+    Args:
+        grid: Puzzle grid
+        shape: Shape name
+        word_count: Number of words in the word list
+        page_size: (width, height) in points
+
+    Returns:
+        LayoutPlan
+    """
+    shape_class = get_shape_class(shape)
+    rows = len(grid)
+    cols = len(grid[0]) if grid else 0
+    return get_layout_plan(shape_class, rows, cols, page_size, get_word_count_bucket(shape_class, word_count))
+
+# BOOKLET PAGES
+# A booklet or workbook is a flat list of page dicts (a puzzle, or its answer
+# key with answer_key=True), shared by the PDF and Word booklet exporters.
+
+def get_answer_key_title(title):
+    """Title for a puzzle's solution page."""
+    return f"{title} - Answer Key" if title else "Answer Key"
+
+def get_booklet_pages(puzzles, answer_keys=False):
+    """List a booklet's pages in order: every puzzle, then (optionally) every answer key."""
+    pages = list(puzzles)
+    if answer_keys:
+        pages += [dict(puzzle, title=get_answer_key_title(puzzle.get('title', '')), answer_key=True)
+                  for puzzle in puzzles]
+    return pages
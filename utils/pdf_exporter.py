@@ -1,16 +1,70 @@
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.units import inch
 from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import (SimpleDocTemplate, BaseDocTemplate, PageTemplate, Frame, NextPageTemplate,
+                                PageBreak, Paragraph, Spacer, Table, TableStyle, Flowable)
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from reportlab.pdfgen import canvas
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import io
+import math
 import os
+import re
+from .font_registry import get_pdf_font, get_pdf_bold_font
+from .layout import (DEFAULT_PAGE_SIZE, get_shape_class, get_pdf_margins, plan_puzzle_layout, get_booklet_pages,
+                     get_answer_key_title)
 
 # Custom page size for 6.5" x 9"
-CUSTOM_PAGE_SIZE = (6.5*inch, 9*inch)
+CUSTOM_PAGE_SIZE = DEFAULT_PAGE_SIZE
 
-def export_to_pdf(title, subject, grid, word_list, font_name, filename, theme='modern', shape='square'):
+# Pages rendered per worker task by export_booklet_pdf_parallel
+BOOKLET_SHARD_PAGES = 25
+
+# Footer instructions (11pt, black)
+INSTRUCTION_FONT_SIZE = 11
+SQUARE_INSTRUCTIONS = [
+    "Find all the words hidden in the puzzle above.",
+    "Circle or highlight each word as you find it.",
+    "Words can be read horizontally, vertically, or diagonally."
+]
+SHAPED_INSTRUCTION_TEXT = "Find all the words hidden in the puzzle above, circle or highlight each word as you find it. Note: Words may be read horizontally, vertically, or diagonally."
+
+# Wrapped footer runs, keyed by (shape class, font, size, width); see get_footer_instruction_layout
+_footer_layout_cache = {}
+
+# Paragraph and table styles built once per process, keyed by (style name, font, colors, variant)
+_style_cache = {}
+_style_cache_stats = {'hits': 0, 'misses': 0}
+
+def get_cached_style(key, factory):
+    """
+    Get a precompiled style, building it with factory() on first use.
+    
+    Args:
+        key: Hashable cache key; starts with the style name and includes every
+             font/color/size input the style depends on
+        factory: Zero-argument callable that builds the ParagraphStyle or TableStyle
+    
+    Returns:
+        The cached style object (shared, do not modify)
+    """
+    style = _style_cache.get(key)
+    if style is None:
+        _style_cache_stats['misses'] += 1
+        style = factory()
+        _style_cache[key] = style
+    else:
+        _style_cache_stats['hits'] += 1
+    return style
+
+def get_style_cache_stats():
+    """Get hit/miss counts and size of the style cache."""
+    return dict(_style_cache_stats, size=len(_style_cache))
+
+def export_to_pdf(title, subject, grid, word_list, font_name, filename, theme='modern', shape='square',
+                  placements=None, answer_key=False):
     """
     Export puzzle to PDF with improved formatting for 6.5" x 9" page.
     
@@ -21,75 +75,254 @@ def export_to_pdf(title, subject, grid, word_list, font_name, filename, theme='m
     - Increased word list column width for longer words
     - Centered content on page
     - Maintained color scheme: blue titles, light blue subtitles, black text
+    
+    With answer_key=True and the generator's placements, a second page shows
+    the solution with every placed word outlined.
+    
+    filename may be a path or a writable binary stream (e.g. BytesIO).
     """
     
     # Map non-standard fonts to PDF-compatible fonts
-    font_mapping = {
-        'Inter': 'Helvetica',
-        'Inter (Modern)': 'Helvetica'
-    }
-    font_name = font_mapping.get(font_name, font_name)
+    font_name = map_pdf_font(font_name)
     
     # Theme colors
     theme_colors = get_theme_colors(theme)
     
-    # Normalize path to handle Windows paths with spaces
-    normalized_path = os.path.abspath(filename)
-    print(f"DEBUG pdf_exporter: Attempting to save to: {normalized_path}")
-    print(f"DEBUG pdf_exporter: Directory exists: {os.path.exists(os.path.dirname(normalized_path))}")
+    # Normalize path to handle Windows paths with spaces (streams are written as-is)
+    if isinstance(filename, (str, os.PathLike)):
+        filename = os.path.abspath(filename)
+        print(f"DEBUG pdf_exporter: Attempting to save to: {filename}")
+        print(f"DEBUG pdf_exporter: Directory exists: {os.path.exists(os.path.dirname(filename))}")
     
     # Create PDF document with custom 6.5" x 9" page size and conditional margins
-    if shape == 'square':
-        # Square shape: 1.5" header, 0.5" left, 0.75" right, 1.5" footer margins (space for instructions)
-        doc = SimpleDocTemplate(
-            normalized_path,
-            pagesize=CUSTOM_PAGE_SIZE,
-            leftMargin=0.5*inch,   # 0.5" left margin
-            rightMargin=0.75*inch,  # 0.75" right margin
-            topMargin=1.5*inch,    # 1.5" top margin
-            bottomMargin=1.5*inch  # 1.5" bottom margin (increased for footer instructions)
-        )
-    else:
-        # Non-square shapes: equal left and right margins like Word version
-        doc = SimpleDocTemplate(
-            normalized_path,
-            pagesize=CUSTOM_PAGE_SIZE,
-            leftMargin=0.5*inch,   # Equal left margin
-            rightMargin=0.5*inch,  # Equal right margin (matching left)
-            topMargin=0.5*inch,    # Reduced top margin for more space
-            bottomMargin=1.0*inch  # Increased bottom margin for footer instructions
+    doc = SimpleDocTemplate(
+        filename,
+        pagesize=CUSTOM_PAGE_SIZE,
+        **get_page_margins(shape)
+    )
+    
+    story = build_puzzle_story(title, subject, grid, word_list, font_name, theme_colors, shape)
+    
+    # Solution page, drawn from the placement data (no search over the grid)
+    if answer_key and placements:
+        story.append(PageBreak())
+        story.extend(build_puzzle_story(get_answer_key_title(title), subject, grid, word_list,
+                                        font_name, theme_colors, shape, placements))
+    
+    # Build PDF with white background and footer (footer forms are defined once per document)
+    defined_forms = set()
+    
+    def add_background_and_footer(canvas, doc):
+        draw_page_decorations(canvas, doc, font_name, theme_colors, shape, defined_forms)
+    
+    doc.build(story, onFirstPage=add_background_and_footer, onLaterPages=add_background_and_footer)
+
+def export_booklet_pdf(puzzles, font_name, filename, theme='modern', answer_keys=False, progress=None):
+    """
+    Export many puzzles into one PDF booklet, one puzzle per page.
+    
+    Fonts and styles are shared by every page, and the footer instructions are
+    stored once per shape class as a reusable form instead of once per page.
+    
+    Args:
+        puzzles: List of dicts with 'title', 'subject', 'grid', 'words', 'shape'
+                 and (for answer keys) the generator's 'placements'
+        font_name: Font for all pages
+        filename: Output path or writable binary stream
+        theme: Color theme
+        answer_keys: Whether to append an answer-key page for every puzzle
+        progress: Optional callback(pages_rendered, total_pages), called as each page is finished
+    """
+    if not puzzles:
+        raise ValueError('No puzzles to export')
+    
+    render_booklet_pages(get_booklet_pages(puzzles, answer_keys), font_name, filename, theme, progress)
+
+def export_booklet_pdf_parallel(puzzles, font_name, filename, theme='modern', answer_keys=False,
+                                workers=None, shard_pages=BOOKLET_SHARD_PAGES, progress=None, executor=None):
+    """
+    Export a large booklet by rendering contiguous page ranges in worker processes
+    and merging the finished shards (pages are copied, not re-rendered).
+    
+    Args:
+        puzzles: Same as export_booklet_pdf
+        font_name: Font for all pages
+        filename: Output path or writable binary stream
+        theme: Color theme
+        answer_keys: Whether to append an answer-key page for every puzzle
+        workers: Worker processes (defaults to the CPU count)
+        shard_pages: Pages rendered by each worker task
+        progress: Optional callback(pages_rendered, total_pages), called as each shard finishes
+        executor: Optional long-lived ProcessPoolExecutor to render the shards in
+                  (workers is then ignored); by default a pool is started for this call
+    """
+    if not puzzles:
+        raise ValueError('No puzzles to export')
+    
+    pages = get_booklet_pages(puzzles, answer_keys)
+    shards = [pages[start:start + shard_pages] for start in range(0, len(pages), shard_pages)]
+    
+    # Small booklets aren't worth the process start-up cost
+    if len(shards) == 1 or (workers == 1 and executor is None):
+        render_booklet_pages(pages, font_name, filename, theme, progress)
+        return
+    
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    
+    shard_data = [None] * len(shards)
+    pages_rendered = 0
+    try:
+        futures = {executor.submit(render_booklet_shard, shard, font_name, theme): index
+                   for index, shard in enumerate(shards)}
+        for future in as_completed(futures):
+            index = futures[future]
+            shard_data[index] = future.result()
+            pages_rendered += len(shards[index])
+            if progress:
+                progress(pages_rendered, len(pages))
+    finally:
+        # A shared pool stays up for the next booklet
+        if own_executor:
+            executor.shutdown()
+    
+    merge_pdf_shards(shard_data, filename)
+
+def render_booklet_shard(pages, font_name, theme):
+    """Render one contiguous page range in a worker process and return the PDF bytes."""
+    buffer = io.BytesIO()
+    render_booklet_pages(pages, font_name, buffer, theme)
+    return buffer.getvalue()
+
+def merge_pdf_shards(shard_data, filename):
+    """Concatenate rendered PDF shards into one document."""
+    from pypdf import PdfReader, PdfWriter
+    
+    writer = PdfWriter()
+    for data in shard_data:
+        writer.append(PdfReader(io.BytesIO(data)))
+    
+    if isinstance(filename, (str, os.PathLike)):
+        filename = os.path.abspath(filename)
+    writer.write(filename)
+
+def render_booklet_pages(pages, font_name, filename, theme='modern', progress=None):
+    """
+    Render a list of booklet pages (see get_booklet_pages) into one PDF.
+    
+    progress, if given, is called as progress(pages_rendered, total_pages) as each page is finished.
+    """
+    font_name = map_pdf_font(font_name)
+    theme_colors = get_theme_colors(theme)
+    
+    # Footer forms already defined in this document, shared by both page templates
+    defined_forms = set()
+    
+    # One page template per shape class, since square and shaped pages use different margins
+    def make_page_template(shape):
+        margins = get_page_margins(shape)
+        frame = Frame(
+            margins['leftMargin'],
+            margins['bottomMargin'],
+            CUSTOM_PAGE_SIZE[0] - margins['leftMargin'] - margins['rightMargin'],
+            CUSTOM_PAGE_SIZE[1] - margins['topMargin'] - margins['bottomMargin'],
+            id='normal'
         )
+        
+        def add_background_and_footer(canvas, doc):
+            draw_page_decorations(canvas, doc, font_name, theme_colors, shape, defined_forms)
+        
+        return PageTemplate(id=get_shape_class(shape), frames=[frame], onPage=add_background_and_footer)
+    
+    # The first page uses the first template, so list the first puzzle's shape class first
+    first_shape = pages[0].get('shape', 'square')
+    other_shape = 'circle' if get_shape_class(first_shape) == 'square' else 'square'
+    if isinstance(filename, (str, os.PathLike)):
+        filename = os.path.abspath(filename)
+    
+    doc = BaseDocTemplate(
+        filename,
+        pagesize=CUSTOM_PAGE_SIZE,
+        pageTemplates=[make_page_template(first_shape), make_page_template(other_shape)]
+    )
+    
+    # The page break before page n means n pages are finished
+    page_breaks = {}
+    
+    story = []
+    for index, puzzle in enumerate(pages):
+        shape = puzzle.get('shape', 'square')
+        if index > 0:
+            page_break = PageBreak()
+            page_breaks[id(page_break)] = index
+            story.append(NextPageTemplate(get_shape_class(shape)))
+            story.append(page_break)
+        story.extend(build_puzzle_story(
+            puzzle.get('title', ''),
+            puzzle.get('subject', ''),
+            puzzle['grid'],
+            puzzle.get('words', []),
+            font_name,
+            theme_colors,
+            shape,
+            puzzle.get('placements') if puzzle.get('answer_key') else None
+        ))
+    
+    if progress:
+        def report_page_break(flowable):
+            pages_rendered = page_breaks.get(id(flowable))
+            if pages_rendered:
+                progress(pages_rendered, len(pages))
+        
+        doc.afterFlowable = report_page_break
     
-    # Get styles
-    styles = getSampleStyleSheet()
+    doc.build(story)
+    
+    if progress:
+        progress(len(pages), len(pages))
+
+def map_pdf_font(font_name):
+    """Map a UI font to a bundled TTF family or the closest PDF base font."""
+    return get_pdf_font(font_name)
+
+def get_page_margins(shape):
+    """Get the page margins for a puzzle page (see utils/layout.py)."""
+    return get_pdf_margins(get_shape_class(shape))
+
+def build_puzzle_story(title, subject, grid, word_list, font_name, theme_colors, shape='square', placements=None):
+    """
+    Build the flowables for one puzzle page (title, subject, word list and grid).
+    Passing placements outlines every placed word, for answer-key pages.
+    """
+    
+    # Page geometry, computed once per shape class / grid size / word count bucket
+    plan = plan_puzzle_layout(grid, shape, len(word_list), CUSTOM_PAGE_SIZE)
     
     # Create puzzle table and word list
-    puzzle_table = create_puzzle_table(grid, font_name, theme_colors, shape)
-    word_list_table = create_word_list_table(word_list, font_name, theme_colors, shape, grid)
+    puzzle_table = create_puzzle_table(grid, font_name, theme_colors, shape, placements, plan)
+    word_list_table = create_word_list_table(word_list, font_name, theme_colors, shape, grid, plan)
     
     # Create title and subject paragraphs for centering on page
     title_para = None
     subject_para = None
     
     if title:
-        title_style = ParagraphStyle(
+        title_style = get_cached_style(('CustomTitle', font_name), lambda: ParagraphStyle(
             'CustomTitle',
             fontSize=20,  # Match puzzle letters: 17pt → 20pt
             textColor=colors.black,  # Black color
             fontName=font_name,
             alignment=TA_CENTER,
             spaceAfter=6
-        )
+        ))
         title_para = Paragraph(f"<b>{title}</b>", title_style)
     
     if subject:
-        # Conditional spacing based on shape type
-        if shape == 'square':
-            space_before = 0  # No extra spacing for square shapes
-        else:
-            space_before = 12  # Additional spacing above subject/topic for non-square shapes
-            
-        subject_style = ParagraphStyle(
+        # Conditional spacing based on shape type (extra space above the subject on shaped pages)
+        space_before = plan.pdf_subject_space_before
+        
+        subject_style = get_cached_style(('CustomSubject', font_name, space_before), lambda: ParagraphStyle(
             'CustomSubject',
             fontSize=16,  # Set to 16pt as requested
             textColor=colors.black,  # Black color
@@ -97,53 +330,27 @@ def export_to_pdf(title, subject, grid, word_list, font_name, filename, theme='m
             alignment=TA_CENTER,
             spaceAfter=8,
             spaceBefore=space_before  # Conditional spacing above subject/topic
-        )
+        ))
         subject_para = Paragraph(subject, subject_style)
     
     # Create centered puzzle table (no titles - they're on the page)
-    if shape == 'square':
-        # For square shapes: calculate width based on optimized cell size
-        grid_size = len(grid)
-        available_width = 5.25*inch  # 6.5" - 1.25" margins
-        min_wordlist_width = 2.0*inch  # Reduced minimum wordlist width to maximize puzzle
-        max_puzzle_width = available_width - min_wordlist_width  # 3.25" max puzzle width
-        cell_size = max_puzzle_width / grid_size  # Dynamic cell size
-        puzzle_width = grid_size * cell_size  # Calculate actual puzzle width
-    else:
-        # Non-square shapes: calculate width to fit properly with word list (equal margins)
-        available_width = 5.5*inch  # 6.5" - 1.0" margins (0.5" left + 0.5" right)
-        wordlist_width = 1.8*inch   # Further reduced word list width for 2X larger puzzle cells
-        puzzle_width = available_width - wordlist_width - 0.2*inch  # 3.5" for puzzle with gap
-    
-    centered_puzzle_table = Table([[puzzle_table]], colWidths=[puzzle_width])
-    centered_puzzle_table.setStyle(TableStyle([
+    centered_puzzle_table = Table([[puzzle_table]], colWidths=[plan.pdf_puzzle_width])
+    centered_puzzle_table.setStyle(get_cached_style(('CenteredPuzzleTable',), lambda: TableStyle([
         ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
         ('VALIGN', (0, 0), (-1, -1), 'TOP'),
         ('TOPPADDING', (0, 0), (-1, -1), 0),  # Remove top padding
         ('BOTTOMPADDING', (0, 0), (-1, -1), 0), # Remove bottom padding
         ('LEFTPADDING', (0, 0), (-1, -1), 0),  # Remove left padding
         ('RIGHTPADDING', (0, 0), (-1, -1), 0), # Remove right padding
-    ]))
+    ])))
     
-    # Combine word list and puzzle with conditional column widths
-    if shape == 'square':
-        # Square shape: calculate wordlist width to center content
-        available_width = 5.25*inch  # 6.5" - 1.25" margins
-        wordlist_width = available_width - puzzle_width
-        main_table = Table([
-            [word_list_table, centered_puzzle_table]
-        ], colWidths=[wordlist_width, puzzle_width])
-    else:
-        # Non-square shapes: optimized sizing to prevent overlap (equal margins)
-        available_width = 5.5*inch  # 6.5" - 1.0" margins (0.5" left + 0.5" right)
-        wordlist_width = 1.8*inch   # Further reduced word list width for 2X larger puzzle cells
-        puzzle_width = available_width - wordlist_width - 0.2*inch  # 3.5" for puzzle with gap
-        main_table = Table([
-            [word_list_table, centered_puzzle_table]
-        ], colWidths=[wordlist_width, puzzle_width])
+    # Combine word list and puzzle (column widths come from the layout plan)
+    main_table = Table([
+        [word_list_table, centered_puzzle_table]
+    ], colWidths=[plan.pdf_wordlist_width, plan.pdf_puzzle_width])
     
     # Style the main table - better alignment for grid container
-    main_table.setStyle(TableStyle([
+    main_table.setStyle(get_cached_style(('MainTable', theme_colors['background'].hexval()), lambda: TableStyle([
         ('ALIGN', (0, 0), (-1, -1), 'LEFT'),   # Left align the entire table
         ('VALIGN', (0, 0), (-1, -1), 'TOP'),
         ('ALIGN', (0, 0), (0, 0), 'LEFT'),   # Word list left-aligned within its column
@@ -151,16 +358,13 @@ def export_to_pdf(title, subject, grid, word_list, font_name, filename, theme='m
         ('BACKGROUND', (0, 0), (-1, -1), theme_colors['background']),  # Ensure white background
         ('TOPPADDING', (0, 0), (-1, -1), 0),  # Remove top padding from main table
         ('BOTTOMPADDING', (0, 0), (-1, -1), 0), # Remove bottom padding from main table
-    ]))
+    ])))
     
     # Build content
     story = []
     
     # Add space at the top to push content down (optimized for page fit)
-    if shape == 'square':
-        story.append(Spacer(1, 20))
-    else:
-        story.append(Spacer(1, 10))  # Less space for non-square shapes
+    story.append(Spacer(1, plan.pdf_top_space))
     
     # Add title and subject to page (centered)
     if title_para:
@@ -169,65 +373,137 @@ def export_to_pdf(title, subject, grid, word_list, font_name, filename, theme='m
         story.append(subject_para)
     
     # Add space between title and main content (optimized for page fit)
-    if shape == 'square':
-        story.append(Spacer(1, 40))
-    else:
-        story.append(Spacer(1, 20))  # Less space for non-square shapes
+    story.append(Spacer(1, plan.pdf_content_space))
     
     # Add the main table (word list + puzzle)
     story.append(main_table)
     
     # Add space after the main content (optimized for page fit)
-    if shape == 'square':
-        story.append(Spacer(1, 20))
-    else:
-        story.append(Spacer(1, 10))  # Less space for non-square shapes
+    story.append(Spacer(1, plan.pdf_bottom_space))
     
-    # Instructions formatted to match Word document
-    if shape != 'square':
-        # For non-square shapes: instructions will be added to footer via canvas
-        pass  # Instructions added via footer canvas function
+    return story
+
+def draw_page_decorations(canvas, doc, font_name, theme_colors, shape, defined_forms):
+    """Draw the white page background and the footer instructions (see draw_footer_instructions)."""
+    canvas.setFillColor(colors.white)
+    canvas.rect(0, 0, CUSTOM_PAGE_SIZE[0], CUSTOM_PAGE_SIZE[1], fill=1, stroke=0)
     
-    # Build PDF with white background and footer
-    def add_background_and_footer(canvas, doc):
-        canvas.setFillColor(colors.white)
-        canvas.rect(0, 0, CUSTOM_PAGE_SIZE[0], CUSTOM_PAGE_SIZE[1], fill=1, stroke=0)
-        
-        # Add footer instructions for both shapes
+    # Add footer instructions for both shapes
+    draw_footer_instructions(canvas, doc, font_name, theme_colors, shape, defined_forms)
+
+def draw_footer_instructions(canvas, doc, font_name, theme_colors, shape, defined_forms):
+    """
+    Draw the footer instructions from a form defined once per document.
+    
+    The first page of each shape class records the instructions as a PDF form
+    (Form XObject); every page then just places that form. The wrapped text
+    itself is cached per process by get_footer_instruction_layout.
+    
+    defined_forms is the set of form names already defined in this document;
+    the caller creates one per document build and passes it to every page.
+    """
+    form_name = re.sub(r'[^A-Za-z0-9]', '', f"Instructions{get_shape_class(shape)}{font_name}")
+    
+    if form_name not in defined_forms:
+        # Keep the page's graphics state out of the form and vice versa
+        canvas.saveState()
+        canvas.beginForm(form_name)
         if shape == 'square':
             add_instructions_to_pdf_footer(canvas, doc, font_name, theme_colors)
         else:
             # Add footer instructions for non-square shapes
             add_instructions_to_pdf_footer_for_non_square(canvas, doc, font_name, theme_colors)
+        canvas.endForm()
+        canvas.restoreState()
+        defined_forms.add(form_name)
     
-    doc.build(story, onFirstPage=add_background_and_footer, onLaterPages=add_background_and_footer)
+    canvas.doForm(form_name)
 
-def add_instructions_to_pdf_footer(canvas, doc, font_name, theme_colors):
-    """Add instructions to the actual PDF footer using canvas drawing."""
+def get_footer_instruction_layout(shape_class, font_name, font_size=INSTRUCTION_FONT_SIZE, available_width=None):
+    """
+    Lay out the footer instructions once per (shape class, font, size, width).
+    
+    Args:
+        shape_class: 'square' (fixed lines) or 'shaped' (wrapped paragraph)
+        font_name: Regular PDF font
+        font_size: Instruction font size
+        available_width: Text width for wrapping (shaped pages only)
     
-    # Set font and color
-    canvas.setFont(font_name, 11)  # Keep instructions at 11pt
+    Returns:
+        Tuple of (x offset, y offset, font, text) runs relative to the label
+    """
+    key = (shape_class, font_name, font_size, available_width)
+    layout = _footer_layout_cache.get(key)
+    if layout is not None:
+        return layout
+    
+    if shape_class == 'square':
+        # Title plus one instruction per line (left-aligned, 12pt apart)
+        runs = [(0, 0, font_name, "Instructions:")]
+        for i, instruction in enumerate(SQUARE_INSTRUCTIONS):
+            runs.append((0, -(i + 1) * 12, font_name, instruction))
+    else:
+        bold_font = get_pdf_bold_font(font_name)
+        runs = [(0, 0, bold_font, "Instructions:")]
+        
+        # Wrap the paragraph, leaving room for the bold label
+        label_width = stringWidth("Instructions:", bold_font, font_size)
+        max_width = available_width - label_width - 10
+        lines = []
+        current_line = ""
+        for word in SHAPED_INSTRUCTION_TEXT.split():
+            prefix = current_line + (" " if current_line else "")
+            if word == "Note:":
+                # "Note:" is drawn bold
+                test_width = stringWidth(prefix, font_name, font_size) + stringWidth(word, bold_font, font_size)
+            else:
+                test_width = stringWidth(prefix + word, font_name, font_size)
+            if test_width > max_width:
+                if current_line:
+                    lines.append(current_line)
+                current_line = word
+            else:
+                current_line = prefix + word
+        if current_line:
+            lines.append(current_line)
+        
+        # Split lines into regular and bold runs (13pt line spacing)
+        for i, line in enumerate(lines):
+            y_offset = -(i + 1) * 13
+            if "Note:" not in line:
+                runs.append((0, y_offset, font_name, line))
+                continue
+            
+            before, _, after = line.partition("Note:")
+            x_offset = 0
+            if before:
+                runs.append((x_offset, y_offset, font_name, before))
+                x_offset += stringWidth(before, font_name, font_size)
+            runs.append((x_offset, y_offset, bold_font, "Note:"))
+            x_offset += stringWidth("Note:", bold_font, font_size)
+            if after:
+                runs.append((x_offset, y_offset, font_name, after))
+    
+    layout = tuple(runs)
+    _footer_layout_cache[key] = layout
+    return layout
+
+def draw_instruction_layout(canvas, layout, x, y, font_size=INSTRUCTION_FONT_SIZE):
+    """Draw pre-laid-out instruction runs with the label at (x, y)."""
     canvas.setFillColor(colors.black)  # Black color
+    for x_offset, y_offset, run_font, text in layout:
+        canvas.setFont(run_font, font_size)
+        canvas.drawString(x + x_offset, y + y_offset, text)
+
+def add_instructions_to_pdf_footer(canvas, doc, font_name, theme_colors):
+    """Add instructions to the actual PDF footer using canvas drawing."""
     
     # Calculate footer position (bottom margin is 1.5", so start at 1.7" from bottom)
     footer_y = 1.7 * inch
     left_margin = 0.5 * inch
     
-    # Instructions title
-    canvas.drawString(left_margin, footer_y, "Instructions:")
-    
-    # Instruction lines (left-aligned, no spacing between sentences)
-    instructions = [
-        "Find all the words hidden in the puzzle above.",
-        "Circle or highlight each word as you find it.",
-        "Words can be read horizontally, vertically, or diagonally."
-    ]
-    
-    # Draw each instruction line
-    line_height = 12  # 12 points between lines
-    for i, instruction in enumerate(instructions):
-        y_position = footer_y - (i + 1) * line_height
-        canvas.drawString(left_margin, y_position, instruction)
+    layout = get_footer_instruction_layout('square', font_name)
+    draw_instruction_layout(canvas, layout, left_margin, footer_y)
 
 def add_instructions_to_pdf_footer_for_non_square(canvas, doc, font_name, theme_colors):
     """Add instructions to the actual PDF footer for non-square shapes with paragraph-like formatting."""
@@ -236,81 +512,11 @@ def add_instructions_to_pdf_footer_for_non_square(canvas, doc, font_name, theme_
     footer_y = 1.2 * inch
     left_margin = 0.5 * inch
     right_margin = 0.5 * inch
-    available_width = 6.5 * inch - left_margin - right_margin  # Available width for text
-    
-    # Set font and color for "Instructions:" (bold)
-    canvas.setFont(font_name + "-Bold", 11)  # Bold font for "Instructions:"
-    canvas.setFillColor(colors.black)  # Black color
-    
-    # Draw "Instructions:" in bold
-    canvas.drawString(left_margin, footer_y, "Instructions:")
-    
-    # Calculate width of "Instructions:" to position the rest of the text
-    instructions_label_width = canvas.stringWidth("Instructions:", font_name + "-Bold", 11)
-    
-    # Set font for the rest of the text (regular)
-    canvas.setFont(font_name, 11)  # Regular font for instruction text
-    
-    # Instruction text with proper wrapping
-    instruction_text = "Find all the words hidden in the puzzle above, circle or highlight each word as you find it. Note: Words may be read horizontally, vertically, or diagonally."
-    
-    # Split text into lines that fit within margins
-    words = instruction_text.split()
-    lines = []
-    current_line = ""
-    
-    for word in words:
-        test_line = current_line + (" " if current_line else "") + word
-        # Check if "Note:" should be bold
-        if word == "Note:":
-            test_line = current_line + (" " if current_line else "") + word
-            test_width = canvas.stringWidth(current_line + (" " if current_line else ""), font_name, 11)
-            test_width += canvas.stringWidth("Note:", font_name + "-Bold", 11)
-            if test_width > available_width - instructions_label_width - 10:
-                if current_line:
-                    lines.append(current_line)
-                current_line = word
-            else:
-                current_line = test_line
-        else:
-            test_width = canvas.stringWidth(test_line, font_name, 11)
-            if test_width > available_width - instructions_label_width - 10:
-                if current_line:
-                    lines.append(current_line)
-                current_line = word
-            else:
-                current_line = test_line
+    available_width = CUSTOM_PAGE_SIZE[0] - left_margin - right_margin  # Available width for text
     
-    if current_line:
-        lines.append(current_line)
-    
-    # Draw the instruction lines with proper bold formatting for "Note:"
-    for i, line in enumerate(lines):
-        y_position = footer_y - (i + 1) * 13  # 13pt line spacing
-        x_position = left_margin
-        
-        # Check if line contains "Note:" and handle bold formatting
-        if "Note:" in line:
-            parts = line.split("Note:")
-            # Draw text before "Note:"
-            if parts[0]:
-                canvas.setFont(font_name, 11)  # Regular font
-                canvas.drawString(x_position, y_position, parts[0])
-                x_position += canvas.stringWidth(parts[0], font_name, 11)
-            
-            # Draw "Note:" in bold
-            canvas.setFont(font_name + "-Bold", 11)  # Bold font
-            canvas.drawString(x_position, y_position, "Note:")
-            x_position += canvas.stringWidth("Note:", font_name + "-Bold", 11)
-            
-            # Draw text after "Note:"
-            if len(parts) > 1 and parts[1]:
-                canvas.setFont(font_name, 11)  # Regular font
-                canvas.drawString(x_position, y_position, parts[1])
-        else:
-            # Regular line without "Note:"
-            canvas.setFont(font_name, 11)  # Regular font
-            canvas.drawString(x_position, y_position, line)
+    # Wrapped once per font and width, then reused by every document
+    layout = get_footer_instruction_layout('shaped', font_name, available_width=available_width)
+    draw_instruction_layout(canvas, layout, left_margin, footer_y)
 
 
 def add_instructions_to_pdf_footer_for_custom_shapes(story, font_name, theme_colors):
@@ -426,80 +632,140 @@ def create_puzzle_table_with_title(grid, title, subject, font_name, theme_colors
     
     return combined_table
 
-def create_puzzle_table(grid, font_name, theme_colors, shape='square'):
-    """Create the puzzle grid as a table."""
+class PuzzleGridFlowable(Flowable):
+    """
+    Puzzle grid drawn straight onto the canvas.
     
-    # Create table data
-    table_data = []
-    for row in grid:
-        table_data.append([cell for cell in row])
-    
-    # Create table with optimized cell sizes to maximize puzzle without overlapping wordlist
-    grid_size = len(table_data)
-    available_width = 5.25*inch  # 6.5" - 1.25" margins
-    min_wordlist_width = 2.0*inch  # Reduced minimum wordlist width to maximize puzzle
-    max_puzzle_width = available_width - min_wordlist_width  # 3.25" max puzzle width
-    
-    if grid_size <= 12:  # 8x8 to 12x12 grids (square shapes)
-        # Calculate optimal cell size to fit within max puzzle width
-        cell_size = max_puzzle_width / grid_size  # Dynamic sizing based on available space
-        puzzle_font_size = 20  # Original font size for square shapes (unchanged)
-        cell_padding = 2  # Original padding for square shapes (unchanged)
-    else:  # Larger grids (15x15 custom shapes)
-        # Use the same successful approach as square shapes but for 15x15 grids
-        available_width = 5.5*inch  # 6.5" - 1.0" margins (0.5" left + 0.5" right)
-        wordlist_width = 1.8*inch   # Reduced word list width
-        max_puzzle_width = available_width - wordlist_width - 0.2*inch  # 3.5" for puzzle with gap
-        cell_size = max_puzzle_width / grid_size  # Same calculation method as square shapes
-        puzzle_font_size = 17  # Reduced by 1pt for non-square shapes (18pt → 17pt)
-        cell_padding = 2  # Use the same successful padding as square shapes
-    
-    table = Table(table_data, colWidths=cell_size, rowHeights=cell_size)
-    
-    # Style the table using the same successful approach as square shapes
-    table_style = [
-        ('FONTNAME', (0, 0), (-1, -1), font_name),  # Back to original font
-        ('FONTSIZE', (0, 0), (-1, -1), puzzle_font_size),  # Conditional font size
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),  # Black color
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),  # Center letters horizontally
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),  # Use same alignment as square shapes
-        ('GRID', (0, 0), (-1, -1), 0.5, theme_colors['grid']),
-        ('BACKGROUND', (0, 0), (-1, -1), theme_colors['background']),
-        ('LEFTPADDING', (0, 0), (-1, -1), 3),  # Use same padding as square shapes
-        ('RIGHTPADDING', (0, 0), (-1, -1), 3),
-        ('TOPPADDING', (0, 0), (-1, -1), 0),   # Use same padding as square shapes
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 15), # Increased bottom padding to push letters up for better centering
-    ]
+    Uses the same geometry as a platypus Table with one letter per cell
+    (GRID lines, centered letters, top-aligned with no top padding) but skips
+    the per-cell measurement and wrap passes: the lines are one path and the
+    letters are one text object.
+    """
     
-    table.setStyle(TableStyle(table_style))
+    def __init__(self, grid, cell_size, font_name, font_size, theme_colors, placements=None):
+        Flowable.__init__(self)
+        self.grid = grid
+        self.placements = placements or []
+        self.cell_size = cell_size
+        self.font_name = font_name
+        self.font_size = font_size
+        self.theme_colors = theme_colors
+        self.rows = len(grid)
+        self.cols = len(grid[0]) if grid else 0
+        self.width = self.cols * cell_size
+        self.height = self.rows * cell_size
+    
+    def wrap(self, availWidth, availHeight):
+        return (self.width, self.height)
+    
+    def draw(self):
+        canvas = self.canv
+        cell_size = self.cell_size
+        
+        # Grid line positions (rows are laid out from the top, like Table)
+        col_positions = [j * cell_size for j in range(self.cols + 1)]
+        row_positions = [self.height - i * cell_size for i in range(self.rows + 1)]
+        
+        canvas.saveState()
+        
+        # Background
+        canvas.setFillColor(self.theme_colors['background'])
+        canvas.rect(0, 0, self.width, self.height, stroke=0, fill=1)
+        
+        # Letters: centered horizontally, baseline one font size below the cell top
+        widths = {}
+        text = canvas.beginText()
+        text.setFont(self.font_name, self.font_size)
+        text.setFillColor(colors.black)
+        for i, row in enumerate(self.grid):
+            y = row_positions[i] - self.font_size
+            for j, letter in enumerate(row):
+                if not letter:
+                    continue
+                if letter not in widths:
+                    widths[letter] = stringWidth(letter, self.font_name, self.font_size)
+                text.setTextOrigin(col_positions[j] + cell_size * 0.5 - widths[letter] * 0.5, y)
+                text.textOut(letter)
+        canvas.drawText(text)
+        
+        # Grid lines as a single path
+        path = canvas.beginPath()
+        for y in row_positions:
+            path.moveTo(col_positions[0], y)
+            path.lineTo(col_positions[-1], y)
+        for x in col_positions:
+            path.moveTo(x, row_positions[0])
+            path.lineTo(x, row_positions[-1])
+        canvas.setStrokeColor(self.theme_colors['grid'])
+        canvas.setLineWidth(0.5)
+        canvas.setLineCap(1)
+        canvas.setLineJoin(1)
+        canvas.drawPath(path, stroke=1, fill=0)
+        
+        # Answer key: outline each placed word with a capsule
+        if self.placements:
+            self.draw_highlights(col_positions, row_positions)
+        
+        canvas.restoreState()
     
-    return table
+    def draw_highlights(self, col_positions, row_positions):
+        """Stroke a capsule around every placed word, straight from the placement data."""
+        canvas = self.canv
+        cell_size = self.cell_size
+        capsule_height = cell_size * 0.8
+        
+        # Letters sit high in their cells; center the capsule on the glyphs, not the cell
+        glyph_offset = self.font_size * 0.65
+        
+        canvas.setStrokeColor(self.theme_colors['primary'])
+        canvas.setLineWidth(1.2)
+        
+        for placement in self.placements:
+            length = (len(placement['word']) - 1) * math.hypot(placement['dr'], placement['dc']) * cell_size
+            x = col_positions[placement['col']] + cell_size * 0.5
+            y = row_positions[placement['row']] - glyph_offset
+            
+            canvas.saveState()
+            canvas.translate(x, y)
+            canvas.rotate(math.degrees(math.atan2(-placement['dr'], placement['dc'])))
+            canvas.roundRect(-capsule_height / 2, -capsule_height / 2, length + capsule_height, capsule_height,
+                             capsule_height / 2, stroke=1, fill=0)
+            canvas.restoreState()
 
-def create_word_list_table(word_list, font_name, theme_colors, shape='square', grid=None):
-    """Create the word list table for left side positioning."""
+def create_puzzle_table(grid, font_name, theme_colors, shape='square', placements=None, plan=None):
+    """Create the puzzle grid flowable (placements outline the words for answer keys)."""
+    
+    # Cell and letter sizes maximize the puzzle without overlapping the word list
+    if plan is None:
+        plan = plan_puzzle_layout(grid, shape, page_size=CUSTOM_PAGE_SIZE)
+    
+    return PuzzleGridFlowable(grid, plan.pdf_cell_size, font_name, plan.pdf_letter_size, theme_colors, placements)
+
+def create_word_list_table(word_list, font_name, theme_colors, shape='square', grid=None, plan=None):
+    """Create the word list table for left side positioning (pass the grid or its layout plan)."""
+    
+    if plan is None:
+        plan = plan_puzzle_layout(grid, shape, len(word_list), CUSTOM_PAGE_SIZE)
     
     # Add minimal padding to align with puzzle grid top
-    padding_style = ParagraphStyle(
+    padding_style = get_cached_style(('Padding', theme_colors['background'].hexval()), lambda: ParagraphStyle(
         'Padding',
         fontSize=1,
         textColor=theme_colors['background'],
         spaceAfter=2
-    )
+    ))
     padding = Paragraph("&nbsp;", padding_style)  # Invisible spacer
     
     # Header - conditional font size
-    if shape == 'square':
-        header_font_size = 20  # Original font size for square shapes
-    else:
-        header_font_size = 16  # Adjusted font size for non-square shapes
+    header_font_size = plan.pdf_header_size
     
-    header_style = ParagraphStyle(
+    header_style = get_cached_style(('WordListHeader', font_name, header_font_size), lambda: ParagraphStyle(
         'WordListHeader',
         fontSize=header_font_size,  # Conditional header font size
         textColor=colors.black,  # Black color
         fontName=font_name,
         spaceAfter=30  # Significantly increased spacing below "Wordlist" header
-    )
+    ))
     
     header = Paragraph("<b>Wordlist:</b>", header_style)
     
@@ -508,63 +774,52 @@ def create_word_list_table(word_list, font_name, theme_colors, shape='square', g
     
     # Add multiple spacer rows for extra spacing below "Wordlist:" header
     for i in range(1):  # Add 1 spacer row for 50% less spacing
-        spacer_style = ParagraphStyle(
+        spacer_style = get_cached_style(('Spacer',), lambda: ParagraphStyle(
             'Spacer',
             fontSize=1,
             textColor=colors.white,
             spaceAfter=0,
             spaceBefore=0
-        )
+        ))
         spacer = Paragraph("&nbsp;", spacer_style)
         word_list_data.append([spacer])
     
+    # Font size and line height for words (smaller and tighter for long word lists)
+    word_font_size = plan.pdf_word_size
+    word_leading = plan.pdf_word_leading
+    
+    # One shared style for every word
+    word_style = get_cached_style(('WordItem', font_name, word_font_size, word_leading), lambda: ParagraphStyle(
+        'WordItem',
+        fontSize=word_font_size,  # Conditional word font size
+        leading=word_leading,
+        textColor=colors.black,  # Black color
+        fontName=font_name,
+        alignment=TA_LEFT,  # Left align under "Wordlist:" title
+        spaceAfter=6  # Increased spacing between words
+    ))
+    
     # Add words with proper spacing
     for word in word_list:
         # Capitalize and preserve spaces within words
         formatted_word = word.upper()
         
-        # Conditional font size for words
-        if shape == 'square':
-            word_font_size = 16  # Original font size for square shapes
-        else:
-            word_font_size = 14  # Adjusted font size for non-square shapes
-        
-        word_style = ParagraphStyle(
-            'WordItem',
-            fontSize=word_font_size,  # Conditional word font size
-            textColor=colors.black,  # Black color
-            fontName=font_name,
-            alignment=TA_LEFT,  # Left align under "Wordlist:" title
-            spaceAfter=6  # Increased spacing between words
-        )
         word_para = Paragraph(formatted_word, word_style)  # Remove bullet point
         word_list_data.append([word_para])
     
-    # Create table with conditional column width
-    if shape == 'square' and grid:
-        # For square shapes: use dynamic width based on available space
-        available_width = 5.25*inch  # 6.5" - 1.25" margins
-        grid_size = len(grid)
-        min_wordlist_width = 2.0*inch  # Reduced minimum wordlist width to maximize puzzle
-        max_puzzle_width = available_width - min_wordlist_width  # 3.25" max puzzle width
-        cell_size = max_puzzle_width / grid_size  # Dynamic cell size
-        puzzle_width = grid_size * cell_size  # Calculate actual puzzle width
-        wordlist_width = available_width - puzzle_width  # Remaining space for wordlist
-        table = Table(word_list_data, colWidths=[wordlist_width])
-    else:
-        # Non-square shapes: optimized width to prevent overlap
-        wordlist_width = 1.8*inch  # Further reduced width to accommodate 2X larger puzzle cells
-        table = Table(word_list_data, colWidths=[wordlist_width])
+    # Create table with the planned word list width
+    table = Table(word_list_data, colWidths=[plan.pdf_wordlist_width])
     
-    # Style the table
-    table_style = [
+    # Style the table (word rows, after padding/header/spacer, use the planned padding)
+    word_padding = plan.pdf_word_padding
+    table.setStyle(get_cached_style(('WordListTable', theme_colors['background'].hexval(), word_padding), lambda: TableStyle([
         ('VALIGN', (0, 0), (-1, -1), 'TOP'),
         ('LEFTPADDING', (0, 0), (-1, -1), 0),
         ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+        ('TOPPADDING', (0, 3), (-1, -1), word_padding),
+        ('BOTTOMPADDING', (0, 3), (-1, -1), word_padding),
         ('BACKGROUND', (0, 0), (-1, -1), theme_colors['background']),  # Ensure white background
-    ]
-    
-    table.setStyle(TableStyle(table_style))
+    ])))
     
     return table
 
@@ -0,0 +1,67 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+# PREVIEW PUZZLE TOKENS
+# /preview keeps each generated puzzle (a puzzle_format record) under a random
+# token, so /generate can export exactly the previewed grid without placing
+# the words again. Entries expire after PUZZLE_TOKEN_TTL seconds and the
+# oldest are dropped beyond PUZZLE_CACHE_MAX_ENTRIES. The cache is per
+# process; when a token is missing (expired, or served by another worker) the
+# caller regenerates the same grid from the puzzle's seed.
+
+PUZZLE_CACHE_MAX_ENTRIES = 2048
+PUZZLE_TOKEN_TTL = 30 * 60  # seconds
+
+# token -> (expiry time, generation inputs, puzzle), oldest first
+_puzzle_cache = OrderedDict()
+_puzzle_cache_lock = threading.Lock()
+
+def _expire(now):
+    """Drop expired entries from the front of the cache (caller holds the lock)."""
+    while _puzzle_cache:
+        token, (expires, _, _) = next(iter(_puzzle_cache.items()))
+        if expires > now:
+            break
+        del _puzzle_cache[token]
+
+def store_preview_puzzle(puzzle, inputs):
+    """
+    Keep a previewed puzzle for a later download.
+
+    Args:
+        puzzle: Puzzle record (see utils/puzzle_format.py)
+        inputs: Everything that determined the grid (words, shape, directions, ...)
+
+    Returns:
+        Token for /generate
+    """
+    token = secrets.token_urlsafe(16)
+    now = time.monotonic()
+    with _puzzle_cache_lock:
+        _expire(now)
+        _puzzle_cache[token] = (now + PUZZLE_TOKEN_TTL, inputs, puzzle)
+        while len(_puzzle_cache) > PUZZLE_CACHE_MAX_ENTRIES:
+            _puzzle_cache.popitem(last=False)
+    return token
+
+def get_preview_puzzle(token, inputs):
+    """
+    Look up a previewed puzzle.
+
+    Args:
+        token: Token returned by store_preview_puzzle
+        inputs: The current generation inputs; the puzzle is only returned if
+                they match the ones it was generated from
+
+    Returns:
+        Puzzle record, or None if the token is unknown, expired or stale
+    """
+    with _puzzle_cache_lock:
+        _expire(time.monotonic())
+        entry = _puzzle_cache.get(token)
+
+    if entry is None or entry[1] != inputs:
+        return None
+    return entry[2]
@@ -0,0 +1,287 @@
+import json
+import struct
+
+from .puzzle_generator import GENERATOR_VERSION, get_placement_strategy
+
+# PUZZLE INTERCHANGE FORMAT
+# A generated puzzle, stored once and rendered many times (in any format, in
+# any process) without running the generator again. In memory a puzzle is a
+# dict:
+#   {'version', 'generator_version', 'strategy', 'seed', 'shape',
+#    'grid', 'words', 'placements'}
+# where grid is the generator's 2D list ('' outside the shape), words are the
+# display words and placements are the generator's placement dicts.
+#
+# Both encodings store the grid as:
+#   - letters: the letters of the filled cells, row by row, as one string
+#   - mask:    run lengths of filled / empty cells, row by row, starting with
+#              a (possibly empty) run of filled cells
+#
+# Binary layout (big-endian):
+#   magic 'WSPZ', format version (B), generator version (H), seed (q, -1 = none),
+#   rows (H), cols (H), shape, strategy, letters (str), mask runs (H count + H each),
+#   words (H count + str each), placements (H count + str word, H row, H col, b dr, b dc each)
+# where str is a H byte length followed by UTF-8 bytes.
+
+PUZZLE_FORMAT_VERSION = 1
+PUZZLE_MAGIC = b'WSPZ'
+PUZZLE_JSON_FORMAT = 'wordsearch-puzzle'
+
+# Seeds are stored as signed 64-bit integers (-1 = none)
+MAX_PUZZLE_SEED = 2 ** 63 - 1
+
+_HEADER = struct.Struct('>4sBHqHH')
+_COUNT = struct.Struct('>H')
+_PLACEMENT = struct.Struct('>HHbb')
+
+def make_puzzle(grid, words, placements, shape='square', seed=None):
+    """
+    Build a puzzle record from the generator's output.
+
+    Args:
+        grid: 2D list of letters ('' outside the shape)
+        words: Display words (as shown in the word list)
+        placements: Placement dicts from generate_puzzle(return_placements=True)
+        shape: Shape name
+        seed: Seed the puzzle was generated with
+
+    Returns:
+        Puzzle dict
+    """
+    return {
+        'version': PUZZLE_FORMAT_VERSION,
+        'generator_version': GENERATOR_VERSION,
+        'strategy': get_placement_strategy(shape),
+        'seed': seed,
+        'shape': shape,
+        'grid': grid,
+        'words': list(words),
+        'placements': [dict(placement) for placement in placements or []],
+    }
+
+def encode_mask_rle(grid):
+    """
+    Run-length encode which cells of a grid are filled.
+
+    Returns:
+        List of run lengths, alternating filled / empty and starting with filled
+    """
+    runs = []
+    filled = True
+    length = 0
+    for row in grid:
+        for cell in row:
+            if bool(cell) == filled:
+                length += 1
+            else:
+                runs.append(length)
+                filled = not filled
+                length = 1
+    runs.append(length)
+    return runs
+
+def pack_grid(grid):
+    """
+    Pack a grid into its letter string and mask runs.
+
+    Returns:
+        (letters, mask runs)
+    """
+    letters = ''.join(cell for row in grid for cell in row if cell)
+    return letters, encode_mask_rle(grid)
+
+def unpack_grid(letters, mask, rows, cols):
+    """
+    Rebuild a 2D grid from its letter string and mask runs.
+
+    Returns:
+        2D list of letters ('' outside the shape)
+    """
+    cells = []
+    letter_index = 0
+    filled = True
+    for length in mask:
+        if filled:
+            cells.extend(letters[letter_index:letter_index + length])
+            letter_index += length
+        else:
+            cells.extend([''] * length)
+        filled = not filled
+
+    if len(cells) != rows * cols or letter_index != len(letters):
+        raise ValueError('Puzzle mask does not match its size and letters')
+    return [cells[i * cols:(i + 1) * cols] for i in range(rows)]
+
+def encode_puzzle_json(puzzle):
+    """Encode a puzzle as a compact JSON string."""
+    grid = puzzle['grid']
+    letters, mask = pack_grid(grid)
+    return json.dumps({
+        'format': PUZZLE_JSON_FORMAT,
+        'version': PUZZLE_FORMAT_VERSION,
+        'generator_version': puzzle['generator_version'],
+        'strategy': puzzle['strategy'],
+        'seed': puzzle['seed'],
+        'shape': puzzle['shape'],
+        'rows': len(grid),
+        'cols': len(grid[0]) if grid else 0,
+        'letters': letters,
+        'mask': mask,
+        'words': puzzle['words'],
+        'placements': [[p['word'], p['row'], p['col'], p['dr'], p['dc']] for p in puzzle['placements']],
+    }, separators=(',', ':'))
+
+def decode_puzzle_json(text):
+    """
+    Decode a puzzle from its JSON encoding.
+
+    Raises:
+        ValueError: If the data isn't a puzzle or uses a newer format version
+    """
+    data = json.loads(text)
+    if not isinstance(data, dict) or data.get('format') != PUZZLE_JSON_FORMAT:
+        raise ValueError('Not a puzzle')
+    if data.get('version', 0) > PUZZLE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported puzzle format version {data.get('version')}")
+
+    return {
+        'version': data['version'],
+        'generator_version': data['generator_version'],
+        'strategy': data['strategy'],
+        'seed': data['seed'],
+        'shape': data['shape'],
+        'grid': unpack_grid(data['letters'], data['mask'], data['rows'], data['cols']),
+        'words': data['words'],
+        'placements': [{'word': word, 'row': row, 'col': col, 'dr': dr, 'dc': dc}
+                       for word, row, col, dr, dc in data['placements']],
+    }
+
+def _pack_str(value):
+    encoded = value.encode('utf-8')
+    return _COUNT.pack(len(encoded)) + encoded
+
+def _unpack_str(data, offset):
+    (length,) = _COUNT.unpack_from(data, offset)
+    offset += _COUNT.size
+    return data[offset:offset + length].decode('utf-8'), offset + length
+
+def encode_puzzle_binary(puzzle):
+    """
+    Encode a puzzle in the compact binary format.
+
+    Raises:
+        ValueError: If the seed doesn't fit in the format
+    """
+    grid = puzzle['grid']
+    letters, mask = pack_grid(grid)
+    seed = puzzle['seed'] if puzzle['seed'] is not None else -1
+    if not -1 <= seed <= MAX_PUZZLE_SEED:
+        raise ValueError(f'Puzzle seed must be between 0 and {MAX_PUZZLE_SEED}')
+
+    parts = [
+        _HEADER.pack(PUZZLE_MAGIC, PUZZLE_FORMAT_VERSION, puzzle['generator_version'], seed,
+                     len(grid), len(grid[0]) if grid else 0),
+        _pack_str(puzzle['shape']),
+        _pack_str(puzzle['strategy']),
+        _pack_str(letters),
+        _COUNT.pack(len(mask)),
+        struct.pack(f'>{len(mask)}H', *mask),
+        _COUNT.pack(len(puzzle['words'])),
+    ]
+    parts.extend(_pack_str(word) for word in puzzle['words'])
+    parts.append(_COUNT.pack(len(puzzle['placements'])))
+    for placement in puzzle['placements']:
+        parts.append(_pack_str(placement['word']))
+        parts.append(_PLACEMENT.pack(placement['row'], placement['col'], placement['dr'], placement['dc']))
+    return b''.join(parts)
+
+def decode_puzzle_binary(data):
+    """
+    Decode a puzzle from the binary format.
+
+    Raises:
+        ValueError: If the data isn't a puzzle or uses a newer format version
+    """
+    if len(data) < _HEADER.size or data[:4] != PUZZLE_MAGIC:
+        raise ValueError('Not a puzzle')
+
+    try:
+        _, version, generator_version, seed, rows, cols = _HEADER.unpack_from(data, 0)
+        if version > PUZZLE_FORMAT_VERSION:
+            raise ValueError(f'Unsupported puzzle format version {version}')
+        offset = _HEADER.size
+
+        shape, offset = _unpack_str(data, offset)
+        strategy, offset = _unpack_str(data, offset)
+        letters, offset = _unpack_str(data, offset)
+
+        (run_count,) = _COUNT.unpack_from(data, offset)
+        offset += _COUNT.size
+        mask = struct.unpack_from(f'>{run_count}H', data, offset)
+        offset += 2 * run_count
+
+        (word_count,) = _COUNT.unpack_from(data, offset)
+        offset += _COUNT.size
+        words = []
+        for _ in range(word_count):
+            word, offset = _unpack_str(data, offset)
+            words.append(word)
+
+        (placement_count,) = _COUNT.unpack_from(data, offset)
+        offset += _COUNT.size
+        placements = []
+        for _ in range(placement_count):
+            word, offset = _unpack_str(data, offset)
+            row, col, dr, dc = _PLACEMENT.unpack_from(data, offset)
+            offset += _PLACEMENT.size
+            placements.append({'word': word, 'row': row, 'col': col, 'dr': dr, 'dc': dc})
+    except struct.error as e:
+        raise ValueError(f'Truncated puzzle data: {e}')
+
+    return {
+        'version': version,
+        'generator_version': generator_version,
+        'strategy': strategy,
+        'seed': None if seed == -1 else seed,
+        'shape': shape,
+        'grid': unpack_grid(letters, mask, rows, cols),
+        'words': words,
+        'placements': placements,
+    }
+
+def decode_puzzle(data):
+    """
+    Decode a puzzle from either encoding (detected from the first bytes).
+
+    Args:
+        data: bytes (binary or UTF-8 JSON) or a JSON string
+
+    Returns:
+        Puzzle dict
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data)
+        if data[:4] == PUZZLE_MAGIC:
+            return decode_puzzle_binary(data)
+        data = data.decode('utf-8')
+    return decode_puzzle_json(data)
+
+def export_puzzle(puzzle, export_format, filename, title='', subject='', font_name='Arial', theme='modern',
+                  answer_key=False):
+    """
+    Render a stored puzzle with any exporter, without running the generator.
+
+    Args:
+        puzzle: Puzzle dict (see make_puzzle / decode_puzzle)
+        export_format: 'pdf', 'word', 'svg' or 'png' (anything else renders a PDF)
+        filename: Output path or writable binary stream
+        title, subject, font_name, theme, answer_key: As for export_to_pdf
+    """
+    from .pdf_exporter import export_to_pdf
+    from .word_exporter import export_to_word
+    from .image_exporter import export_to_svg, export_to_png
+
+    exporters = {'word': export_to_word, 'svg': export_to_svg, 'png': export_to_png}
+    exporter = exporters.get(export_format, export_to_pdf)
+    exporter(title, subject, puzzle['grid'], puzzle['words'], font_name, filename, theme, puzzle['shape'],
+             placements=puzzle['placements'], answer_key=answer_key)
@@ -1,6 +1,6 @@
 import random
 import string
-from .shape_masks import get_shape_mask
+from .shape_masks import get_shape_mask, get_shape_positions
 
 # ENHANCED WORD PLACEMENT FOR NON-SQUARE SHAPES
 # This version includes improved word placement algorithms specifically for non-square shapes
@@ -8,7 +8,12 @@ from .shape_masks import get_shape_mask
 # 
 # To revert to original algorithm, run: python revert_puzzle_generator.py
 
-def generate_puzzle(words, shape='square', size=None, allow_vertical=True, allow_horizontal=True, allow_diagonal=True):
+# Bump whenever a change to placement or filling gives a different grid for the
+# same words and seed (stored puzzles record the version that produced them)
+GENERATOR_VERSION = 1
+
+def generate_puzzle(words, shape='square', size=None, allow_vertical=True, allow_horizontal=True, allow_diagonal=True,
+                    return_placements=False, seed=None, progress=None):
     """
     Generate a word search puzzle with the given words and shape.
     
@@ -19,11 +24,19 @@ def generate_puzzle(words, shape='square', size=None, allow_vertical=True, allow
         allow_vertical: Whether to allow vertical word placement
         allow_horizontal: Whether to allow horizontal word placement
         allow_diagonal: Whether to allow diagonal word placement
+        return_placements: Also return where each word was placed
+        seed: Optional seed; the same inputs and seed always produce the same puzzle
+        progress: Optional callback(words_tried, total_words, words_placed), called after each word
     
     Returns:
-        tuple: (grid, placed_words) where grid is a 2D list and placed_words is a list of placed words
+        tuple: (grid, placed_words) where grid is a 2D list and placed_words is a list of placed words.
+        With return_placements=True: (grid, placed_words, placements), where placements is a list of
+        {'word', 'row', 'col', 'dr', 'dc'} dicts in final grid coordinates.
     """
     
+    # Seeded puzzles draw from their own generator so they are reproducible
+    rng = random.Random(seed) if seed is not None else random
+    
     # Auto-calculate size based on longest word if not provided
     if size is None:
         max_word_length = max(len(word) for word in words) if words else 10
@@ -42,6 +55,9 @@ def generate_puzzle(words, shape='square', size=None, allow_vertical=True, allow
     mask = get_shape_mask(shape, size)
     grid_size = len(mask)
     
+    # Cells words may start in (the mask doesn't change while words are placed)
+    positions = get_shape_positions(shape, mask)
+    
     # Initialize grid with empty spaces
     grid = [['' for _ in range(grid_size)] for _ in range(grid_size)]
     
@@ -49,59 +65,104 @@ def generate_puzzle(words, shape='square', size=None, allow_vertical=True, allow
     words = sorted(words, key=len, reverse=True)
     
     placed_words = []
+    placements = []
     
     # Try to place each word, with enhanced algorithm for non-square shapes
     if shape == 'square':
         # Original algorithm for square shapes (unchanged)
-        for word in words:
+        for tried, word in enumerate(words, 1):
             # Try up to 10 times to place difficult words (increased from 3)
             placed = False
             for attempt in range(10):
-                if place_word(grid, mask, word, allow_vertical, allow_horizontal, allow_diagonal):
+                placement = place_word(grid, mask, word, allow_vertical, allow_horizontal, allow_diagonal, rng,
+                                       positions)
+                if placement:
                     placed_words.append(word)
+                    placements.append(make_placement(word, placement))
                     placed = True
                     break
             
             # If word still couldn't be placed after 10 attempts, continue to next word
             if not placed:
                 print(f"Warning: Could not place word '{word}' after 10 attempts")
+            
+            if progress:
+                progress(tried, len(words), len(placed_words))
     else:
         # Enhanced algorithm for non-square shapes
-        for word in words:
+        for tried, word in enumerate(words, 1):
             placed = False
             # Try more attempts for non-square shapes (15 attempts)
             for attempt in range(15):
-                if place_word_enhanced(grid, mask, word, allow_vertical, allow_horizontal, allow_diagonal):
+                placement = place_word_enhanced(grid, mask, word, allow_vertical, allow_horizontal, allow_diagonal,
+                                                rng, positions)
+                if placement:
                     placed_words.append(word)
+                    placements.append(make_placement(word, placement))
                     placed = True
                     break
             
             # If word still couldn't be placed after 15 attempts, continue to next word
             if not placed:
                 print(f"Warning: Could not place word '{word}' after 15 attempts")
+            
+            if progress:
+                progress(tried, len(words), len(placed_words))
     
     # Fill empty spaces with random letters
     for i in range(grid_size):
         for j in range(grid_size):
             if mask[i][j] and not grid[i][j]:
-                grid[i][j] = random.choice(string.ascii_uppercase)
+                grid[i][j] = rng.choice(string.ascii_uppercase)
     
     # For non-square shapes, remove empty columns to make grid more compact
     if shape != 'square':
+        kept_columns = [j for j in range(grid_size) if any(row[j] for row in grid)]
         grid = remove_empty_columns(grid)
+        
+        # Shift placements into the trimmed grid's columns
+        if kept_columns and len(kept_columns) < grid_size:
+            column_map = {j: new_j for new_j, j in enumerate(kept_columns)}
+            for placement in placements:
+                placement['col'] = column_map[placement['col']]
     
     # Apply symmetry correction for non-square shapes
     if shape != 'square':
-        grid = fix_symmetry(grid, shape)
+        grid = fix_symmetry(grid, shape, rng)
     
+    if return_placements:
+        return grid, placed_words, placements
     return grid, placed_words
 
-def place_word(grid, mask, word, allow_vertical=True, allow_horizontal=True, allow_diagonal=True):
+def get_placement_strategy(shape):
+    """Name of the placement algorithm used for a shape ('standard' for square, 'enhanced' otherwise)."""
+    return 'standard' if shape == 'square' else 'enhanced'
+
+def make_placement(word, placement):
+    """Build a placement record from a (start_i, start_j, di, dj) tuple."""
+    start_i, start_j, di, dj = placement
+    return {'word': word, 'row': start_i, 'col': start_j, 'dr': di, 'dc': dj}
+
+def get_placement_cells(placement):
+    """
+    Get the grid cells covered by a placed word.
+    
+    Returns:
+        List of (row, col) tuples from the first letter to the last
+    """
+    return [(placement['row'] + k * placement['dr'], placement['col'] + k * placement['dc'])
+            for k in range(len(placement['word']))]
+
+def place_word(grid, mask, word, allow_vertical=True, allow_horizontal=True, allow_diagonal=True, rng=random,
+               positions=None):
     """
     Try to place a word in the grid.
     
+    positions, if given, are the mask's usable cells in row-major order (see
+    get_shape_positions); otherwise they are found by scanning the mask.
+    
     Returns:
-        bool: True if word was placed successfully
+        tuple: (start_i, start_j, di, dj) where the word was placed, or None
     """
     
     directions = []
@@ -113,8 +174,11 @@ def place_word(grid, mask, word, allow_vertical=True, allow_horizontal=True, all
         directions.extend([(1, 1), (1, -1), (-1, 1), (-1, -1)])  # Diagonals
     
     # Try multiple random starting positions (increased to 200 for better placement)
-    positions = [(i, j) for i in range(len(grid)) for j in range(len(grid[0])) if mask[i][j]]
-    random.shuffle(positions)
+    if positions is None:
+        positions = [(i, j) for i in range(len(grid)) for j in range(len(grid[0])) if mask[i][j]]
+    else:
+        positions = list(positions)
+    rng.shuffle(positions)
     
     # Limit positions to try (but try more if we have fewer valid positions)
     max_positions = min(len(positions), 200)
@@ -123,17 +187,20 @@ def place_word(grid, mask, word, allow_vertical=True, allow_horizontal=True, all
         for di, dj in directions:
             if can_place_word(grid, mask, word, start_i, start_j, di, dj):
                 place_word_at(grid, word, start_i, start_j, di, dj)
-                return True
+                return (start_i, start_j, di, dj)
     
-    return False
+    return None
 
-def place_word_enhanced(grid, mask, word, allow_vertical=True, allow_horizontal=True, allow_diagonal=True):
+def place_word_enhanced(grid, mask, word, allow_vertical=True, allow_horizontal=True, allow_diagonal=True,
+                        rng=random, positions=None):
     """
     Enhanced word placement algorithm specifically for non-square shapes.
     Uses more aggressive placement strategies to fit more words.
     
+    positions: as for place_word
+    
     Returns:
-        bool: True if word was placed successfully
+        tuple: (start_i, start_j, di, dj) where the word was placed, or None
     """
     
     directions = []
@@ -145,11 +212,12 @@ def place_word_enhanced(grid, mask, word, allow_vertical=True, allow_horizontal=
         directions.extend([(1, 1), (1, -1), (-1, 1), (-1, -1)])  # Diagonals
     
     # Get all valid positions
-    positions = [(i, j) for i in range(len(grid)) for j in range(len(grid[0])) if mask[i][j]]
+    if positions is None:
+        positions = [(i, j) for i in range(len(grid)) for j in range(len(grid[0])) if mask[i][j]]
     
     # For non-square shapes, prioritize center positions first (more likely to fit)
     center_i, center_j = len(grid) // 2, len(grid[0]) // 2
-    positions.sort(key=lambda pos: abs(pos[0] - center_i) + abs(pos[1] - center_j))
+    positions = sorted(positions, key=lambda pos: abs(pos[0] - center_i) + abs(pos[1] - center_j))
     
     # Try more positions for non-square shapes (up to 300 instead of 200)
     max_positions = min(len(positions), 300)
@@ -159,7 +227,7 @@ def place_word_enhanced(grid, mask, word, allow_vertical=True, allow_horizontal=
         for di, dj in directions:
             if can_place_word(grid, mask, word, start_i, start_j, di, dj):
                 place_word_at(grid, word, start_i, start_j, di, dj)
-                return True
+                return (start_i, start_j, di, dj)
     
     # Strategy 2: If normal placement fails, try with partial overlap
     # (allow words to share some letters if they match)
@@ -167,7 +235,7 @@ def place_word_enhanced(grid, mask, word, allow_vertical=True, allow_horizontal=
         for di, dj in directions:
             if can_place_word_with_overlap(grid, mask, word, start_i, start_j, di, dj):
                 place_word_at(grid, word, start_i, start_j, di, dj)
-                return True
+                return (start_i, start_j, di, dj)
     
     # Strategy 3: Try different word orientations more aggressively
     # (try shorter words in tighter spaces)
@@ -176,9 +244,9 @@ def place_word_enhanced(grid, mask, word, allow_vertical=True, allow_horizontal=
             for di, dj in directions:
                 if can_place_word_tight(grid, mask, word, start_i, start_j, di, dj):
                     place_word_at(grid, word, start_i, start_j, di, dj)
-                    return True
+                    return (start_i, start_j, di, dj)
     
-    return False
+    return None
 
 def can_place_word_with_overlap(grid, mask, word, start_i, start_j, di, dj):
     """
@@ -314,7 +382,7 @@ def analyze_symmetry(grid):
     
     return row_counts, col_counts
 
-def fix_symmetry(grid, shape='square'):
+def fix_symmetry(grid, shape='square', rng=random):
     """
     Fix asymmetry in non-square shapes by strategically adding letters.
     For shapes like circle, heart, star, ensure better symmetry while respecting shape boundaries.
@@ -352,8 +420,7 @@ def fix_symmetry(grid, shape='square'):
                 if (mask[i][left_col] and 
                     (not fixed_grid[i][left_col] or not fixed_grid[i][left_col].strip())):
                     # Add a random letter to balance - only within shape
-                    import random
-                    fixed_grid[i][left_col] = random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+                    fixed_grid[i][left_col] = rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
                     break
         elif right_count < left_count:
             # Add letters to right column - only within shape boundaries
@@ -361,8 +428,7 @@ def fix_symmetry(grid, shape='square'):
                 if (mask[i][right_col] and 
                     (not fixed_grid[i][right_col] or not fixed_grid[i][right_col].strip())):
                     # Add a random letter to balance - only within shape
-                    import random
-                    fixed_grid[i][right_col] = random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+                    fixed_grid[i][right_col] = rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
                     break
     
     # Fix row symmetry (top vs bottom) - only within shape boundaries
@@ -381,8 +447,7 @@ def fix_symmetry(grid, shape='square'):
                 if (mask[top_row][j] and 
                     (not fixed_grid[top_row][j] or not fixed_grid[top_row][j].strip())):
                     # Add a random letter to balance - only within shape
-                    import random
-                    fixed_grid[top_row][j] = random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+                    fixed_grid[top_row][j] = rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
                     break
         elif bottom_count < top_count:
             # Add letters to bottom row - only within shape boundaries
@@ -390,8 +455,7 @@ def fix_symmetry(grid, shape='square'):
                 if (mask[bottom_row][j] and 
                     (not fixed_grid[bottom_row][j] or not fixed_grid[bottom_row][j].strip())):
                     # Add a random letter to balance - only within shape
-                    import random
-                    fixed_grid[bottom_row][j] = random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+                    fixed_grid[bottom_row][j] = rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
                     break
     
     return fixed_grid
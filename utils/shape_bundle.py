@@ -0,0 +1,173 @@
+import hashlib
+import os
+
+import numpy as np
+
+# PRECOMPILED SHAPE LIBRARY
+# Every built-in mask is rendered once, at every supported grid size, and stored
+# bit-packed in a single .npz file together with its slot index (flat indices of
+# the usable cells) and capacity (number of usable cells). Workers load the file
+# once at import, so startup no longer runs the Python loops in shape_masks.py.
+#
+# To rebuild the bundle after changing a shape, bump SHAPE_BUNDLE_VERSION and
+# run: python build_shape_bundle.py
+
+BUNDLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'shape_bundle.npz')
+
+# Bump whenever a built-in shape constructor (or the list of built-in shapes)
+# in shape_masks.py changes; a bundle built for another version is ignored
+SHAPE_BUNDLE_VERSION = 1
+
+# Grid sizes the generator asks for (square puzzles use 8-12, other shapes 15);
+# any other size is built by the shape's constructor
+BUNDLE_SIZES = (8, 9, 10, 11, 12, 15)
+
+# Columns of the index table
+_NAME, _SIZE, _BITS_OFFSET, _CAPACITY, _SLOTS_OFFSET = range(5)
+
+# Loaded bundle: {(shape, size): (bits_offset, capacity, slots_offset)} plus the raw arrays
+_bundle_index = {}
+_bundle_bits = None
+_bundle_slots = None
+
+# Hash of the loaded bundle's contents (part of export cache keys for built-in shapes)
+_bundle_digest = None
+
+# (shape, size) -> usable cells as (row, col) tuples, decoded from the slot index on first use
+_bundle_positions = {}
+
+def build_shape_bundle(path=BUNDLE_PATH, sizes=BUNDLE_SIZES):
+    """
+    Render every built-in shape at every size and write the packed bundle.
+
+    Args:
+        path: Output .npz path
+        sizes: Grid sizes to precompute
+
+    Returns:
+        Number of masks written
+    """
+    from .shape_masks import BUILTIN_SHAPES, build_builtin_mask
+
+    names = list(BUILTIN_SHAPES)
+    index_rows = []
+    bit_chunks = []
+    slot_chunks = []
+    bits_offset = 0
+    slots_offset = 0
+
+    for name_index, shape in enumerate(names):
+        for size in sizes:
+            mask = np.array(build_builtin_mask(shape, size), dtype=bool)
+            packed = np.packbits(mask.ravel())
+            slots = np.flatnonzero(mask.ravel()).astype(np.uint16)
+
+            index_rows.append((name_index, size, bits_offset, len(slots), slots_offset))
+            bit_chunks.append(packed)
+            slot_chunks.append(slots)
+            bits_offset += len(packed)
+            slots_offset += len(slots)
+
+    # Uncompressed on purpose: loading is a plain read, no inflate step
+    np.savez(
+        path,
+        names=np.array(names),
+        index=np.array(index_rows, dtype=np.int32),
+        bits=np.concatenate(bit_chunks),
+        slots=np.concatenate(slot_chunks),
+        version=np.array(SHAPE_BUNDLE_VERSION)
+    )
+    return len(index_rows)
+
+def load_shape_bundle(path=BUNDLE_PATH):
+    """
+    Load the precompiled bundle if it exists and was built for SHAPE_BUNDLE_VERSION.
+
+    Returns:
+        True if the bundle was loaded
+    """
+    global _bundle_index, _bundle_bits, _bundle_slots, _bundle_digest
+
+    if not os.path.exists(path):
+        return False
+
+    try:
+        with np.load(path, allow_pickle=False) as bundle:
+            if 'version' not in bundle.files or int(bundle['version']) != SHAPE_BUNDLE_VERSION:
+                print("Warning: shape bundle is out of date, run build_shape_bundle.py to rebuild it")
+                return False
+
+            names = bundle['names'].tolist()
+            index = bundle['index']
+            _bundle_bits = bundle['bits']
+            _bundle_slots = bundle['slots']
+    except Exception as e:
+        print(f"Error loading shape bundle: {e}")
+        return False
+
+    digest = hashlib.sha1('\n'.join(names).encode('utf-8'))
+    for array in (index, _bundle_bits, _bundle_slots):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    _bundle_digest = digest.hexdigest()
+
+    _bundle_positions.clear()
+    _bundle_index = {
+        (names[row[_NAME]], int(row[_SIZE])): (int(row[_BITS_OFFSET]), int(row[_CAPACITY]), int(row[_SLOTS_OFFSET]))
+        for row in index
+    }
+    return True
+
+def get_shape_bundle_digest():
+    """
+    Identify the built-in masks this process serves.
+
+    Returns:
+        Hash of the loaded bundle, or the bundle version when the masks are
+        built by the shape constructors instead
+    """
+    return _bundle_digest or f"unbundled-{SHAPE_BUNDLE_VERSION}"
+
+def get_bundled_mask(shape, size):
+    """
+    Get a precompiled mask from the bundle.
+
+    Returns:
+        2D list of booleans, or None if the shape/size is not bundled
+    """
+    entry = _bundle_index.get((shape, size))
+    if entry is None:
+        return None
+
+    bits_offset = entry[0]
+    packed_length = (size * size + 7) // 8
+    packed = _bundle_bits[bits_offset:bits_offset + packed_length]
+    return np.unpackbits(packed, count=size * size).astype(bool).reshape(size, size).tolist()
+
+def get_bundled_stats(shape, size):
+    """
+    Get the capacity and slot index of a precompiled mask.
+
+    Returns:
+        dict with 'capacity' (usable cells), 'slots' (flat cell indices) and
+        'positions' (the same cells as (row, col) tuples, row-major), or None
+    """
+    entry = _bundle_index.get((shape, size))
+    if entry is None:
+        return None
+
+    _, capacity, slots_offset = entry
+    slots = _bundle_slots[slots_offset:slots_offset + capacity]
+
+    positions = _bundle_positions.get((shape, size))
+    if positions is None:
+        positions = tuple(divmod(slot, size) for slot in slots.tolist())
+        _bundle_positions[(shape, size)] = positions
+
+    return {
+        'capacity': capacity,
+        'slots': slots,
+        'positions': positions
+    }
+
+# Load once at import so forked workers share the same pages
+load_shape_bundle()
@@ -0,0 +1,371 @@
+import hashlib
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+# DATA-DRIVEN SHAPE CATALOGUE
+# Shapes are plain files in the shapes/ directory, discovered once at startup:
+#   - <name>.svg  : <path d="..."> and <polygon points="..."> outlines inside a viewBox
+#                   (path commands M, L, H, V, C, S, Q, T, A, Z; absolute or relative; no transforms)
+#   - <name>.json : {"viewBox": [min_x, min_y, width, height], "polygons": [[[x, y], ...], ...]}
+# Outlines are filled with the even-odd rule and rasterized on demand at any
+# grid size; each (shape, size) mask is cached. Because of the even-odd rule,
+# overlapping subpaths leave a hole where they overlap: draw each shape as one
+# outline. A file with any other path command is skipped with an error, and a
+# file named after a built-in shape is skipped (the built-in would win).
+
+CATALOGUE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'shapes')
+
+# Line segments used to flatten each Bezier curve (and each half turn of an arc)
+CURVE_SEGMENTS = 12
+
+# Discovered shapes: name -> {'polygons': [numpy (N, 2) arrays], 'view_box': (min_x, min_y, width, height),
+#                             'digest': hash of the shape file}
+catalogue_shapes = {}
+
+# Rasterized masks: (name, size) -> 2D list of booleans
+_mask_cache = {}
+
+# Any letter is a command token, so unsupported commands are reported rather than skipped
+_PATH_TOKEN = re.compile(r'[A-Za-z]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+def _bezier_points(control_points, segments=CURVE_SEGMENTS):
+    """Flatten a quadratic or cubic Bezier curve (excluding its start point)."""
+    p = np.array(control_points, dtype=float)
+    t = np.linspace(0, 1, segments + 1)[1:, None]
+    if len(p) == 3:
+        return (1 - t) ** 2 * p[0] + 2 * (1 - t) * t * p[1] + t ** 2 * p[2]
+    return ((1 - t) ** 3 * p[0] + 3 * (1 - t) ** 2 * t * p[1]
+            + 3 * (1 - t) * t ** 2 * p[2] + t ** 3 * p[3])
+
+def _arc_points(start, end, rx, ry, rotation, large_arc, sweep):
+    """
+    Flatten an elliptical arc (excluding its start point), converting the SVG
+    endpoint parameterization to a center and angles (SVG 1.1 implementation
+    notes, F.6.5 and F.6.6).
+    """
+    (x1, y1), (x2, y2) = start, end
+    if (x1, y1) == (x2, y2):
+        return np.empty((0, 2))
+    rx, ry = abs(rx), abs(ry)
+    if rx == 0 or ry == 0:
+        return np.array([end], dtype=float)
+
+    phi = np.radians(rotation)
+    cos_phi, sin_phi = np.cos(phi), np.sin(phi)
+    dx, dy = (x1 - x2) / 2, (y1 - y2) / 2
+    x1p = cos_phi * dx + sin_phi * dy
+    y1p = -sin_phi * dx + cos_phi * dy
+
+    # Radii too small to reach the end point are scaled up until they just do
+    radii_scale = (x1p / rx) ** 2 + (y1p / ry) ** 2
+    if radii_scale > 1:
+        rx *= np.sqrt(radii_scale)
+        ry *= np.sqrt(radii_scale)
+
+    numerator = rx ** 2 * ry ** 2 - rx ** 2 * y1p ** 2 - ry ** 2 * x1p ** 2
+    factor = np.sqrt(max(0.0, numerator / (rx ** 2 * y1p ** 2 + ry ** 2 * x1p ** 2)))
+    if large_arc == sweep:
+        factor = -factor
+    cxp = factor * rx * y1p / ry
+    cyp = -factor * ry * x1p / rx
+    cx = cos_phi * cxp - sin_phi * cyp + (x1 + x2) / 2
+    cy = sin_phi * cxp + cos_phi * cyp + (y1 + y2) / 2
+
+    theta1 = np.arctan2((y1p - cyp) / ry, (x1p - cxp) / rx)
+    delta = np.arctan2((-y1p - cyp) / ry, (-x1p - cxp) / rx) - theta1
+    if sweep and delta < 0:
+        delta += 2 * np.pi
+    elif not sweep and delta > 0:
+        delta -= 2 * np.pi
+
+    segments = max(1, int(np.ceil(CURVE_SEGMENTS * abs(delta) / np.pi)))
+    t = theta1 + delta * np.linspace(0, 1, segments + 1)[1:]
+    points = np.column_stack([
+        cx + rx * np.cos(t) * cos_phi - ry * np.sin(t) * sin_phi,
+        cy + rx * np.cos(t) * sin_phi + ry * np.sin(t) * cos_phi
+    ])
+    points[-1] = end
+    return points
+
+def parse_svg_path(d):
+    """
+    Convert an SVG path string into closed polygons.
+
+    Args:
+        d: SVG path data
+
+    Returns:
+        List of (N, 2) numpy arrays, one per subpath
+
+    Raises:
+        ValueError: If the path uses a command other than M, L, H, V, C, S, Q, T, A and Z
+    """
+    tokens = _PATH_TOKEN.findall(d)
+    polygons = []
+    current = []
+    x = y = 0.0
+    start = (0.0, 0.0)
+    last_control = None
+    command = None
+    i = 0
+
+    def numbers(count):
+        nonlocal i
+        values = [float(v) for v in tokens[i:i + count]]
+        if len(values) < count or any(token.isalpha() for token in tokens[i:i + count]):
+            raise ValueError(f'Too few numbers for path command {command}')
+        i += count
+        return values
+
+    def flag():
+        # Arc flags are single digits that may be written without separators ("a5 5 0 0150 0")
+        nonlocal i
+        token = tokens[i] if i < len(tokens) else ''
+        if token[:1] not in ('0', '1'):
+            raise ValueError(f'Invalid arc flag: {token!r}')
+        if len(token) > 1:
+            tokens[i] = token[1:]
+        else:
+            i += 1
+        return token[0] == '1'
+
+    while i < len(tokens):
+        if tokens[i].isalpha():
+            command = tokens[i]
+            i += 1
+            if command in 'Zz':
+                if current:
+                    polygons.append(np.array(current))
+                current = []
+                x, y = start
+                last_control = None
+                continue
+        elif command is None:
+            raise ValueError(f'Path data must start with a command: {d[:20]}')
+
+        relative = command.islower()
+        ox, oy = (x, y) if relative else (0.0, 0.0)
+        upper = command.upper()
+
+        if upper == 'M':
+            if current:
+                polygons.append(np.array(current))
+            x, y = numbers(2)
+            x, y = x + ox, y + oy
+            start = (x, y)
+            current = [(x, y)]
+            # Further coordinate pairs after a moveto are implicit linetos
+            command = 'l' if relative else 'L'
+            last_control = None
+        elif upper == 'L':
+            x, y = numbers(2)
+            x, y = x + ox, y + oy
+            current.append((x, y))
+            last_control = None
+        elif upper == 'H':
+            x = numbers(1)[0] + ox
+            current.append((x, y))
+            last_control = None
+        elif upper == 'V':
+            y = numbers(1)[0] + oy
+            current.append((x, y))
+            last_control = None
+        elif upper in 'CS':
+            if upper == 'C':
+                x1, y1, x2, y2, ex, ey = numbers(6)
+                c1 = (x1 + ox, y1 + oy)
+            else:
+                x2, y2, ex, ey = numbers(4)
+                c1 = (2 * x - last_control[0], 2 * y - last_control[1]) if last_control else (x, y)
+            c2 = (x2 + ox, y2 + oy)
+            end = (ex + ox, ey + oy)
+            current.extend(map(tuple, _bezier_points([(x, y), c1, c2, end])))
+            last_control = c2
+            x, y = end
+        elif upper in 'QT':
+            if upper == 'Q':
+                x1, y1, ex, ey = numbers(4)
+                c1 = (x1 + ox, y1 + oy)
+            else:
+                ex, ey = numbers(2)
+                c1 = (2 * x - last_control[0], 2 * y - last_control[1]) if last_control else (x, y)
+            end = (ex + ox, ey + oy)
+            current.extend(map(tuple, _bezier_points([(x, y), c1, end])))
+            last_control = c1
+            x, y = end
+        elif upper == 'A':
+            rx, ry, rotation = numbers(3)
+            large_arc, sweep = flag(), flag()
+            ex, ey = numbers(2)
+            end = (ex + ox, ey + oy)
+            current.extend(map(tuple, _arc_points((x, y), end, rx, ry, rotation, large_arc, sweep)))
+            last_control = None
+            x, y = end
+        else:
+            raise ValueError(f'Unsupported path command: {command}')
+
+    if current:
+        polygons.append(np.array(current))
+
+    return [polygon for polygon in polygons if len(polygon) >= 3]
+
+def load_svg_shape(path):
+    """Load the outlines and viewBox of an SVG shape file."""
+    root = ET.parse(path).getroot()
+    polygons = []
+
+    for element in root.iter():
+        tag = element.tag.rsplit('}', 1)[-1]
+        if tag == 'path' and element.get('d'):
+            polygons.extend(parse_svg_path(element.get('d')))
+        elif tag in ('polygon', 'polyline') and element.get('points'):
+            values = [float(v) for v in re.split(r'[\s,]+', element.get('points').strip())]
+            polygons.append(np.array(values).reshape(-1, 2))
+
+    view_box = root.get('viewBox')
+    if view_box:
+        view_box = tuple(float(v) for v in re.split(r'[\s,]+', view_box.strip()))
+    else:
+        view_box = (0.0, 0.0, float(root.get('width', 100)), float(root.get('height', 100)))
+
+    return {'polygons': polygons, 'view_box': view_box}
+
+def load_json_shape(path):
+    """Load the outlines and viewBox of a polygon JSON shape file."""
+    with open(path, 'r', encoding='utf-8') as shape_file:
+        data = json.load(shape_file)
+
+    polygons = [np.array(polygon, dtype=float) for polygon in data['polygons']]
+    view_box = data.get('viewBox')
+    if view_box is None:
+        points = np.concatenate(polygons)
+        min_x, min_y = points.min(axis=0)
+        max_x, max_y = points.max(axis=0)
+        view_box = (min_x, min_y, max_x - min_x, max_y - min_y)
+
+    return {'polygons': polygons, 'view_box': tuple(float(v) for v in view_box)}
+
+def discover_catalogue_shapes(directory=CATALOGUE_DIR, reserved_names=()):
+    """
+    Load every shape file in the catalogue directory.
+
+    Args:
+        directory: Directory to scan for .svg and .json shape files
+        reserved_names: Names taken by other shapes (the built-ins); files with
+                        these names are skipped
+
+    Returns:
+        Number of shapes discovered
+    """
+    catalogue_shapes.clear()
+    _mask_cache.clear()
+
+    if not os.path.isdir(directory):
+        return 0
+
+    loaders = {'.svg': load_svg_shape, '.json': load_json_shape}
+    for filename in sorted(os.listdir(directory)):
+        name, extension = os.path.splitext(filename)
+        loader = loaders.get(extension.lower())
+        if loader is None:
+            continue
+        if name in reserved_names:
+            print(f"Skipping catalogue shape {filename}: '{name}' is a built-in shape, rename the file")
+            continue
+
+        path = os.path.join(directory, filename)
+        try:
+            shape = loader(path)
+            if shape['polygons']:
+                with open(path, 'rb') as shape_file:
+                    shape['digest'] = hashlib.sha1(shape_file.read()).hexdigest()
+                catalogue_shapes[name] = shape
+        except Exception as e:
+            print(f"Error loading catalogue shape {filename}: {e}")
+
+    return len(catalogue_shapes)
+
+def rasterize_polygons(polygons, view_box, size):
+    """
+    Rasterize outlines onto a size x size grid with the even-odd fill rule.
+    A cell is valid when its center lies inside the filled outline.
+
+    Args:
+        polygons: List of (N, 2) numpy arrays in viewBox coordinates
+        view_box: (min_x, min_y, width, height) mapped onto the grid
+        size: Grid size
+
+    Returns:
+        2D numpy boolean array
+    """
+    min_x, min_y, width, height = view_box
+
+    # Preserve the aspect ratio and center the shape on the square grid
+    scale = size / max(width, height)
+    offset_x = (size - width * scale) / 2
+    offset_y = (size - height * scale) / 2
+
+    centers = np.arange(size) + 0.5
+    cell_x = centers[None, :]
+    cell_y = centers[:, None]
+    inside = np.zeros((size, size), dtype=bool)
+
+    for polygon in polygons:
+        points = (polygon - (min_x, min_y)) * scale + (offset_x, offset_y)
+        x1, y1 = points[:, 0], points[:, 1]
+        x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+
+        # Even-odd rule: toggle for every edge crossed by a ray to the right of the cell center
+        for ax, ay, bx, by in zip(x1, y1, x2, y2):
+            if ay == by:
+                continue
+            crosses = (ay > cell_y) != (by > cell_y)
+            intersect_x = ax + (cell_y - ay) * (bx - ax) / (by - ay)
+            inside ^= crosses & (cell_x < intersect_x)
+
+    return inside
+
+def get_catalogue_mask(name, size):
+    """
+    Get a catalogue shape mask, rasterizing it on first use at this size.
+
+    Args:
+        name: Shape name (the file name without extension)
+        size: Grid size
+
+    Returns:
+        2D list of booleans, or None if the shape is not in the catalogue
+    """
+    shape = catalogue_shapes.get(name)
+    if shape is None:
+        return None
+
+    key = (name, size)
+    if key not in _mask_cache:
+        _mask_cache[key] = rasterize_polygons(shape['polygons'], shape['view_box'], size).tolist()
+
+    # Copy the rows so callers can't modify the cached mask
+    return [row[:] for row in _mask_cache[key]]
+
+def get_catalogue_shape_digest(name):
+    """
+    Get a hash of a catalogue shape's file.
+
+    Returns:
+        Hex digest, or None if the shape is not in the catalogue
+    """
+    shape = catalogue_shapes.get(name)
+    return shape['digest'] if shape else None
+
+def list_catalogue_shapes():
+    """
+    Get list of available catalogue shapes.
+
+    Returns:
+        List of catalogue shape names
+    """
+    return list(catalogue_shapes.keys())
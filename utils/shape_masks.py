@@ -1,3 +1,6 @@
+from .shape_bundle import get_bundled_mask, get_bundled_stats, get_shape_bundle_digest
+from .shape_catalogue import get_catalogue_mask, get_catalogue_shape_digest, discover_catalogue_shapes
+
 def get_shape_mask(shape, size=15):
     """
     Get a boolean mask for the specified shape.
@@ -10,49 +13,60 @@ def get_shape_mask(shape, size=15):
         2D list of booleans indicating valid positions
     """
     
-    # Check if it's a custom shape first
-    custom_mask = get_custom_shape(shape)
+    # Check if it's a custom shape first (served from its cached mask pyramid)
+    custom_mask = get_custom_shape(shape, size)
     if custom_mask is not None:
-        # Resize custom mask to target size if needed
-        if len(custom_mask) != size or len(custom_mask[0]) != size:
-            # Simple resize by sampling or padding
-            return resize_mask(custom_mask, size)
         return custom_mask
     
-    # Built-in shapes
-    if shape == 'square':
-        return create_square_mask(size)
-    elif shape == 'circle':
-        return create_circle_mask(size)
-    elif shape == 'heart':
-        return create_heart_mask(size)
-    elif shape == 'star':
-        return create_star_mask(size)
-    elif shape == 'diamond':
-        return create_diamond_mask(size)
-    elif shape == 'triangle':
-        return create_triangle_mask(size)
-    elif shape == 'hexagon':
-        return create_hexagon_mask(size)
-    elif shape == 'dog':
-        return create_dog_mask(size)
-    elif shape == 'cat':
-        return create_cat_mask(size)
-    elif shape == 'fish':
-        return create_fish_mask(size)
-    elif shape == 'butterfly':
-        return create_butterfly_mask(size)
-    elif shape == 'flower':
-        return create_flower_mask(size)
-    elif shape == 'tree':
-        return create_tree_mask(size)
-    elif shape == 'house':
-        return create_house_mask(size)
-    elif shape == 'car':
-        return create_car_mask(size)
-    else:
-        # Default to square
-        return create_square_mask(size)
+    # Precompiled built-in shapes (see build_shape_bundle.py)
+    bundled_mask = get_bundled_mask(shape, size)
+    if bundled_mask is not None:
+        return bundled_mask
+    
+    if shape in BUILTIN_SHAPE_BUILDERS:
+        return build_builtin_mask(shape, size)
+    
+    # Shapes from the SVG/JSON shape catalogue (see utils/shape_catalogue.py)
+    catalogue_mask = get_catalogue_mask(shape, size)
+    if catalogue_mask is not None:
+        return catalogue_mask
+    
+    # Default to square
+    return create_square_mask(size)
+
+def get_shape_positions(shape, mask):
+    """
+    Get the usable cells of a shape's mask, in row-major order.
+    
+    Args:
+        shape: Name of the shape the mask came from
+        mask: The mask get_shape_mask returned for it
+    
+    Returns:
+        Sequence of (row, col) tuples (precomputed in the shape bundle for built-in shapes)
+    """
+    
+    # A custom shape may reuse a built-in name; its own mask wins, as in get_shape_mask
+    if shape not in custom_shapes:
+        stats = get_bundled_stats(shape, len(mask))
+        if stats is not None:
+            return stats['positions']
+    
+    return [(i, j) for i in range(len(mask)) for j in range(len(mask[0])) if mask[i][j]]
+
+def build_builtin_mask(shape, size):
+    """
+    Build a built-in shape mask from its constructor.
+    
+    Args:
+        shape: Name of a built-in shape (unknown names fall back to square)
+        size: Base size of the grid
+    
+    Returns:
+        2D list of booleans indicating valid positions
+    """
+    
+    return BUILTIN_SHAPE_BUILDERS.get(shape, create_square_mask)(size)
 
 def create_square_mask(size):
     """Create a square mask."""
@@ -395,15 +409,54 @@ def create_car_mask(size):
     
     return mask
 
+# Built-in shape constructors by name
+BUILTIN_SHAPE_BUILDERS = {
+    'square': create_square_mask,
+    'circle': create_circle_mask,
+    'heart': create_heart_mask,
+    'star': create_star_mask,
+    'diamond': create_diamond_mask,
+    'triangle': create_triangle_mask,
+    'hexagon': create_hexagon_mask,
+    'dog': create_dog_mask,
+    'cat': create_cat_mask,
+    'fish': create_fish_mask,
+    'butterfly': create_butterfly_mask,
+    'flower': create_flower_mask,
+    'tree': create_tree_mask,
+    'house': create_house_mask,
+    'car': create_car_mask
+}
+
+# Names of the built-in shapes (also the shapes precompiled into the shape bundle)
+BUILTIN_SHAPES = tuple(BUILTIN_SHAPE_BUILDERS)
+
+# Discover the shape catalogue once at startup (here, so files can't shadow a built-in name)
+discover_catalogue_shapes(reserved_names=BUILTIN_SHAPES)
+
 # Custom drawing functionality
 import base64
+import hashlib
 from PIL import Image, ImageOps
 import io
 import numpy as np
 
-# Storage for custom shapes
+# Storage for custom shapes: name -> {'mask': high-resolution numpy mask, 'pyramid': {size: mask}, 'digest': str}
 custom_shapes = {}
 
+# Custom shapes are rasterized once at this resolution (the largest grid we serve);
+# smaller sizes are derived from it lazily and cached in the shape's pyramid
+CUSTOM_SHAPE_RESOLUTION = 60
+
+# Limits for uploaded shape images
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024  # 10 MB encoded
+MAX_UPLOAD_PIXELS = 60 * 1000 * 1000  # 60 megapixels decoded
+
+# Limits for drawn shapes (stroke polylines posted from the drawing canvas)
+MAX_DRAWING_STROKES = 500
+MAX_DRAWING_POINTS = 20000  # Points across all strokes
+MAX_CANVAS_SIZE = 4096      # Pixels per side
+
 def flood_fill_shape(border_mask, size):
     """
     Use flood fill algorithm to fill the interior of a shape defined by borders.
@@ -566,28 +619,218 @@ def process_canvas_to_mask(canvas_data, size=15):
         # Return a simple square mask as fallback
         return [[True for _ in range(size)] for _ in range(size)]
 
+def process_strokes_to_mask(strokes, size=15, canvas_width=200, canvas_height=200):
+    """
+    Rasterize stroke polylines from the drawing canvas directly onto the grid.
+    Treats the strokes as a border and fills the interior area, like
+    process_canvas_to_mask but without decoding and resampling a PNG.
+    
+    Args:
+        strokes: List of strokes, each {'width': brush width, 'points': [x0, y0, x1, y1, ...]}
+                 in canvas pixel coordinates
+        size: Target grid size
+        canvas_width: Width of the drawing canvas in pixels
+        canvas_height: Height of the drawing canvas in pixels
+    
+    Returns:
+        2D list of booleans indicating valid positions
+    
+    Raises:
+        ValueError: If the strokes or canvas size are invalid or over the limits
+    """
+    strokes, canvas_width, canvas_height = read_drawing_strokes(strokes, canvas_width, canvas_height)
+    
+    try:
+        border_mask = np.zeros((size, size), dtype=bool)
+        scale_x = size / canvas_width
+        scale_y = size / canvas_height
+        
+        for points, width in strokes:
+            if len(points) == 0:
+                continue
+            
+            # Convert to grid coordinates
+            points = points * (scale_x, scale_y)
+            # At least half a cell, so diagonal strokes still form a closed 4-connected border
+            half_width = max(0.5, width * max(scale_x, scale_y) / 2)
+            
+            # Sample each segment at quarter-cell steps so no crossed cell is skipped
+            samples = [points[:1]]
+            for start, end in zip(points[:-1], points[1:]):
+                steps = max(1, int(np.ceil(np.hypot(*(end - start)) * 4)))
+                t = np.linspace(0, 1, steps + 1)[1:, None]
+                samples.append(start + (end - start) * t)
+            samples = np.concatenate(samples)
+            
+            # Mark every cell covered by the brush around each sample
+            rows_min = np.clip(np.floor(samples[:, 1] - half_width), 0, size - 1).astype(int)
+            rows_max = np.clip(np.floor(samples[:, 1] + half_width), 0, size - 1).astype(int)
+            cols_min = np.clip(np.floor(samples[:, 0] - half_width), 0, size - 1).astype(int)
+            cols_max = np.clip(np.floor(samples[:, 0] + half_width), 0, size - 1).astype(int)
+            # Neighbouring samples mostly cover the same cells; paint each box once
+            # (boxes packed into one integer each, which is much faster to deduplicate)
+            keys = np.unique(((rows_min * size + rows_max) * size + cols_min) * size + cols_max)
+            keys, c1s = np.divmod(keys, size)
+            keys, c0s = np.divmod(keys, size)
+            r0s, r1s = np.divmod(keys, size)
+            for r0, r1, c0, c1 in zip(r0s, r1s, c0s, c1s):
+                border_mask[r0:r1 + 1, c0:c1 + 1] = True
+        
+        # If no border detected, return a simple filled square
+        if not np.any(border_mask):
+            return [[True for _ in range(size)] for _ in range(size)]
+        
+        # Use flood fill to fill the interior of the shape
+        filled_mask = flood_fill_shape(border_mask, size)
+        
+        return filled_mask.tolist()
+        
+    except Exception as e:
+        print(f"Error processing stroke data: {e}")
+        # Return a simple square mask as fallback
+        return [[True for _ in range(size)] for _ in range(size)]
+
+def read_drawing_strokes(strokes, canvas_width, canvas_height):
+    """
+    Validate stroke data from the drawing canvas.
+    
+    Args:
+        strokes: List of {'width', 'points': [x0, y0, x1, y1, ...]} dicts
+        canvas_width: Width of the drawing canvas in pixels
+        canvas_height: Height of the drawing canvas in pixels
+    
+    Returns:
+        (list of (points as an (n, 2) array clamped to the canvas, brush width), canvas width, canvas height)
+    
+    Raises:
+        ValueError: If anything is malformed, non-finite or over the limits
+    """
+    try:
+        canvas_width = float(canvas_width)
+        canvas_height = float(canvas_height)
+    except (TypeError, ValueError):
+        raise ValueError('Invalid canvas size')
+    if not (1 <= canvas_width <= MAX_CANVAS_SIZE and 1 <= canvas_height <= MAX_CANVAS_SIZE):
+        raise ValueError(f'Canvas size must be between 1 and {MAX_CANVAS_SIZE} pixels')
+    
+    if not isinstance(strokes, list):
+        raise ValueError('Strokes must be a list')
+    if len(strokes) > MAX_DRAWING_STROKES:
+        raise ValueError(f'A drawing can have at most {MAX_DRAWING_STROKES} strokes')
+    
+    result = []
+    total_points = 0
+    for stroke in strokes:
+        if not isinstance(stroke, dict):
+            raise ValueError('Each stroke must be an object')
+        try:
+            points = np.asarray(stroke.get('points', []), dtype=float).reshape(-1, 2)
+            width = float(stroke.get('width', 3))
+        except (TypeError, ValueError):
+            raise ValueError('Stroke points must be a flat list of x, y numbers')
+        
+        total_points += len(points)
+        if total_points > MAX_DRAWING_POINTS:
+            raise ValueError(f'A drawing can have at most {MAX_DRAWING_POINTS} points')
+        if not np.all(np.isfinite(points)) or not np.isfinite(width) or width <= 0:
+            raise ValueError('Stroke points and widths must be finite')
+        
+        # Points off the canvas are drawn on its edge (and can't make segments arbitrarily long)
+        points = np.clip(points, 0, (canvas_width, canvas_height))
+        result.append((points, min(width, max(canvas_width, canvas_height))))
+    
+    return result, canvas_width, canvas_height
+
+def downsample_mask(mask, target_size):
+    """
+    Derive a smaller mask by area coverage: a cell is valid when at least
+    half of the high-resolution pixels it covers are valid.
+    
+    Args:
+        mask: 2D numpy boolean array
+        target_size: Target size for the mask
+    
+    Returns:
+        2D list of booleans
+    """
+    image = Image.fromarray(mask.astype(np.uint8) * 255)
+    image = image.resize((target_size, target_size), Image.Resampling.BOX)
+    return (np.array(image) >= 128).tolist()
+
 def add_custom_shape(name, mask):
     """
     Add a custom shape to the available shapes.
     
     Args:
         name: Name for the custom shape
-        mask: Boolean mask for the shape
+        mask: Boolean mask for the shape, ideally at CUSTOM_SHAPE_RESOLUTION
     """
-    custom_shapes[name] = mask
+    mask = np.array(mask, dtype=bool)
+    custom_shapes[name] = {
+        'mask': mask,
+        'pyramid': {},
+        # Identifies this exact outline, so caches keyed by shape name notice a redraw
+        'digest': hashlib.sha1(str(mask.shape).encode() + np.packbits(mask).tobytes()).hexdigest()
+    }
     print(f"Added custom shape: {name}")
 
-def get_custom_shape(name):
+def get_custom_shape(name, size=None):
     """
     Get a custom shape mask by name.
     
     Args:
         name: Name of the custom shape
+        size: Grid size to return; None returns the stored full-resolution mask
     
     Returns:
         Boolean mask or None if not found
     """
-    return custom_shapes.get(name)
+    shape = custom_shapes.get(name)
+    if shape is None:
+        return None
+    
+    if size is None:
+        return shape['mask'].tolist()
+    
+    # Derive each served size once from the full-resolution mask
+    pyramid = shape['pyramid']
+    if size not in pyramid:
+        if size == len(shape['mask']):
+            pyramid[size] = shape['mask'].tolist()
+        elif size < len(shape['mask']):
+            pyramid[size] = downsample_mask(shape['mask'], size)
+        else:
+            pyramid[size] = resize_mask(shape['mask'].tolist(), size)
+    
+    # Copy the rows so callers can't modify the cached mask
+    return [row[:] for row in pyramid[size]]
+
+def get_custom_shape_digest(name):
+    """
+    Get a hash of a custom shape's mask.
+    
+    Returns:
+        Hex digest, or None if the shape is not a custom shape
+    """
+    shape = custom_shapes.get(name)
+    return shape['digest'] if shape else None
+
+def get_shape_digest(name):
+    """
+    Identify the mask a shape name currently resolves to, in the same order as
+    get_shape_mask: a custom shape's mask hash, the shape bundle's hash for a
+    built-in shape, or a catalogue shape's file hash.
+    
+    Returns:
+        Digest string, or None for names that fall back to the square
+    """
+    if name in custom_shapes:
+        return get_custom_shape_digest(name)
+    
+    if name in BUILTIN_SHAPE_BUILDERS:
+        return get_shape_bundle_digest()
+    
+    return get_catalogue_shape_digest(name)
 
 def list_custom_shapes():
     """
@@ -626,25 +869,88 @@ def clear_all_custom_shapes():
     print(f"Cleared {count} custom shapes")
     return count
 
+def read_upload_bytes(image_file, max_bytes=MAX_UPLOAD_BYTES):
+    """
+    Read an uploaded file, refusing anything larger than max_bytes.
+    
+    Args:
+        image_file: Uploaded file object
+        max_bytes: Maximum accepted size in bytes
+    
+    Returns:
+        File contents as bytes
+    
+    Raises:
+        ValueError: If the file is too large
+    """
+    data = image_file.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise ValueError(f'Image is too large (limit is {max_bytes // (1024 * 1024)} MB)')
+    return data
+
+def open_upload_image(image_data, size=15):
+    """
+    Open uploaded image bytes as a small grayscale image, decoding as little as possible.
+    
+    Checks the pixel count from the header before decoding, uses JPEG draft mode to
+    decode at a reduced scale, and shrinks with Image.reduce before the final resample.
+    
+    Args:
+        image_data: Encoded image bytes
+        size: Target grid size
+    
+    Returns:
+        Grayscale PIL image of size x size
+    
+    Raises:
+        ValueError: If the image has too many pixels
+    """
+    # Reads the header only. The pixel limit is checked here rather than through
+    # Pillow's process-wide MAX_IMAGE_PIXELS (which still refuses far larger images)
+    try:
+        image = Image.open(io.BytesIO(image_data))
+    except Image.DecompressionBombError as e:
+        raise ValueError(f'Image has too many pixels: {e}')
+    
+    width, height = image.size
+    if width * height > MAX_UPLOAD_PIXELS:
+        raise ValueError(f'Image has too many pixels ({width}x{height})')
+    
+    # Work at a few pixels per grid cell so the final LANCZOS pass still has detail
+    working_size = size * 8
+    
+    # JPEG: let the decoder scale down by 1/2, 1/4 or 1/8 while decoding
+    image.draft('L', (working_size, working_size))
+    
+    # Early integer downscale before converting/resampling the full image
+    factor = min(image.size) // working_size
+    if factor > 1 and image.mode in ('L', 'LA', 'RGB', 'RGBA'):
+        image = image.reduce(factor)
+    
+    # Convert to grayscale and resize
+    image = image.convert('L')
+    return image.resize((size, size), Image.Resampling.LANCZOS)
+
 def process_uploaded_image_to_mask(image_file, size=15):
     """
     Process an uploaded image file to create a shape mask.
     Treats dark areas as borders and fills the interior.
     
     Args:
-        image_file: Uploaded file object
+        image_file: Uploaded file object or the encoded image bytes
         size: Target grid size
     
     Returns:
         2D list of booleans indicating valid positions
+    
+    Raises:
+        ValueError: If the upload exceeds the byte or pixel limits
     """
+    image_data = image_file if isinstance(image_file, bytes) else read_upload_bytes(image_file)
+    
     try:
         # Open and process the image
-        image = Image.open(image_file)
-        
-        # Convert to grayscale and resize
-        image = image.convert('L')
-        image = image.resize((size, size), Image.Resampling.LANCZOS)
+        image = open_upload_image(image_data, size)
         
         # Apply automatic thresholding to separate foreground from background
         image = ImageOps.autocontrast(image)
@@ -669,6 +975,8 @@ def process_uploaded_image_to_mask(image_file, size=15):
         
         return mask_list
         
+    except ValueError:
+        raise
     except Exception as e:
         print(f"Error processing uploaded image: {e}")
         # Return a simple square mask as fallback
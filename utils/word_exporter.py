@@ -1,11 +1,76 @@
 from docx import Document
 from docx.shared import Inches, Pt, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.enum.table import WD_ALIGN_VERTICAL, WD_TABLE_ALIGNMENT
+from docx.enum.table import WD_TABLE_ALIGNMENT
+from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
 from docx.oxml.shared import OxmlElement, qn
+from docx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from docx.opc.oxml import CT_Relationships
+from copy import deepcopy
+from lxml import etree
+from xml.sax.saxutils import escape
+from .puzzle_generator import get_placement_cells
+from .font_registry import get_word_font
+from .layout import DOCX_MARGINS, get_shape_class, plan_puzzle_layout, get_booklet_pages
+from collections import OrderedDict
 import os
+import threading
+import zipfile
 
-def export_to_word(title, subject, grid, word_list, font_name, filename, theme='modern', shape='square'):
+# Cell shading for placed words on answer-key pages
+ANSWER_HIGHLIGHT_COLOR = 'fde68a'
+
+# BASE DOCUMENTS
+# Page size, margins, styles and footer instructions are the same for every
+# export with the same (theme, shape class, font). They are built once into a
+# parsed template kept in memory, and each export deep-copies it (the part XML
+# trees with the package around them, no zip or XML parsing) and fills in the
+# title, word list and grid. Templates are never modified after they are
+# cached. The cache is an LRU: font names come from the request and unknown
+# ones are passed through to Word, so it must stay bounded.
+BASE_DOCUMENT_CACHE_MAX_ENTRIES = 64
+_base_document_cache = OrderedDict()
+_base_document_lock = threading.Lock()
+
+# Themes with their own colors (anything else renders like 'modern')
+WORD_THEMES = ('modern', 'cozy', 'playful')
+
+# PUZZLE GRID TEMPLATES
+# The grid table is written as one WordprocessingML string and parsed once,
+# instead of being built cell by cell through python-docx (table.cell() rebuilds
+# the cell matrix on every call). Fonts, size, color and alignment come from a
+# shared paragraph style and the white background from the table properties,
+# so each cell only carries its width, its letter and (on answer keys) shading.
+PUZZLE_LETTER_STYLE = 'Puzzle Letter'
+
+_PUZZLE_TABLE_START_XML = (
+    '<w:tbl {nsdecls}><w:tblPr>'
+    '<w:tblStyle w:val="TableGrid"/><w:tblW w:type="auto" w:w="0"/><w:jc w:val="center"/>'
+    '<w:shd w:val="clear" w:color="auto" w:fill="{fill}"/>'
+    '<w:tblLook w:val="04A0" w:firstRow="1" w:lastRow="0" w:firstColumn="1" w:lastColumn="0" '
+    'w:noHBand="0" w:noVBand="1"/>'
+    '</w:tblPr><w:tblGrid>'
+)
+_PUZZLE_GRID_COL_XML = '<w:gridCol w:w="{width}"/>'
+_PUZZLE_ROW_START_XML = '<w:tr><w:trPr><w:trHeight w:val="{height}"/></w:trPr>'
+_PUZZLE_CELL_XML = '<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{width}"/>{shading}</w:tcPr>'
+_PUZZLE_HIGHLIGHT_XML = f'<w:shd w:val="clear" w:color="auto" w:fill="{ANSWER_HIGHLIGHT_COLOR}"/>'
+_PUZZLE_PARAGRAPH_XML = '<w:p><w:pPr><w:pStyle w:val="{style}"/></w:pPr>'
+_PUZZLE_RUN_XML = '<w:r><w:t>{text}</w:t></w:r>'
+
+# Table-level background and zero cell margins for layout tables
+_TABLE_DEFAULTS_XML = (
+    '<w:tblPr {nsdecls}>'
+    '<w:shd w:val="clear" w:color="auto" w:fill="{fill}"/>'
+    '<w:tblCellMar><w:top w:w="0" w:type="dxa"/><w:left w:w="0" w:type="dxa"/>'
+    '<w:bottom w:w="0" w:type="dxa"/><w:right w:w="0" w:type="dxa"/></w:tblCellMar>'
+    '</w:tblPr>'
+)
+
+def export_to_word(title, subject, grid, word_list, font_name, filename, theme='modern', shape='square',
+                   placements=None, answer_key=False):
     """
     Export puzzle to Word document with proper formatting for 6.5" x 9" page.
     
@@ -17,116 +82,317 @@ def export_to_word(title, subject, grid, word_list, font_name, filename, theme='
     - Centered content on page
     - White background throughout
     - Proper instruction width constraints
+    
+    With answer_key=True and the generator's placements, a second page shows
+    the solution with the cells of every placed word shaded.
+    
+    filename may be a path or a writable binary stream (e.g. BytesIO).
     """
     
     # Map non-standard fonts to Windows-compatible fonts
-    font_mapping = {
-        'Inter': 'Arial',
-        'Inter (Modern)': 'Arial'
-    }
-    font_name = font_mapping.get(font_name, font_name)
+    font_name = get_word_font(font_name)
     
     # Get theme colors
     theme_colors = get_theme_colors(theme)
     
-    # Create new document
+    # Copy of the prepared base document (page setup, styles, footer instructions)
+    doc = get_base_document(theme, get_shape_class(shape), font_name)
+    
+    # Add title and subtitle to the header (for all shapes)
+    if title or subject:
+        add_title_and_subject_to_header(doc, title, subject, font_name, theme_colors)
+    
+    add_puzzle_page(doc, grid, word_list, font_name, theme_colors, shape)
+    
+    # Solution page, shaded straight from the placement data (no search over the grid)
+    if answer_key and placements:
+        doc.add_page_break()
+        answer_paragraph = doc.add_paragraph()
+        answer_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        answer_run = answer_paragraph.add_run("Answer Key")
+        answer_run.font.name = font_name
+        answer_run.font.size = Pt(16)
+        answer_run.bold = True
+        highlight_cells = {cell for placement in placements for cell in get_placement_cells(placement)}
+        add_puzzle_page(doc, grid, word_list, font_name, theme_colors, shape, highlight_cells)
+    
+    # Save document (paths are normalized, streams are written as-is)
+    if isinstance(filename, (str, os.PathLike)):
+        filename = os.path.abspath(filename)
+        print(f"DEBUG word_exporter: Attempting to save to: {filename}")
+        print(f"DEBUG word_exporter: Directory exists: {os.path.exists(os.path.dirname(filename))}")
+    doc.save(filename)
+
+def build_base_document(theme, shape_class, font_name):
+    """
+    Build the parts of a puzzle document that don't depend on the puzzle.
+    
+    Args:
+        theme: Theme name
+        shape_class: 'square' or 'shaped'
+        font_name: Word font name
+    
+    Returns:
+        python-docx Document (cached as a template by get_base_document)
+    """
+    theme_colors = get_theme_colors(theme)
     doc = Document()
     
     # Set custom 6.5" x 9" page size and conditional margins
+    left_margin, right_margin, top_margin, bottom_margin = DOCX_MARGINS[shape_class]
     for section in doc.sections:
         section.page_width = Inches(6.5)   # 6.5" width
         section.page_height = Inches(9.0)  # 9" height
-        
-        if shape == 'square':
-            # Square shape: reduced margins (50% decrease on left/right)
-            section.top_margin = Inches(1.5)   # 1.5" top margin
-            section.bottom_margin = Inches(1.0)  # 1.0" bottom margin
-            section.left_margin = Inches(0.25)   # 0.25" left margin (50% of 0.5")
-            section.right_margin = Inches(0.375)  # 0.375" right margin (50% of 0.75")
-        else:
-            # Non-square shapes: equal margins for maximum wordlist space
-            section.top_margin = Inches(0.3)   # Minimal margins for better space utilization
-            section.bottom_margin = Inches(0.3)
-            section.left_margin = Inches(0.3)  # Equal left margin
-            section.right_margin = Inches(0.3)  # Equal right margin (same as left)
+        section.top_margin = Inches(top_margin)
+        section.bottom_margin = Inches(bottom_margin)
+        section.left_margin = Inches(left_margin)
+        section.right_margin = Inches(right_margin)
     
     # Set document background to white by setting paragraph styles
     doc.styles['Normal'].font.color.rgb = RGBColor.from_string('000000')  # Black text
     
-    # Add title and subtitle to the header (for all shapes)
-    if title or subject:
-        add_title_and_subject_to_header(doc, title, subject, font_name, theme_colors)
-    
-    # Create main table with wordlist, spacer, and puzzle
-    if shape == 'square':
-        # Square shapes: 3 columns (wordlist, spacer, puzzle) for double spacing
-        main_table = doc.add_table(rows=1, cols=3)
-        main_table.alignment = WD_TABLE_ALIGNMENT.CENTER
-        left_cell = main_table.cell(0, 0)    # Wordlist
-        spacer_cell = main_table.cell(0, 1)  # Spacer
-        right_cell = main_table.cell(0, 2)   # Puzzle
+    # Conditional instructions placement based on shape
+    if shape_class == 'square':
+        # For square shapes: instructions go in footer (left aligned)
+        add_instructions_to_footer(doc, font_name, theme_colors)
     else:
-        # Non-square shapes: 3 columns (wordlist, spacer, puzzle) for proper spacing
-        main_table = doc.add_table(rows=1, cols=3)
-        main_table.alignment = WD_TABLE_ALIGNMENT.CENTER
-        left_cell = main_table.cell(0, 0)    # Wordlist
-        spacer_cell = main_table.cell(0, 1)  # Spacer
-        right_cell = main_table.cell(0, 2)   # Puzzle
+        # For non-square shapes: instructions go in footer (same as PDF format)
+        add_instructions_to_footer_for_non_square(doc, font_name, theme_colors)
     
-    if shape == 'square':
-        # Square shape: with double spacing between columns
-        left_cell.width = Inches(2.5)   # Wordlist width for square shapes
-        spacer_cell.width = Inches(0.4)  # Double spacing for square shapes (2x larger)
-        right_cell.width = Inches(2.35)  # Puzzle width for square shapes (reduced to accommodate spacer)
-    else:
-        # Non-square shapes: massive wordlist width with minimal spacing
-        left_cell.width = Inches(5.1)   # Massive wordlist width for elderly users
-        spacer_cell.width = Inches(0.15)  # Minimal spacer for visual separation
-        right_cell.width = Inches(0.65)  # Adequate puzzle column space
-    
-    # Set table background to white and reduce padding
-    for row in main_table.rows:
-        for cell in row.cells:
-            set_cell_background(cell, 'ffffff')
-            # Reduce cell padding to maximize usable space
-            cell.vertical_alignment = WD_ALIGN_VERTICAL.TOP
-            # Set minimal margins for cell content
-            cell._tc.get_or_add_tcPr().append(OxmlElement('w:tcMar'))
-            for margin_type in ['top', 'bottom', 'left', 'right']:
-                margin = OxmlElement(f'w:{margin_type}')
-                margin.set(qn('w:w'), '0')
-                margin.set(qn('w:type'), 'dxa')
-                cell._tc.get_or_add_tcPr().find(qn('w:tcMar')).append(margin)
+    return doc
+
+def get_base_document(theme, shape_class, font_name):
+    """
+    Get a fresh copy of the base document for (theme, shape class, font).
+    
+    The base is built once per process and kept as a parsed template; each
+    call returns an independent deep copy of it.
+    
+    Returns:
+        python-docx Document ready for the title, word list and grid
+    """
+    # Unknown themes share the default theme's entry
+    if theme not in WORD_THEMES:
+        theme = 'modern'
+    
+    key = (theme, shape_class, font_name)
+    with _base_document_lock:
+        template = _base_document_cache.get(key)
+        if template is not None:
+            _base_document_cache.move_to_end(key)
+    
+    if template is None:
+        template = build_base_document(theme, shape_class, font_name)
+        with _base_document_lock:
+            _base_document_cache[key] = template
+            while len(_base_document_cache) > BASE_DOCUMENT_CACHE_MAX_ENTRIES:
+                _base_document_cache.popitem(last=False)
+    return deepcopy(template)
+
+def export_workbook_docx(puzzles, font_name, filename, theme='modern', answer_keys=False, progress=None):
+    """
+    Export many puzzles into one Word workbook, one puzzle per section.
+    
+    Pages are laid out with the same code as export_to_word on a single scratch
+    document, and each page's XML is written to word/document.xml and then
+    dropped, so memory stays flat however many puzzles there are. Sections
+    share the styles and one footer per shape class; each section gets its own
+    small header part for its title.
+    
+    Args:
+        puzzles: List of dicts with 'title', 'subject', 'grid', 'words', 'shape'
+                 and (for answer keys) the generator's 'placements'
+        font_name: Font for all pages
+        filename: Output path or writable binary stream
+        theme: Color theme
+        answer_keys: Whether to append a solution page for every puzzle
+        progress: Optional callback(pages_rendered, total_pages), called as each page is written
+    """
+    if not puzzles:
+        raise ValueError('No puzzles to export')
+    
+    font_name = get_word_font(font_name)
+    theme_colors = get_theme_colors(theme)
+    pages = get_booklet_pages(puzzles, answer_keys)
+    shape_classes = list(dict.fromkeys(get_shape_class(page.get('shape', 'square')) for page in pages))
+    
+    # Every page is laid out on this document; its other parts are copied as-is
+    scratch = get_base_document(theme, shape_classes[0], font_name)
+    document_part = scratch.part
+    styles_part = document_part.part_related_by(RT.STYLES)
+    body = scratch.element.body
+    
+    # Start of word/document.xml, up to and including <w:body>
+    document_xml = etree.tostring(scratch.element, encoding='UTF-8', xml_declaration=True, standalone=True)
+    document_start = document_xml[:document_xml.index(b'<w:body>') + len(b'<w:body>')]
+    
+    # Create the header part once; each page resets it to this content before adding its title
+    header = scratch.sections[0].header._element
+    header_template = [deepcopy(child) for child in header]
+    
+    # One footer (and section properties) per shape class, from that class's base document
+    footer_numbers = {}
+    footers = {}
+    section_templates = {}
+    for index, shape_class in enumerate(shape_classes, 1):
+        base = scratch if shape_class == shape_classes[0] else get_base_document(theme, shape_class, font_name)
+        footer_numbers[shape_class] = index
+        footers[shape_class] = etree.tostring(base.sections[0].footer._element, encoding='UTF-8',
+                                              xml_declaration=True, standalone=True)
+        sectPr = deepcopy(base.sections[0]._sectPr)
+        for reference in sectPr.findall(qn('w:headerReference')) + sectPr.findall(qn('w:footerReference')):
+            sectPr.remove(reference)
+        footer_reference = OxmlElement('w:footerReference')
+        footer_reference.set(qn('w:type'), 'default')
+        footer_reference.set(qn('r:id'), f'rIdFooter{index}')
+        sectPr.insert(0, footer_reference)
+        section_templates[shape_class] = sectPr
+    
+    # Parts written separately below
+    skipped_reltypes = (RT.HEADER, RT.FOOTER)
+    copied_parts = [part for part in scratch.part.package.iter_parts()
+                    if part is not document_part and part is not styles_part
+                    and part.content_type not in (CT.WML_HEADER, CT.WML_FOOTER)]
+    
+    if isinstance(filename, (str, os.PathLike)):
+        filename = os.path.abspath(filename)
+    
+    with zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED) as package:
+        package.writestr('[Content_Types].xml', build_workbook_content_types(
+            copied_parts + [document_part, styles_part], len(pages), len(shape_classes)))
+        package.writestr('_rels/.rels', scratch.part.package.rels.xml)
+        
+        for part in copied_parts:
+            package.writestr(part.partname.membername, part.blob)
+            if part.rels:
+                package.writestr(part.partname.rels_uri.membername, part.rels.xml)
+        
+        for shape_class in shape_classes:
+            package.writestr(f'word/footer{footer_numbers[shape_class]}.xml', footers[shape_class])
+        
+        # Every section gets its own header, even an empty one (otherwise it would inherit the previous title)
+        for index, page in enumerate(pages, 1):
+            header[:] = [deepcopy(child) for child in header_template]
+            add_title_and_subject_to_header(scratch, page.get('title', ''), page.get('subject', ''),
+                                            font_name, theme_colors)
+            package.writestr(f'word/header{index}.xml',
+                             etree.tostring(header, encoding='UTF-8', xml_declaration=True, standalone=True))
+        
+        # Document relationships: the base document's, minus its header/footer, plus ours
+        relationships = CT_Relationships.new()
+        for rel in document_part.rels.values():
+            if rel.reltype not in skipped_reltypes:
+                relationships.add_rel(rel.rId, rel.reltype, rel.target_ref, rel.is_external)
+        for shape_class in shape_classes:
+            number = footer_numbers[shape_class]
+            relationships.add_rel(f'rIdFooter{number}', RT.FOOTER, f'footer{number}.xml', False)
+        for index in range(1, len(pages) + 1):
+            relationships.add_rel(f'rIdHeader{index}', RT.HEADER, f'header{index}.xml', False)
+        package.writestr('word/_rels/document.xml.rels', relationships.xml)
+        
+        # Stream the body one page at a time
+        final_sectPr = body.sectPr
+        with package.open('word/document.xml', 'w') as document_stream:
+            document_stream.write(document_start)
+            for index, page in enumerate(pages, 1):
+                shape = page.get('shape', 'square')
+                highlight_cells = None
+                if page.get('answer_key') and page.get('placements'):
+                    highlight_cells = {cell for placement in page['placements']
+                                       for cell in get_placement_cells(placement)}
+                add_puzzle_page(scratch, page['grid'], page.get('words', []), font_name, theme_colors,
+                                shape, highlight_cells)
+                
+                sectPr = deepcopy(section_templates[get_shape_class(shape)])
+                header_reference = OxmlElement('w:headerReference')
+                header_reference.set(qn('w:type'), 'default')
+                header_reference.set(qn('r:id'), f'rIdHeader{index}')
+                sectPr.insert(0, header_reference)
+                
+                # A section ends with the sectPr in its last paragraph; the final
+                # section's sectPr is the last child of the body
+                page_elements = [child for child in body if child is not final_sectPr]
+                if index < len(pages):
+                    page_elements[-1].get_or_add_pPr().append(sectPr)
+                else:
+                    page_elements.append(sectPr)
+                
+                for element in page_elements:
+                    document_stream.write(etree.tostring(element, encoding='UTF-8'))
+                    if element is not sectPr:
+                        body.remove(element)
+                
+                if progress:
+                    progress(index, len(pages))
+            
+            document_stream.write(b'</w:body></w:document>')
+        
+        # Styles last, once every page has added the styles it needs
+        package.writestr(styles_part.partname.membername, styles_part.blob)
+
+def build_workbook_content_types(parts, header_count, footer_count):
+    """Build [Content_Types].xml for a workbook's parts plus its generated headers and footers."""
+    overrides = [(part.partname, part.content_type) for part in parts]
+    overrides += [(f'/word/header{index}.xml', CT.WML_HEADER) for index in range(1, header_count + 1)]
+    overrides += [(f'/word/footer{index}.xml', CT.WML_FOOTER) for index in range(1, footer_count + 1)]
+    
+    xml = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>',
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">',
+        f'<Default Extension="rels" ContentType="{CT.OPC_RELATIONSHIPS}"/>',
+        f'<Default Extension="xml" ContentType="{CT.XML}"/>',
+    ]
+    xml += [f'<Override PartName="{escape(partname)}" ContentType="{escape(content_type)}"/>'
+            for partname, content_type in overrides]
+    xml.append('</Types>')
+    return ''.join(xml)
+
+def add_puzzle_page(doc, grid, word_list, font_name, theme_colors, shape='square', highlight_cells=None):
+    """Add the word list and puzzle grid side by side (highlight_cells are shaded for answer keys)."""
+    
+    plan = plan_puzzle_layout(grid, shape, len(word_list))
+    
+    # Create main table with 3 columns (wordlist, spacer, puzzle)
+    main_table = doc.add_table(rows=1, cols=3)
+    main_table.alignment = WD_TABLE_ALIGNMENT.CENTER
+    left_cell = main_table.cell(0, 0)    # Wordlist
+    spacer_cell = main_table.cell(0, 1)  # Spacer
+    right_cell = main_table.cell(0, 2)   # Puzzle
+    
+    # Column widths from the layout plan
+    left_cell.width = Inches(plan.docx_wordlist_width)
+    spacer_cell.width = Inches(plan.docx_spacer_width)
+    right_cell.width = Inches(plan.docx_puzzle_width)
+    
+    # White background and no cell padding (to maximize usable space), set
+    # once on the table instead of on every cell; cells are top-aligned by default
+    set_table_defaults(main_table, 'ffffff')
     
     # Clear the spacer cell content
     spacer_cell.text = ''  # Empty spacer cell
     
     # Add puzzle to right cell (no titles - they're now on the page)
-    add_puzzle_to_cell(right_cell, grid, font_name, theme_colors, shape)
+    add_puzzle_to_cell(right_cell, grid, font_name, theme_colors, shape, highlight_cells, plan)
     
     # Add word list to left cell (without header since it's now at the top)
     add_word_list_to_cell_without_header(left_cell, word_list, font_name, theme_colors, shape)
     
-    # Add conditional spacing after main content
+    # Add conditional spacing after main content (minimal, so shaped pages fit on one page)
     spacer_paragraph2 = doc.add_paragraph()
-    if shape == 'square':
-        spacer_paragraph2.paragraph_format.space_after = Pt(3)  # Minimal spacing for square
-    else:
-        spacer_paragraph2.paragraph_format.space_after = Pt(2)  # Minimal spacing for non-square to fit one page
-    
-    # Conditional instructions placement based on shape
-    if shape == 'square':
-        # For square shapes: instructions go in footer (left aligned)
-        add_instructions_to_footer(doc, font_name, theme_colors)
-    else:
-        # For non-square shapes: instructions go in footer (same as PDF format)
-        add_instructions_to_footer_for_non_square(doc, font_name, theme_colors)
-    
-    # Save document
-    normalized_path = os.path.abspath(filename)
-    print(f"DEBUG word_exporter: Attempting to save to: {normalized_path}")
-    print(f"DEBUG word_exporter: Directory exists: {os.path.exists(os.path.dirname(normalized_path))}")
-    doc.save(normalized_path)
+    spacer_paragraph2.paragraph_format.space_after = Pt(plan.docx_space_after)
+
+def set_table_defaults(table, color_hex):
+    """Set the background color of every cell and zero cell margins at the table level."""
+    tblPr = table._tbl.tblPr
+    defaults = parse_xml(_TABLE_DEFAULTS_XML.format(nsdecls=nsdecls('w'), fill=color_hex))
+    
+    # Keep the schema order: ... jc, shd, tblLayout, tblCellMar, tblLook
+    tblLook = tblPr.find(qn('w:tblLook'))
+    for element in list(defaults):
+        if tblLook is not None:
+            tblLook.addprevious(element)
+        else:
+            tblPr.append(element)
 
 def set_cell_background(cell, color_hex):
     """Set the background color of a table cell to white."""
@@ -296,47 +562,87 @@ def add_word_list_to_cell_without_header(cell, word_list, font_name, theme_color
         else:
             word_paragraph.paragraph_format.space_after = Pt(0)  # No spacing after last word
 
-def add_puzzle_to_cell(cell, grid, font_name, theme_colors, shape='square'):
-    """Add puzzle grid to the specified cell."""
-    
-    # Create puzzle table
-    puzzle_table = cell.add_table(rows=len(grid), cols=len(grid[0]))
-    puzzle_table.style = 'Table Grid'
-    puzzle_table.alignment = WD_TABLE_ALIGNMENT.CENTER
-    
-    # Set conditional cell sizes based on shape - optimized for one-page fit
-    if shape == 'square':
-        # Square shapes: larger cells since we have more space
-        cell_size = Inches(0.22)  # 0.22" cells for square shapes
-    else:
-        # Non-square shapes: smaller cells to ensure one-page fit
-        cell_size = Inches(0.18)  # 0.18" cells for non-square shapes
+def get_puzzle_letter_style(styles, font_name, letter_size, text_color):
+    """
+    Get (creating it once per document) the paragraph style shared by every grid letter.
+
+    Args:
+        styles: The document's styles
+        font_name: Word font name
+        letter_size: Letter size in points
+        text_color: Hex text color
+
+    Returns:
+        Style ID to reference from the grid paragraphs
+    """
+    style_name = f"{PUZZLE_LETTER_STYLE} {letter_size}"
+    existing = styles.element.get_by_name(style_name)
+    if existing is not None:
+        return existing.styleId
+    
+    style = styles.add_style(style_name, WD_STYLE_TYPE.PARAGRAPH)
+    style.base_style = styles['Normal']
+    style.hidden = True
+    style.font.name = font_name
+    style.font.size = Pt(letter_size)
+    style.font.bold = False  # Puzzle letters are not bold
+    style.font.color.rgb = RGBColor.from_string(text_color)
+    style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    return style.style_id
+
+def build_puzzle_table_xml(grid, style_id, cell_twips, highlight_cells=None):
+    """
+    Build the WordprocessingML for the whole puzzle grid in one pass.
+
+    Args:
+        grid: Puzzle grid
+        style_id: Paragraph style of the letters
+        cell_twips: Cell width and row height in twentieths of a point
+        highlight_cells: Optional set of (row, col) shaded as answers
+
+    Returns:
+        w:tbl XML string
+    """
+    cols = len(grid[0])
+    paragraph = _PUZZLE_PARAGRAPH_XML.format(style=style_id)
+    plain_cell = _PUZZLE_CELL_XML.format(width=cell_twips, shading='')
+    highlight_cell = _PUZZLE_CELL_XML.format(width=cell_twips, shading=_PUZZLE_HIGHLIGHT_XML)
     
-    for row in puzzle_table.rows:
-        row.height = cell_size
-        for cell in row.cells:
-            cell.width = cell_size
+    parts = [_PUZZLE_TABLE_START_XML.format(nsdecls=nsdecls('w'), fill='ffffff')]
+    parts.append(_PUZZLE_GRID_COL_XML.format(width=cell_twips) * cols)
+    parts.append('</w:tblGrid>')
     
-    # Fill table with grid data
+    row_start = _PUZZLE_ROW_START_XML.format(height=cell_twips)
     for i, row in enumerate(grid):
+        parts.append(row_start)
         for j, cell_content in enumerate(row):
-            table_cell = puzzle_table.cell(i, j)
-            table_cell.text = cell_content
-            
-            # Set cell background to white
-            set_cell_background(table_cell, 'ffffff')
-            
-            # Center text in each cell
-            for paragraph in table_cell.paragraphs:
-                paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                for run in paragraph.runs:
-                    run.font.name = font_name
-                    if shape == 'square':
-                        run.font.size = Pt(20)  # Square shapes: 20pt puzzle letters (original)
-                    else:
-                        run.font.size = Pt(12)  # Non-square shapes: 12pt puzzle letters
-                    run.bold = False  # Make puzzle letters not bold
-                    run.font.color.rgb = RGBColor.from_string(theme_colors['text'])
+            highlighted = highlight_cells and (i, j) in highlight_cells
+            parts.append(highlight_cell if highlighted else plain_cell)
+            parts.append(paragraph)
+            if cell_content:
+                parts.append(_PUZZLE_RUN_XML.format(text=escape(cell_content)))
+            parts.append('</w:p></w:tc>')
+        parts.append('</w:tr>')
+    
+    parts.append('</w:tbl>')
+    return ''.join(parts)
+
+def add_puzzle_to_cell(cell, grid, font_name, theme_colors, shape='square', highlight_cells=None, plan=None):
+    """Add puzzle grid to the specified cell (cells in highlight_cells are shaded)."""
+    
+    if plan is None:
+        plan = plan_puzzle_layout(grid, shape)
+    
+    # Letter formatting lives in one shared style instead of on every run
+    style_id = get_puzzle_letter_style(cell.part.styles, font_name, plan.docx_letter_size, theme_colors['text'])
+    
+    # Cell size from the layout plan - optimized for one-page fit
+    cell_twips = int(Inches(plan.docx_cell_size).twips)
+    
+    # Parse the whole grid at once and insert it like cell.add_table() would
+    puzzle_table = parse_xml(build_puzzle_table_xml(grid, style_id, cell_twips, highlight_cells))
+    cell._tc._insert_tbl(puzzle_table)
+    cell.add_paragraph()
 
 def add_instructions_to_footer(doc, font_name, theme_colors):
     """Add instructions to the footer, formatted like the image."""